@@ -11,8 +11,13 @@ const facturas_1 = __importDefault(require("./routes/facturas"));
 const calculadora_1 = __importDefault(require("./routes/calculadora"));
 const contacto_1 = __importDefault(require("./routes/contacto"));
 const dgii_1 = __importDefault(require("./routes/dgii"));
+const accessLog_1 = require("./utils/accessLog");
 dotenv_1.default.config();
 const app = (0, express_1.default)();
+// Registro de accesos para el sidecar de métricas (services/metrics.py), solo si se pide
+if (process.env.ACCESS_LOG) {
+    app.use((0, accessLog_1.accessLog)(process.env.ACCESS_LOG));
+}
 // Middleware de CORS
 app.use((0, cors_1.default)({
     origin: ["http://localhost:3000", "http://localhost:3001"], // Permitir múltiples orígenes
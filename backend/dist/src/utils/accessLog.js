@@ -0,0 +1,23 @@
+"use strict";
+var __importDefault = (this && this.__importDefault) || function (mod) {
+    return (mod && mod.__esModule) ? mod : { "default": mod };
+};
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.accessLog = accessLog;
+const fs_1 = __importDefault(require("fs"));
+// Registro de accesos en el formato "tiny" de morgan (`GET /api/x 200 123 - 4.567 ms`),
+// el que lee el sidecar de métricas: python -m services.metrics tail backend/access.log
+function accessLog(logPath) {
+    const stream = fs_1.default.createWriteStream(logPath, { flags: "a" });
+    return (req, res, next) => {
+        const start = process.hrtime.bigint();
+        // "finish" llega cuando se envió el último byte: las descargas cuentan su duración completa
+        res.on("finish", () => {
+            var _a;
+            const ms = Number(process.hrtime.bigint() - start) / 1e6;
+            const length = (_a = res.getHeader("content-length")) !== null && _a !== void 0 ? _a : "-";
+            stream.write(`${req.method} ${req.originalUrl} ${res.statusCode} ${length} - ${ms.toFixed(3)} ms\n`);
+        });
+        next();
+    };
+}
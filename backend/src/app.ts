@@ -6,11 +6,17 @@ import facturasRoutes from "./routes/facturas";
 import calculadoraRoutes from "./routes/calculadora";
 import contactoRoutes from "./routes/contacto";
 import dgiiRoutes from "./routes/dgii";
+import { accessLog } from "./utils/accessLog";
 
 dotenv.config();
 
 const app = express();
 
+// Registro de accesos para el sidecar de métricas (services/metrics.py), solo si se pide
+if (process.env.ACCESS_LOG) {
+  app.use(accessLog(process.env.ACCESS_LOG));
+}
+
 // Middleware de CORS
 app.use(cors({
   origin: ["http://localhost:3000", "http://localhost:3001"], // Permitir múltiples orígenes
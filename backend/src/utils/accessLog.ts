@@ -0,0 +1,18 @@
+import fs from "fs";
+import { NextFunction, Request, Response } from "express";
+
+// Registro de accesos en el formato "tiny" de morgan (`GET /api/x 200 123 - 4.567 ms`),
+// el que lee el sidecar de métricas: python -m services.metrics tail backend/access.log
+export function accessLog(logPath: string) {
+  const stream = fs.createWriteStream(logPath, { flags: "a" });
+  return (req: Request, res: Response, next: NextFunction) => {
+    const start = process.hrtime.bigint();
+    // "finish" llega cuando se envió el último byte: las descargas cuentan su duración completa
+    res.on("finish", () => {
+      const ms = Number(process.hrtime.bigint() - start) / 1e6;
+      const length = res.getHeader("content-length") ?? "-";
+      stream.write(`${req.method} ${req.originalUrl} ${res.statusCode} ${length} - ${ms.toFixed(3)} ms\n`);
+    });
+    next();
+  };
+}
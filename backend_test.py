@@ -5,17 +5,143 @@ Tests all backend endpoints and functionality
 """
 
 import requests
+import argparse
 import json
+import math
 import os
+import re
 import tempfile
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
 import time
 
+
+# Backend local por defecto (Express o python -m services.servidor); BACKEND_URL lo cambia
+DEFAULT_BASE_URL = os.getenv("BACKEND_URL", "http://localhost:4000")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe per-endpoint latency samples collected during a load run"""
+
+    # Segmentos dinámicos (ids numéricos, uuids) se agrupan bajo ":id"
+    ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36})$")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+
+    def endpoint_key(self, method: str, url: str) -> str:
+        segments = urlsplit(url).path.split("/")
+        path = "/".join(":id" if self.ID_SEGMENT.match(s) else s for s in segments)
+        return f"{method.upper()} {path or '/'}"
+
+    def record(self, method: str, url: str, seconds: float, failed: bool):
+        key = self.endpoint_key(method, url)
+        with self.lock:
+            self.samples.setdefault(key, []).append(seconds)
+            self.total += 1
+            if failed:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        with self.lock:
+            for key, values in sorted(self.samples.items()):
+                ordered = sorted(values)
+                endpoints[key] = {
+                    "count": len(ordered),
+                    "errors": self.errors.get(key, 0),
+                    "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                    "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                    "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                    "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+                    "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                    "max_ms": round(ordered[-1] * 1000, 3),
+                }
+        return endpoints
+
+
+class TimedSession(requests.Session):
+    """requests.Session that reports every request's wall time to a LatencyRecorder"""
+
+    def __init__(self, recorder: LatencyRecorder):
+        super().__init__()
+        self.recorder = recorder
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            self.recorder.record(method, url, time.perf_counter() - start, True)
+            raise
+        self.recorder.record(method, url, time.perf_counter() - start, response.status_code >= 500)
+        return response
+
+
 class ImpuestosRDBackendTester:
-    def __init__(self, base_url: str = "https://1c7f9ee5-6c1e-4d07-81c5-0b8e4ae3bfb1.e1-us-east-azure.emergentmethods.ai"):
+    # Casos de referencia de /api/calculadora/calcular (también usados como oráculo en benchmarks)
+    CALCULADORA_CASES = [
+        {
+            "name": "Basic ITBIS calculation",
+            "data": {
+                "subtotal": 1000,
+                "aplicarITBIS": True,
+                "aplicarIVA": False,
+                "aplicarRetencion": False,
+                "porcentajeITBIS": 18
+            },
+            "expected_itbis": 180,
+            "expected_total": 1180
+        },
+        {
+            "name": "ITBIS + IVA calculation",
+            "data": {
+                "subtotal": 1000,
+                "aplicarITBIS": True,
+                "aplicarIVA": True,
+                "aplicarRetencion": False,
+                "porcentajeITBIS": 18,
+                "porcentajeIVA": 18
+            },
+            "expected_itbis": 180,
+            "expected_iva": 180,
+            "expected_total": 1360
+        },
+        {
+            "name": "ITBIS with retention",
+            "data": {
+                "subtotal": 1000,
+                "aplicarITBIS": True,
+                "aplicarIVA": False,
+                "aplicarRetencion": True,
+                "porcentajeITBIS": 18,
+                "porcentajeRetencion": 10
+            },
+            "expected_itbis": 180,
+            "expected_retencion": 100,
+            "expected_total": 1080
+        }
+    ]
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL,
+                 session: Optional[requests.Session] = None, verbose: bool = True):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         self.test_results = []
+        self.verbose = verbose
         
     def log_test(self, test_name: str, success: bool, details: str = "", response_data: Any = None):
         """Log test results"""
@@ -26,8 +152,9 @@ class ImpuestosRDBackendTester:
             "response_data": response_data
         }
         self.test_results.append(result)
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} {test_name}: {details}")
+        if self.verbose:
+            status = "✅ PASS" if success else "❌ FAIL"
+            print(f"{status} {test_name}: {details}")
         
     def test_health_check(self):
         """Test GET /health endpoint"""
@@ -100,52 +227,10 @@ class ImpuestosRDBackendTester:
     
     def test_calculadora_calcular(self):
         """Test POST /api/calculadora/calcular endpoint"""
-        test_cases = [
-            {
-                "name": "Basic ITBIS calculation",
-                "data": {
-                    "subtotal": 1000,
-                    "aplicarITBIS": True,
-                    "aplicarIVA": False,
-                    "aplicarRetencion": False,
-                    "porcentajeITBIS": 18
-                },
-                "expected_itbis": 180,
-                "expected_total": 1180
-            },
-            {
-                "name": "ITBIS + IVA calculation",
-                "data": {
-                    "subtotal": 1000,
-                    "aplicarITBIS": True,
-                    "aplicarIVA": True,
-                    "aplicarRetencion": False,
-                    "porcentajeITBIS": 18,
-                    "porcentajeIVA": 18
-                },
-                "expected_itbis": 180,
-                "expected_iva": 180,
-                "expected_total": 1360
-            },
-            {
-                "name": "ITBIS with retention",
-                "data": {
-                    "subtotal": 1000,
-                    "aplicarITBIS": True,
-                    "aplicarIVA": False,
-                    "aplicarRetencion": True,
-                    "porcentajeITBIS": 18,
-                    "porcentajeRetencion": 10
-                },
-                "expected_itbis": 180,
-                "expected_retencion": 100,
-                "expected_total": 1080
-            }
-        ]
         
         all_passed = True
         
-        for test_case in test_cases:
+        for test_case in self.CALCULADORA_CASES:
             try:
                 response = self.session.post(
                     f"{self.base_url}/api/calculadora/calcular",
@@ -514,14 +599,109 @@ startxref
         
         return all_critical_passed
 
+    def scenario_names(self) -> List[str]:
+        """Names of every test_* scenario, in a stable order"""
+        return sorted(name for name in dir(self) if name.startswith("test_") and callable(getattr(self, name)))
+
+    def run_load_test(self, workers: int = 10, duration: Optional[float] = None,
+                      total_requests: Optional[int] = None, output: Optional[str] = None) -> Dict[str, Any]:
+        """Run every test_* scenario from concurrent workers and report latency percentiles per endpoint.
+
+        The run stops after ``duration`` seconds or once at least ``total_requests``
+        HTTP requests have been issued, whichever comes first (default: 30 seconds).
+        """
+        if duration is None and total_requests is None:
+            duration = 30.0
+
+        recorder = LatencyRecorder()
+        scenarios = self.scenario_names()
+        scenario_stats = {name: {"runs": 0, "failures": 0} for name in scenarios}
+        stats_lock = threading.Lock()
+        deadline = time.perf_counter() + duration if duration is not None else None
+
+        def should_stop() -> bool:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return True
+            return total_requests is not None and recorder.total >= total_requests
+
+        def worker(worker_id: int):
+            # Cada worker usa su propia sesión: requests.Session no es thread-safe
+            tester = ImpuestosRDBackendTester(self.base_url, session=TimedSession(recorder), verbose=False)
+            index = worker_id
+            while not should_stop():
+                name = scenarios[index % len(scenarios)]
+                index += 1
+                try:
+                    outcome = getattr(tester, name)()
+                except Exception:
+                    outcome = False
+                passed = outcome[0] if isinstance(outcome, tuple) else bool(outcome)
+                tester.test_results.clear()
+                with stats_lock:
+                    scenario_stats[name]["runs"] += 1
+                    if not passed:
+                        scenario_stats[name]["failures"] += 1
+
+        print(f"🔥 Load test: {workers} workers, "
+              f"{f'{duration}s' if duration is not None else 'no time limit'}, "
+              f"{f'{total_requests} requests' if total_requests is not None else 'no request limit'}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(worker, i) for i in range(workers)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        summary = {
+            "base_url": self.base_url,
+            "workers": workers,
+            "duration_s": round(elapsed, 3),
+            "total_requests": recorder.total,
+            "errors": sum(recorder.errors.values()),
+            "throughput_rps": round(recorder.total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": recorder.summary(elapsed),
+            "scenarios": scenario_stats,
+        }
+
+        print("\n" + "=" * 50)
+        print("📈 LOAD TEST SUMMARY")
+        print("=" * 50)
+        print(f"Requests: {summary['total_requests']} in {summary['duration_s']}s "
+              f"({summary['throughput_rps']} req/s, {summary['errors']} errors)")
+        for key, stats in summary["endpoints"].items():
+            print(f"{key}: n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+                  f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, sort_keys=True)
+            print(f"\n💾 Summary written to {output}")
+
+        return summary
+
 def main():
     """Main test execution"""
+    parser = argparse.ArgumentParser(description="ImpuestosRD backend tests")
     # Use the backend URL from frontend .env
-    backend_url = "http://localhost:4000"
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--load", action="store_true", help="run the concurrent load test instead of the functional tests")
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=None, help="load test duration in seconds")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many HTTP requests")
+    parser.add_argument("--output", default=None, help="write the load test JSON summary to this path")
+    args = parser.parse_args()
+
+    backend_url = args.base_url
     
     print(f"Testing backend at: {backend_url}")
     
     tester = ImpuestosRDBackendTester(backend_url)
+
+    if args.load:
+        summary = tester.run_load_test(workers=args.workers, duration=args.duration,
+                                       total_requests=args.requests, output=args.output)
+        return 0 if summary["total_requests"] and not summary["errors"] else 1
+
     success = tester.run_all_tests()
     
     if success:
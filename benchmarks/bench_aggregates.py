@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental dashboard rollups vs. rescanning the tables
+
+    python -m benchmarks.bench_aggregates --facturas 200000 --contactos 50000
+
+Fills a temporary local store with invoices (some with extracted ITBIS /
+IVA / retención) and contacts spread over three years while Aggregates
+follows it, then updates and deletes a share of the rows. Reports the
+rollup cost per write and the latency of a dashboard read (daily and
+monthly series) against rebuilding the same series from the full tables,
+and checks that both agree to the cent.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend_test import percentile
+from services.aggregates import CONTADORES, Aggregates, aporte
+from services.calculadora import calcular
+from services.local_store import LocalStore
+
+INICIO = datetime(2023, 1, 1, tzinfo=timezone.utc)
+DIAS = 3 * 365
+
+
+def fecha(rng: random.Random) -> str:
+    instante = INICIO + timedelta(days=rng.randrange(DIAS), seconds=rng.randrange(86400))
+    return instante.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def factura(rng: random.Random) -> dict:
+    row = {"nombre_archivo": f"factura_{rng.randrange(10**6)}.pdf", "tipo_archivo": "application/pdf",
+           "tamano_archivo": rng.randint(20_000, 2_000_000), "subido_en": fecha(rng)}
+    if rng.random() < 0.7:
+        row["extraccion"] = {"calculo": calcular({
+            "subtotal": round(rng.uniform(100, 250_000), 2), "aplicarIVA": rng.random() < 0.2,
+            "aplicarRetencion": rng.random() < 0.3})}
+    return row
+
+
+def reescanear(store: LocalStore, granularidad: str) -> dict:
+    """What a dashboard has to do without rollups: aggregate every row"""
+    largo = 10 if granularidad == "dia" else 7
+    cubos = {}
+    for tabla in ("facturas", "contactos"):
+        for row in store.table(tabla).records.values():
+            contribucion = aporte(tabla, row)
+            if contribucion is None:
+                continue
+            cubo = cubos.setdefault(contribucion[0][:largo], [0] * len(CONTADORES))
+            for i, v in enumerate(contribucion[1]):
+                cubo[i] += v
+    return cubos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard rollups benchmark")
+    parser.add_argument("--facturas", type=int, default=200_000)
+    parser.add_argument("--contactos", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(16)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalStore(os.path.join(tmp, "data"))
+        filas = [("facturas", factura(rng)) for _ in range(args.facturas)]
+        filas += [("contactos", {"nombre": "Cliente", "email": "c@ejemplo.com", "mensaje": "Hola",
+                                 "fecha_creacion": fecha(rng)}) for _ in range(args.contactos)]
+        rng.shuffle(filas)
+
+        # La mitad ya existe al arrancar (carga inicial); la otra llega por los listeners
+        mitad = len(filas) // 2
+        for tabla, row in filas[:mitad]:
+            store.from_(tabla).insert([dict(row)])
+
+        aggregates = Aggregates()
+        start = time.perf_counter()
+        aggregates.attach(store)
+        carga = time.perf_counter() - start
+
+        aplicar, escrituras = aggregates.aplicar, []
+
+        def medido(*args):
+            t = time.perf_counter()
+            aplicar(*args)
+            escrituras.append(time.perf_counter() - t)
+
+        aggregates.aplicar = medido
+        for tabla, row in filas[mitad:]:
+            store.from_(tabla).insert([dict(row)])
+
+        # Actualizaciones (extracción terminada) y borrados sobre filas al azar
+        facturas = store.table("facturas")
+        ids = list(facturas.records)
+        for id in rng.sample(ids, len(ids) // 20):
+            store.from_("facturas").update({"extraccion": factura(rng).get("extraccion"),
+                                            "tamano_archivo": rng.randint(1, 10_000)}).eq("id", id)
+        for id in rng.sample(ids, len(ids) // 50):
+            store.from_("facturas").delete().eq("id", id)
+
+        for granularidad in ("dia", "mes"):
+            lecturas = []
+            for _ in range(args.repeticiones):
+                t = time.perf_counter()
+                serie = aggregates.serie(granularidad)
+                lecturas.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            esperado = reescanear(store, granularidad)
+            rescan = time.perf_counter() - t
+
+            obtenido = {c["periodo"]: [round(c[n] * 100) if isinstance(c[n], float) else c[n] for n in CONTADORES]
+                        for c in serie}
+            iguales = obtenido == {k: v for k, v in esperado.items() if any(v)}
+            ok &= iguales
+            lecturas.sort()
+            print(f"{'✅' if iguales else '❌'} {granularidad:<4} {len(serie):>5} buckets  "
+                  f"read p50={percentile(lecturas, 50) * 1e3:.2f}ms p99={percentile(lecturas, 99) * 1e3:.2f}ms  "
+                  f"rescan={rescan * 1e3:.0f}ms")
+
+        totales = aggregates.resumen()
+        print(f"ℹ️  {totales['facturas']:,} facturas, {totales['contactos']:,} contactos, "
+              f"ITBIS RD$ {totales['itbis']:,.2f}")
+        escrituras.sort()
+        print(f"⏱️  rollup update per write p50={percentile(escrituras, 50) * 1e6:.1f}µs "
+              f"p99={percentile(escrituras, 99) * 1e6:.1f}µs; initial load of {mitad:,} rows {carga:.2f}s")
+        store.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch tax engine vs. looping over POST /api/calculadora/calcular
+
+    python -m benchmarks.bench_calculadora --rows 200000
+    python -m benchmarks.bench_calculadora --base-url http://localhost:4000 --http-rows 500
+
+The expected_* cases of ImpuestosRDBackendTester.test_calculadora_calcular
+are the correctness oracle; random rows are additionally checked against a
+line-by-line port of the Express handler before anything is timed.
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from backend_test import ImpuestosRDBackendTester
+from services.calculadora import (PORCENTAJE_ITBIS, PORCENTAJE_IVA, PORCENTAJE_RETENCION,
+                                  calcular_solicitudes, to_fixed)
+
+
+def calcular_referencia(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Line-by-line port of the /calcular handler, one request at a time"""
+    subtotal = body["subtotal"]
+    itbis = subtotal * (body.get("porcentajeITBIS", PORCENTAJE_ITBIS) / 100) if body.get("aplicarITBIS", True) else 0
+    iva = subtotal * (body.get("porcentajeIVA", PORCENTAJE_IVA) / 100) if body.get("aplicarIVA", False) else 0
+    retencion = subtotal * (body.get("porcentajeRetencion", PORCENTAJE_RETENCION) / 100) if body.get("aplicarRetencion", False) else 0
+    total = subtotal + itbis + iva - retencion
+    return {
+        "calculo": {"subtotal": subtotal, "impuestos": {"itbis": itbis, "iva": iva, "retencion": retencion}, "total": total},
+        "detalles": {"subtotal": to_fixed(subtotal), "itbis": to_fixed(itbis), "iva": to_fixed(iva),
+                     "retencion": to_fixed(retencion), "total": to_fixed(total)},
+    }
+
+
+def generar_solicitudes(rows: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(rows):
+        bodies.append({
+            "subtotal": round(rng.uniform(0.01, 250000), 2),
+            "aplicarITBIS": rng.random() < 0.9,
+            "aplicarIVA": rng.random() < 0.2,
+            "aplicarRetencion": rng.random() < 0.3,
+            "porcentajeITBIS": rng.choice([18, 16, 0]),
+            "porcentajeIVA": 18,
+            "porcentajeRetencion": rng.choice([10, 2, 5, 30]),
+        })
+    return bodies
+
+
+def verificar_oraculo() -> bool:
+    """Check the engine against the expected_* values used by backend_test"""
+    cases = ImpuestosRDBackendTester.CALCULADORA_CASES
+    lote = calcular_solicitudes(case["data"] for case in cases)
+    ok = True
+    for i, case in enumerate(cases):
+        calculo = lote.calculo(i)
+        checks = [("total", calculo["total"], case["expected_total"])]
+        for key in ("itbis", "iva", "retencion"):
+            if f"expected_{key}" in case:
+                checks.append((key, calculo["impuestos"][key], case[f"expected_{key}"]))
+        for name, got, expected in checks:
+            if to_fixed(got) != to_fixed(expected):
+                print(f"❌ {case['name']}: {name} expected {expected}, got {got}")
+                ok = False
+    print(f"{'✅' if ok else '❌'} Oracle cases ({len(cases)}) {'match' if ok else 'differ'}")
+    return ok
+
+
+def verificar_paridad(bodies: List[Dict[str, Any]], lote) -> bool:
+    mismatches = 0
+    for i, body in enumerate(bodies):
+        if lote.resultado(i) != calcular_referencia(body):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Row {i}: {lote.resultado(i)} != {calcular_referencia(body)}")
+    print(f"{'✅' if not mismatches else '❌'} Parity with handler port: {len(bodies) - mismatches}/{len(bodies)} rows")
+    return not mismatches
+
+
+def medir_http(base_url: str, bodies: List[Dict[str, Any]], lote) -> float:
+    import requests
+
+    session = requests.Session()
+    mismatches = 0
+    start = time.perf_counter()
+    for i, body in enumerate(bodies):
+        response = session.post(f"{base_url}/api/calculadora/calcular", json=body)
+        if response.json().get("detalles") != lote.detalles(i):
+            mismatches += 1
+    elapsed = time.perf_counter() - start
+    print(f"{'✅' if not mismatches else '❌'} HTTP detalles match batch engine: "
+          f"{len(bodies) - mismatches}/{len(bodies)} rows")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch tax engine benchmark")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--parity-rows", type=int, default=20_000)
+    parser.add_argument("--base-url", default=None, help="also loop over the live endpoint")
+    parser.add_argument("--http-rows", type=int, default=500)
+    args = parser.parse_args()
+
+    ok = verificar_oraculo()
+
+    bodies = generar_solicitudes(args.rows)
+    start = time.perf_counter()
+    lote = calcular_solicitudes(bodies)
+    batch_elapsed = time.perf_counter() - start
+    ok = verificar_paridad(bodies[:args.parity_rows], lote) and ok
+
+    print(f"\n⚡ Batch engine: {args.rows} rows in {batch_elapsed:.3f}s "
+          f"({args.rows / batch_elapsed:,.0f} rows/s)")
+
+    if args.base_url:
+        http_rows = min(args.http_rows, args.rows)
+        http_elapsed = medir_http(args.base_url, bodies[:http_rows], lote)
+        per_row = http_elapsed / http_rows
+        print(f"🌐 HTTP loop: {http_rows} rows in {http_elapsed:.3f}s ({1 / per_row:,.0f} rows/s)")
+        print(f"   Estimated HTTP time for {args.rows} rows: {per_row * args.rows:.1f}s "
+              f"(batch speed-up x{per_row * args.rows / batch_elapsed:,.0f})")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoized /calcular responses under a skewed request mix
+
+    python -m benchmarks.bench_calculadora_cache --requests 200000 --distinct 20000 --zipf 1.1
+
+Replays requests drawn from a Zipf distribution over a pool of distinct
+bodies (the first ranks are the UI's quick-button amounts) through
+CalculadoraCache and through the uncached compute-and-serialize path, and
+reports per-request latency, throughput and the cache hit ratio. Before
+timing, every distinct body's cached bytes are checked against the
+uncached bytes and against the line-by-line port of the Express handler.
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from backend_test import percentile
+from benchmarks.bench_calculadora import calcular_referencia, generar_solicitudes
+from services.calculadora import js_json
+from services.calculadora_cache import CalculadoraCache, calcular_respuesta, normalizar
+
+BOTONES = [100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000]
+
+
+def pool_solicitudes(distinct: int, seed: int = 17) -> List[Dict[str, Any]]:
+    """Quick-button combinations first (most popular ranks), then random bodies"""
+    rapidas = [{"subtotal": monto, "aplicarITBIS": itbis, "aplicarIVA": iva, "aplicarRetencion": retencion}
+               for monto, itbis, iva, retencion in itertools.product(BOTONES, (True, False), (False, True), (False, True))]
+    rapidas += [{"subtotal": 0}, {}, {"subtotal": "1000"}]  # también se repiten las inválidas
+    return (rapidas + generar_solicitudes(max(0, distinct - len(rapidas)), seed))[:distinct]
+
+
+def medir(nombre: str, responder, trafico) -> List[float]:
+    tiempos = []
+    start = time.perf_counter()
+    for body in trafico:
+        t = time.perf_counter()
+        responder(body)
+        tiempos.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    tiempos.sort()
+    print(f"⏱️  {nombre:<9} p50={percentile(tiempos, 50) * 1e6:6.1f}µs p99={percentile(tiempos, 99) * 1e6:6.1f}µs "
+          f"{len(trafico) / elapsed:>10,.0f} req/s")
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculation cache benchmark")
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="skew exponent of the request mix")
+    parser.add_argument("--maxsize", type=int, default=5_000)
+    args = parser.parse_args()
+    rng = random.Random(17)
+
+    pool = pool_solicitudes(args.distinct)
+    service = CalculadoraCache(maxsize=args.maxsize)
+
+    ok = True
+    for body in pool:
+        esperado = calcular_respuesta(normalizar(body))
+        ok &= service.responder(body) == esperado == service.responder(body)
+        if esperado[0] == 200:
+            ok &= esperado[1] == js_json(calcular_referencia(body)).encode("utf-8")
+    print(f"{'✅' if ok else '❌'} {len(pool):,} distinct bodies: cached bytes match the handler")
+
+    pesos = list(itertools.accumulate(1 / rank ** args.zipf for rank in range(1, len(pool) + 1)))
+    trafico = rng.choices(pool, cum_weights=pesos, k=args.requests)
+
+    service = CalculadoraCache(maxsize=args.maxsize)
+    sin_cache = medir("uncached", lambda body: calcular_respuesta(normalizar(body)), trafico)
+    con_cache = medir("cached", service.responder, trafico)
+    stats = service.stats()
+    print(f"ℹ️  hit ratio {stats['hit_ratio']:.1%} ({stats['hits']:,} hits, {stats['misses']:,} misses, "
+          f"{stats['size']:,}/{stats['maxsize']:,} entries), "
+          f"p50 {percentile(sin_cache, 50) / percentile(con_cache, 50):.0f}x faster")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
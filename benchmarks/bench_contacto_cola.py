@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark: contact form burst, one commit per row vs the write-behind queue
+
+    python -m benchmarks.bench_contacto_cola --contacts 5000 --threads 32
+
+Fires the same burst of contacts from many threads twice against a
+temporary SQLite database: first inserting and committing each row like
+the route does today, then through ContactQueue (append to the local WAL
+queue, batched flush). Reports p50/p99 submit latency and the commits
+the database saw, then checks every contact landed exactly once, that a
+full queue pushes back (ColaLlena / HTTP 503), that rows left in the
+queue file survive a restart and that rows the database rejects move to
+the fallidos table instead of blocking the queue.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from backend_test import percentile
+from benchmarks.bench_bulk_contactos import generar_contactos
+from database.contact_queue import ColaLlena, ContactQueue
+from database.engine import create_configured_engine
+from database.migrations import run_migrations
+from database.models import Contacto
+from services.contacto import register_routes
+from services.http import App, make_threaded_server
+from services.local_store import LocalStore
+
+
+def rafaga(submit, contactos, threads):
+    """Latencies (sorted) of submitting every contact from `threads` concurrent senders"""
+    def enviar(data):
+        start = time.perf_counter()
+        submit(data)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        samples = sorted(pool.map(enviar, contactos))
+    return samples, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write-behind contact queue burst benchmark")
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    ok = True
+
+    def check(condicion: bool, mensaje: str):
+        nonlocal ok
+        if not condicion:
+            print(f"❌ {mensaje}")
+            ok = False
+
+    contactos = list(generar_contactos(args.contacts))
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_configured_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        run_migrations(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        commits = {"n": 0}
+        lock = threading.Lock()
+
+        def contar(conn):
+            with lock:
+                commits["n"] += 1
+        event.listen(engine, "commit", contar)
+
+        def filas():
+            with session_factory() as session:
+                return session.execute(select(func.count()).select_from(Contacto)).scalar()
+
+        def sincrono(data):
+            with session_factory() as session:
+                session.execute(insert(Contacto.__table__), [{**data, "telefono": data["telefono"] or None}])
+                session.commit()
+
+        samples, elapsed = rafaga(sincrono, contactos, args.threads)
+        p50, p99 = percentile(samples, 50) * 1000, percentile(samples, 99) * 1000
+        print(f"🐢 Commit per row:  p50={p50:.2f}ms p99={p99:.2f}ms, {commits['n']:,} commits, "
+              f"{args.contacts / elapsed:,.0f} contacts/s")
+        check(filas() == args.contacts, "Synchronous burst lost rows")
+
+        with session_factory() as session:
+            session.execute(Contacto.__table__.delete())
+            session.commit()
+        commits["n"] = 0
+        cola = ContactQueue(os.path.join(tmp, "cola.sqlite3"), session_factory, args.batch_size,
+                            args.flush_interval, max_pendientes=args.contacts).start()
+        samples, elapsed = rafaga(cola.encolar, contactos, args.threads)
+        check(cola.join(timeout=60), "Queue not drained after 60s")
+        p50_cola, p99_cola = percentile(samples, 50) * 1000, percentile(samples, 99) * 1000
+        print(f"🚀 Write-behind:    p50={p50_cola:.2f}ms p99={p99_cola:.2f}ms, {commits['n']:,} commits "
+              f"({cola.stats['commits']} batches), {args.contacts / elapsed:,.0f} contacts/s acknowledged")
+        cola.stop()
+        check(filas() == args.contacts, f"Queue flushed {filas()} rows instead of {args.contacts}")
+        check(p99_cola < p99, "Queue p99 submit latency is not lower")
+        check(commits["n"] * 10 <= args.contacts, "Batches are not amortizing commits")
+        check(len(cola) == 0 and cola.stats["errores"] == 0, "Queue left rows or hit flush errors")
+        cola.close()
+
+        # Backpressure: sin volcador la cola se llena y rechaza, por código y por HTTP
+        path = os.path.join(tmp, "llena.sqlite3")
+        cola = ContactQueue(path, session_factory, args.batch_size, max_pendientes=100)
+        for data in contactos[:100]:
+            cola.encolar(data)
+        try:
+            cola.encolar(contactos[100])
+            check(False, "Full queue accepted a contact")
+        except ColaLlena:
+            pass
+        store = LocalStore(os.path.join(tmp, "data"))
+        app = App()
+        register_routes(app, store, cola)
+        server = make_threaded_server(app, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            r = requests.post(f"{base_url}/api/contacto/enviar", json=contactos[0])
+            check(r.status_code == 503 and r.headers.get("Retry-After"), f"Full queue answered {r.status_code}")
+            r = requests.post(f"{base_url}/api/contacto/enviar", json={"nombre": "x", "email": "x"})
+            check(r.status_code == 400, "Invalid contact not rejected with 400")
+            r = requests.post(f"{base_url}/api/contacto/enviar", json={**contactos[0], "email": "a@b.co\n"})
+            check(r.status_code == 400, f"Email with a trailing newline answered {r.status_code}")
+        finally:
+            server.shutdown()
+            server.server_close()
+        print(f"🛑 Backpressure:    {cola.stats['rechazados']} contacts rejected at {len(cola)} pending")
+        cola.close()
+
+        # Durabilidad: las filas pendientes en el fichero se vuelcan al reabrir la cola
+        antes = filas()
+        cola = ContactQueue(path, session_factory, args.batch_size, max_pendientes=100)
+        check(len(cola) == 100, f"Reopened queue has {len(cola)} pending rows instead of 100")
+        cola.start()
+        check(cola.join(timeout=30), "Reopened queue not drained")
+        app = App()
+        register_routes(app, store, cola)
+        server = make_threaded_server(app, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base_url = f"http://127.0.0.1:{server.server_port}"
+            r = requests.post(f"{base_url}/api/contacto/enviar", json=contactos[0])
+            contacto = r.json().get("contacto", {})
+            check(r.status_code == 202 and contacto.get("id_cola") and "id" in contacto, "Queued contact not accepted")
+            check(cola.join(timeout=30), "Reopened queue not drained")
+            # Las lecturas salen de la misma tabla a la que vuelca la cola
+            listado = requests.get(f"{base_url}/api/contacto").json()
+            check(len(listado) == filas() and listado[0]["email"] == contactos[0]["email"],
+                  "Flushed contact not listed by GET /api/contacto")
+            r = requests.get(f"{base_url}/api/contacto/{listado[0]['id']}")
+            check(r.status_code == 200 and r.json()["mensaje"] == contactos[0]["mensaje"],
+                  "Flushed contact not found by GET /api/contacto/:id")
+        finally:
+            server.shutdown()
+            server.server_close()
+        check(filas() - antes == 101, f"Restart flushed {filas() - antes} rows instead of 101")
+        print(f"💾 Restart:         {filas() - antes} queued contacts flushed after reopening")
+        cola.close()
+
+        # Filas envenenadas: la base de datos rechaza una (nombre NULL) y otra trae una fecha ilegible;
+        # las dos pasan a fallidos y el resto del lote se inserta
+        try:
+            cola = ContactQueue(os.path.join(tmp, "veneno.sqlite3"), session_factory, args.batch_size)
+            cola.encolar({**contactos[0], "fecha_creacion": "ayer"})
+            check(False, "Queue accepted an invalid fecha_creacion")
+        except ValueError:
+            pass
+        antes = filas()
+        cola.encolar(contactos[0])
+        for datos in ({**contactos[1], "nombre": None, "fecha_creacion": "2025-01-01T00:00:00"},
+                      {**contactos[2], "fecha_creacion": "ayer"}):
+            cola._db.execute("INSERT INTO cola (datos) VALUES (?)", (json.dumps(datos),))
+            cola._pendientes += 1
+        cola.encolar(contactos[3])
+        while cola.flush():
+            pass
+        fallidos = cola._db.execute("SELECT COUNT(*) FROM fallidos").fetchone()[0]
+        check(len(cola) == 0 and fallidos == 2 and cola.stats["fallidos"] == 2,
+              f"Poison rows: {len(cola)} pending, {fallidos} in fallidos")
+        check(filas() - antes == 2, f"Poison batch inserted {filas() - antes} good rows instead of 2")
+        print(f"☠️  Dead letter:     {fallidos} rejected rows moved to fallidos, {filas() - antes} inserted")
+        cola.close()
+        store.close()
+        engine.dispose()
+
+    print("✅ Write-behind queue correct" if ok else "❌ Benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
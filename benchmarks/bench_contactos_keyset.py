@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyset vs. OFFSET pagination of contactos on a seeded table
+
+    python -m benchmarks.bench_contactos_keyset --rows 1000000
+
+Page latency with the (fecha_creacion, id) cursor should stay flat from the
+first page to the last; OFFSET pages get slower the deeper they are.
+Before seeding, a table in the old init_db schema (nullable mensaje, no
+fecha_creacion) is upgraded through the migrations to check they keep
+its rows and end on the model's NOT NULL columns.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.orm import sessionmaker
+
+from backend_test import percentile
+from database.bulk_load import cargar_contactos
+from database.engine import create_configured_engine
+from database.migrations import drop_schema, run_migrations
+from database.models import Contacto
+from database.queries import COLUMNAS_LISTA, encode_cursor, listar_contactos
+
+
+def sembrar(session_factory, rows: int):
+    inicio = datetime(2020, 1, 1)
+
+    def contactos():
+        for i in range(rows):
+            yield {
+                "nombre": f"Cliente {i}",
+                "email": f"cliente{i}@ejemplo.com",
+                "telefono": None,
+                "mensaje": "Consulta " * 40,
+                # Varios contactos por segundo: el id desempata dentro de la misma fecha
+                "fecha_creacion": inicio + timedelta(seconds=i // 3),
+            }
+
+    return cargar_contactos(contactos(), session_factory, batch_size=20_000)
+
+
+def comprobar_esquema_antiguo(engine) -> bool:
+    """Upgrade a contactos table as the old init_db created it, with NULL mensaje rows"""
+    antigua = Table("contactos", MetaData(),
+                    Column("id", Integer, primary_key=True, index=True),
+                    Column("nombre", String, nullable=False), Column("email", String, nullable=False),
+                    Column("telefono", String, nullable=True), Column("mensaje", String, nullable=True))
+    drop_schema(engine)
+    antigua.create(engine)
+    with engine.begin() as conn:
+        conn.execute(antigua.insert(), [{"nombre": "Ana", "email": "ana@ejemplo.com", "mensaje": None},
+                                        {"nombre": "Luis", "email": "luis@ejemplo.com", "mensaje": "Hola"}])
+    run_migrations(engine)
+    with engine.connect() as conn:
+        columnas = {c["name"]: c for c in inspect(conn).get_columns("contactos")}
+        filas = conn.execute(select(Contacto.mensaje, Contacto.fecha_creacion).order_by(Contacto.id)).all()
+    ok = (not columnas["mensaje"]["nullable"] and not columnas["fecha_creacion"]["nullable"]
+          and [m for m, _ in filas] == ["", "Hola"] and all(f is not None for _, f in filas))
+    print(f"{'✅' if ok else '❌'} Old init_db schema upgraded: {len(filas)} rows, "
+          f"mensaje nullable={columnas['mensaje']['nullable']}")
+    drop_schema(engine)
+    return ok
+
+
+def medir(label, func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label:<32} p50={percentile(samples, 50) * 1000:8.3f}ms p99={percentile(samples, 99) * 1000:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyset pagination benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--url", default=None, help="database to seed (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_configured_engine(args.url or f"sqlite:///{os.path.join(tmp, 'keyset.sqlite3')}")
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        ok = comprobar_esquema_antiguo(engine)
+        run_migrations(engine)
+
+        seeded = sembrar(session_factory, args.rows)
+        print(f"🌱 Seeded {seeded.insertados:,} contactos in {seeded.segundos:.1f}s")
+
+        with session_factory() as session:
+            ordered = select(Contacto.fecha_creacion, Contacto.id).order_by(
+                Contacto.fecha_creacion.desc(), Contacto.id.desc())
+            for fraction in (0.0, 0.5, 0.99):
+                offset = int(args.rows * fraction)
+                cursor = None
+                if offset:
+                    fecha, id = session.execute(ordered.offset(offset - 1).limit(1)).one()
+                    cursor = encode_cursor(fecha, id)
+
+                page = listar_contactos(session, args.page_size, cursor)
+                assert len(page.items) == min(args.page_size, args.rows - offset)
+                medir(f"keyset page at {fraction:.0%}",
+                      lambda: listar_contactos(session, args.page_size, cursor), args.repeat)
+
+                offset_query = (select(*COLUMNAS_LISTA)
+                                .order_by(Contacto.fecha_creacion.desc(), Contacto.id.desc())
+                                .offset(offset).limit(args.page_size))
+                medir(f"OFFSET page at {fraction:.0%}",
+                      lambda: session.execute(offset_query).all(), max(3, args.repeat // 10))
+
+            total = session.execute(select(func.count()).select_from(Contacto)).scalar()
+            print(f"📄 {total:,} rows, page size {args.page_size}")
+        engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark: invoice download URLs and /uploads range serving
+
+    python -m benchmarks.bench_descargas --facturas 20000 --size-mb 50
+
+Compares minting a download URL the Express way (row lookup + new
+signature per call) with the cached Descargas.url, checks that hot
+downloads do no store lookups, and serves a large PDF blob over HTTP:
+full body, random 64KB ranges, 304 revalidation, signed and tampered
+URLs.
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from backend_test import percentile
+from services.blob_store import BlobStore
+from services.descargas import Descargas, register_routes
+from services.http import App, make_threaded_server
+from services.local_store import LocalStore
+
+
+def medir(func, args):
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return percentile(samples, 50) * 1e6, percentile(samples, 99) * 1e6
+
+
+def crear_pdf(path: str, size: int) -> str:
+    digest = hashlib.sha256()
+    rng = random.Random(5)
+    with open(path, "wb") as f:
+        bloque = b"%PDF-1.4\n" + rng.randbytes(1024 * 1024 - 9)
+        escritos = 0
+        while escritos < size:
+            trozo = bloque[:size - escritos]
+            f.write(trozo)
+            digest.update(trozo)
+            escritos += len(trozo)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download URL cache and range serving benchmark")
+    parser.add_argument("--facturas", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--ranges", type=int, default=500)
+    args = parser.parse_args()
+
+    ok = True
+
+    def check(condicion: bool, mensaje: str):
+        nonlocal ok
+        if not condicion:
+            print(f"❌ {mensaje}")
+            ok = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = os.path.join(tmp, "uploads")
+        store = LocalStore(os.path.join(tmp, "data"))
+        blobs = BlobStore(storage)
+        size = args.size_mb * 1024 * 1024
+        origen = os.path.join(tmp, "factura.pdf")
+        sha256 = crear_pdf(origen, size)
+        ruta, _ = blobs.put_file(origen, sha256)
+        store.from_("facturas").insert([
+            {"nombre_archivo": f"factura_{i}.pdf", "ruta_storage": ruta, "tipo_archivo": "application/pdf",
+             "tamaño": size, "sha256": sha256} for i in range(args.facturas)])
+
+        descargas = Descargas(storage).attach(store)
+        table = store.table("facturas")
+        consultas = {"n": 0}
+        find = table.find
+
+        def find_contado(column, value):
+            consultas["n"] += 1
+            return find(column, value)
+        table.find = find_contado
+
+        def express(id):
+            # Lo que hace hoy el handler: buscar la fila y firmar una URL nueva
+            result = store.from_("facturas").select("*").eq("id", id).single()
+            return descargas.firma.firmar(result.data["ruta_storage"], 60)
+
+        rng = random.Random(9)
+        ids = [str(rng.randint(1, args.facturas)) for _ in range(args.lookups)]
+        p50, p99 = medir(express, ids)
+        print(f"🐢 Lookup + sign per call: p50={p50:.1f}µs p99={p99:.1f}µs")
+        for id in set(ids):
+            descargas.url(id)
+        descargas.urls.hits = descargas.urls.misses = 0
+        consultas["n"] = 0
+        p50_hot, p99_hot = medir(descargas.url, ids)
+        print(f"🚀 Cached signed URL:      p50={p50_hot:.1f}µs p99={p99_hot:.1f}µs "
+              f"({descargas.urls.stats()['hit_ratio']:.0%} hits, {consultas['n']} store lookups)")
+        check(consultas["n"] == 0, "Hot downloads hit the store")
+        check(p50_hot < p50, "Cached URLs are not faster")
+
+        app = App()
+        register_routes(app, descargas)
+        server = make_threaded_server(app, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        session = requests.Session()
+        try:
+            url = session.get(f"{base_url}/api/facturas/1/download").json()["downloadUrl"]
+            check(session.get(f"{base_url}/api/facturas/999999999/download").status_code == 404,
+                  "Unknown factura does not 404")
+
+            start = time.perf_counter()
+            response = session.get(base_url + url)
+            elapsed = time.perf_counter() - start
+            check(response.status_code == 200 and hashlib.sha256(response.content).hexdigest() == sha256,
+                  "Full download differs from the stored file")
+            check(response.headers.get("ETag") == f'"{sha256}"', "Blob ETag is not its SHA-256")
+            print(f"📄 Full {args.size_mb}MB download: {elapsed * 1000:.1f}ms")
+
+            with open(blobs.path(sha256), "rb") as f:
+                contenido = f.read()
+            samples = []
+            for _ in range(args.ranges):
+                inicio = rng.randrange(size - 65536)
+                start = time.perf_counter()
+                r = session.get(base_url + url, headers={"Range": f"bytes={inicio}-{inicio + 65535}"})
+                samples.append(time.perf_counter() - start)
+                if r.status_code != 206 or r.content != contenido[inicio:inicio + 65536]:
+                    check(False, f"Range {inicio} returned {r.status_code} with wrong bytes")
+                    break
+            samples.sort()
+            print(f"✂️  64KB ranges: p50={percentile(samples, 50) * 1000:.2f}ms "
+                  f"p99={percentile(samples, 99) * 1000:.2f}ms")
+
+            samples = []
+            for _ in range(args.ranges):
+                start = time.perf_counter()
+                r = session.get(base_url + url, headers={"If-None-Match": f'"{sha256}"'})
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            check(r.status_code == 304 and not r.content, "Revalidation does not answer 304")
+            print(f"🔁 304 revalidation: p50={percentile(samples, 50) * 1000:.2f}ms")
+
+            r = session.get(base_url + url, headers={"Range": "bytes=-100"})
+            check(r.status_code == 206 and r.content == contenido[-100:], "Suffix range failed")
+            r = session.get(base_url + url, headers={"Range": f"bytes={size}-"})
+            check(r.status_code == 416 and r.headers.get("Content-Range") == f"bytes */{size}",
+                  "Unsatisfiable range does not 416")
+            r = session.get(base_url + url, headers={"Range": "bytes=0-9", "If-Range": '"otro"'})
+            check(r.status_code == 200, "Stale If-Range still served a range")
+            check(session.get(base_url + url[:-4] + "0000").status_code == 403, "Tampered token accepted")
+            check(session.get(f"{base_url}/uploads/blobs/%2e%2e/%2e%2e/data/facturas.jsonl").status_code == 404,
+                  "Path traversal escaped the storage directory")
+        finally:
+            server.shutdown()
+            server.server_close()
+            store.close()
+
+    print("✅ Downloads correct" if ok else "❌ Benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: background invoice extraction throughput
+
+    python -m benchmarks.bench_extraccion --facturas 500 --workers 4
+
+Uploads the sample PDFs in backend/uploads plus generated text invoices
+(plain and Flate-compressed content streams) into a temporary store while
+an ExtractionPipeline runs, then reports files/s, the insert latency seen
+by the upload path, and checks that every generated invoice yielded its
+RNC and subtotal. A small queue forces the backpressure path (rows picked
+up by the sweep) and one missing file exercises the retries.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+from backend_test import percentile
+from services.blob_store import BlobStore, sha256_archivo
+from services.extraccion import COMPLETADA, FALLIDA, ExtractionPipeline
+from services.local_store import LocalStore
+from services.rnc import PESOS
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "uploads")
+
+
+def rnc_valido(rng: random.Random) -> str:
+    digits = [rng.randint(0, 9) for _ in range(8)]
+    remainder = sum(d * w for d, w in zip(digits, PESOS)) % 11
+    return "".join(map(str, digits)) + str(remainder if remainder < 2 else 11 - remainder)
+
+
+def pdf_factura(numero: int, rnc: str, subtotal: float, comprimir: bool, items: int = 40) -> bytes:
+    lineas = [f"FACTURA No. {numero}", f"RNC: {rnc[:3]}-{rnc[3:8]}-{rnc[8]}"]
+    lineas += [f"Articulo {i} (descripcion del servicio) 1 x RD$ 100.00" for i in range(items)]
+    lineas += [f"Subtotal: RD$ {subtotal:,.2f}", f"ITBIS (18%): RD$ {subtotal * 0.18:,.2f}",
+               f"Total a pagar: RD$ {subtotal * 1.18:,.2f}"]
+    contenido = ("BT /F1 10 Tf 72 760 Td "
+                 + " ".join(f"({linea}) Tj 0 -12 Td" for linea in lineas) + " ET").encode("latin-1")
+    filtro = b""
+    if comprimir:
+        contenido = zlib.compress(contenido)
+        filtro = b" /Filter /FlateDecode"
+    return (b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+            b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n"
+            b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>\nendobj\n"
+            + f"4 0 obj\n<< /Length {len(contenido)}".encode() + filtro + b" >>\nstream\n"
+            + contenido + b"\nendstream\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction pipeline benchmark")
+    parser.add_argument("--facturas", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+    rng = random.Random(14)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = os.path.join(tmp, "storage")
+        blobs = BlobStore(storage)
+        store = LocalStore(os.path.join(tmp, "data"))
+
+        archivos = []  # (ruta_storage, esperado)
+        for name in sorted(os.listdir(SAMPLES_DIR)) if os.path.isdir(SAMPLES_DIR) else []:
+            src = os.path.join(tmp, name)
+            shutil.copyfile(os.path.join(SAMPLES_DIR, name), src)
+            archivos.append((blobs.put_file(src, sha256_archivo(src)[0])[0], None))
+        for i in range(args.facturas):
+            rnc, subtotal = rnc_valido(rng), round(rng.uniform(100, 250_000), 2)
+            src = os.path.join(tmp, f"f{i}.pdf")
+            with open(src, "wb") as f:
+                f.write(pdf_factura(i, rnc, subtotal, comprimir=i % 2 == 0))
+            archivos.append((blobs.put_file(src, sha256_archivo(src)[0])[0], (rnc, subtotal)))
+
+        pipeline = ExtractionPipeline(store, storage, workers=args.workers, queue_size=args.queue_size,
+                                      retry_delay=0.05, sweep_interval=0.1).start()
+        inserts = []
+        start = time.perf_counter()
+        for ruta, _ in archivos:
+            t = time.perf_counter()
+            store.from_("facturas").insert([{"nombre_archivo": os.path.basename(ruta),
+                                             "tipo_archivo": "application/pdf", "ruta_storage": ruta}])
+            inserts.append(time.perf_counter() - t)
+        store.from_("facturas").insert([{"nombre_archivo": "perdida.pdf", "tipo_archivo": "application/pdf",
+                                         "ruta_storage": "blobs/00/00/no-existe"}])
+        # Las filas rechazadas por la cola llena las recoge el barrido periódico
+        while pipeline.pendientes():
+            pipeline.join(timeout=1)
+            time.sleep(0.05)
+        pipeline.join()
+        elapsed = time.perf_counter() - start
+        pipeline.stop()
+
+        rows = store.table("facturas").records
+        for id, (ruta, esperado) in enumerate(archivos, start=1):
+            row = rows[id]
+            if row.get("extraccion_estado") != COMPLETADA:
+                ok = False
+            elif esperado is not None:
+                datos = row["extraccion"]
+                ok &= datos["rnc"] == esperado[0] and datos["rnc_valido"]
+                ok &= datos["montos"].get("subtotal") == esperado[1]
+                ok &= datos["calculo"]["calculo"]["subtotal"] == esperado[1]
+        ok &= rows[len(archivos) + 1].get("extraccion_estado") == FALLIDA
+
+        inserts.sort()
+        stats = pipeline.stats
+        print(f"{'✅' if ok else '❌'} {len(archivos)} files in {elapsed:.2f}s "
+              f"({len(archivos) / elapsed:,.0f} files/s, {pipeline.workers} workers)")
+        print(f"⏱️  upload insert p50={percentile(inserts, 50) * 1e6:.0f}µs "
+              f"p99={percentile(inserts, 99) * 1e6:.0f}µs while extracting")
+        print(f"ℹ️  queue full {stats['descartadas']}x (picked up by sweep), "
+              f"{stats['reintentos']} retries, {stats['fallidas']} failed")
+        store.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar calculation log
+
+    python -m benchmarks.bench_historial --rows 20000000 --dias 730
+
+Measures what logging adds to a cached /calcular response while the
+background flusher runs, then backfills --rows synthetic calculations
+spread over --dias days of partitions and times "sum of ITBIS by month"
+cold (new instance) and warm (partition sums remembered). The monthly
+sums are checked against totals kept while generating.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend_test import percentile
+from benchmarks.bench_calculadora_cache import pool_solicitudes
+from services.calculadora_cache import CalculadoraCache
+from services.historial import MS_POR_DIA, HistorialCalculos
+
+INICIO_MS = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+LOTE = 1_000_000
+
+
+def latencia(responder, trafico) -> list:
+    tiempos = []
+    for body in trafico:
+        t = time.perf_counter()
+        responder(body)
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculation log benchmark")
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    rng = random.Random(18)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Coste en la ruta de la petición (respuestas en caché, flusher activo)
+        pool = pool_solicitudes(2_000)
+        trafico = rng.choices(pool, k=args.requests)
+        sin_log = latencia(CalculadoraCache().responder, trafico)
+        historial = HistorialCalculos(os.path.join(tmp, "vivo")).start()
+        con_log = latencia(CalculadoraCache(historial=historial).responder, trafico)
+        historial.close()
+        validas = sum(1 for body in trafico if isinstance(body.get("subtotal"), (int, float)) and body["subtotal"])
+        registradas = sum(r["calculos"] for r in historial.sumar("itbis", por="anio"))
+        ok &= registradas == validas
+        print(f"{'✅' if registradas == validas else '❌'} {registradas:,} calculations logged "
+              f"in {historial.stats['flushes']} flushes")
+        print(f"⏱️  cached /calcular p50={percentile(sin_log, 50) * 1e6:.1f}µs p99={percentile(sin_log, 99) * 1e6:.1f}µs "
+              f"without log, p50={percentile(con_log, 50) * 1e6:.1f}µs p99={percentile(con_log, 99) * 1e6:.1f}µs with it")
+
+        # 2. Relleno masivo por lotes vectorizados
+        root = os.path.join(tmp, "masivo")
+        historial = HistorialCalculos(root)
+        np_rng = np.random.default_rng(18)
+        esperado = {}
+        start = time.perf_counter()
+        for inicio in range(0, args.rows, LOTE):
+            n = min(LOTE, args.rows - inicio)
+            ts = INICIO_MS + np.sort(np_rng.integers(0, args.dias * MS_POR_DIA, n))
+            subtotal = np.round(np_rng.uniform(0.01, 250_000, n), 2)
+            aplicar_itbis = np_rng.random(n) < 0.9
+            porcentaje_itbis = np_rng.choice([18.0, 16.0, 0.0], n)
+            historial.registrar_lote(ts, subtotal, aplicar_itbis, np_rng.random(n) < 0.2, np_rng.random(n) < 0.3,
+                                     porcentaje_itbis)
+            itbis = np.where(aplicar_itbis, subtotal * (porcentaje_itbis / 100), 0.0)
+            meses = ts.astype("datetime64[ms]").astype("datetime64[M]").astype(str)
+            for mes in np.unique(meses):
+                esperado[mes] = esperado.get(mes, 0.0) + float(itbis[meses == mes].sum())
+        escritura = time.perf_counter() - start
+        tamano = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+        print(f"ℹ️  {args.rows:,} rows in {len(historial.particiones()):,} day partitions, {tamano / 2**20:,.0f}MB, "
+              f"written in {escritura:.1f}s ({args.rows / escritura:,.0f} rows/s)")
+
+        # 3. Suma de ITBIS por mes
+        for nombre, instancia in (("cold", HistorialCalculos(root)), ("warm", None)):
+            instancia = instancia or historial
+            if nombre == "warm":
+                historial.sumar("itbis", por="mes")
+            t = time.perf_counter()
+            meses = instancia.sumar("itbis", por="mes")
+            elapsed = time.perf_counter() - t
+            iguales = (len(meses) == len(esperado) and sum(m["calculos"] for m in meses) == args.rows
+                       and all(abs(m["itbis"] - esperado[m["periodo"]]) <= 1e-9 * esperado[m["periodo"]] + 0.01
+                               for m in meses))
+            ok &= iguales
+            leido = f", memory-mapping {args.rows * 8 / 2**20:,.0f}MB of one column" if nombre == "cold" else ""
+            print(f"{'✅' if iguales else '❌'} ITBIS by month ({nombre}): {len(meses)} months "
+                  f"in {elapsed * 1e3:.1f}ms{leido}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: append-only LocalStore vs. whole-file JSON rewrites
+
+    python -m benchmarks.bench_local_store --records 100000
+
+Inserts --records facturas into a LocalStore, then times eq(id).single(),
+eq(rnc).single(), order(subido_en) and reopening the store. The legacy
+localSupabase.js behaviour (re-read, append, rewrite the pretty-printed
+array) is O(n) per insert, so it is timed on --legacy-records rows only
+and its per-insert cost at --records is extrapolated from the slope.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from backend_test import percentile
+from services.local_store import LocalStore
+
+
+def factura(i: int):
+    return {"nombre_archivo": f"factura_{i}.pdf", "ruta_archivo": f"uploads/{i}.pdf",
+            "tipo": "compra" if i % 2 else "venta", "rnc": f"{100000000 + i}",
+            "estado": "pendiente"}
+
+
+class LegacyJsonStore:
+    """Port of localSupabase.js insert/select: every call re-parses the whole file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "w") as f:
+            json.dump([], f)
+
+    def insert(self, row):
+        with open(self.path) as f:
+            records = json.load(f)
+        records.append({"id": len(records) + 1, **row})
+        with open(self.path, "w") as f:
+            json.dump(records, f, indent=2)
+
+    def get(self, column, value):
+        with open(self.path) as f:
+            return next((r for r in json.load(f) if r.get(column) == value), None)
+
+
+def timed(fn, calls):
+    latencies = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def report(label, latencies):
+    print(f"⏱️  {label:<28} p50={percentile(latencies, 50) * 1e6:9.1f}µs "
+          f"p99={percentile(latencies, 99) * 1e6:9.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LocalStore benchmark")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--legacy-records", type=int, default=2_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+    rng = random.Random(11)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalStore(os.path.join(tmp, "store"))
+        facturas = store.from_("facturas")
+
+        start = time.perf_counter()
+        for i in range(args.records):
+            result = facturas.insert([factura(i)])
+        elapsed = time.perf_counter() - start
+        ok &= result.error is None and result.data[0]["id"] == args.records
+        print(f"✅ {args.records:,} inserts in {elapsed:.2f}s ({args.records / elapsed:,.0f}/s)")
+
+        tail = timed(lambda: facturas.insert([factura(0)]), [()] * 1000)
+        report("insert (at full size)", tail)
+
+        ids = [(rng.randint(1, args.records),) for _ in range(args.lookups)]
+        report("eq(id).single()", timed(lambda id: facturas.select().eq("id", id).single(), ids))
+        rncs = [(f"{100000000 + i[0] - 1}",) for i in ids]
+        facturas.select().eq("rnc", "0").single()  # construye el índice hash
+        report("eq(rnc).single()", timed(lambda rnc: facturas.select().eq("rnc", rnc).single(), rncs))
+        report("order(subido_en, limit=50)",
+               timed(lambda: facturas.select().order("subido_en", ascending=False, limit=50), [()] * 1000))
+        report("order(subido_en) full", timed(lambda: facturas.select().order("subido_en"), [()] * 5))
+
+        found = facturas.select().eq("id", ids[0][0]).single().data
+        ok &= found is not None and found["id"] == ids[0][0]
+        store.close()
+
+        start = time.perf_counter()
+        reopened = LocalStore(os.path.join(tmp, "store"))
+        count = len(reopened.table("facturas").records)
+        print(f"ℹ️  reopen + index rebuild: {time.perf_counter() - start:.2f}s ({count:,} records)")
+        ok &= count == args.records + 1000
+        reopened.close()
+
+        legacy = LegacyJsonStore(os.path.join(tmp, "facturas.json"))
+        half = args.legacy_records // 2
+        for i in range(half):
+            legacy.insert(factura(i))
+        first = timed(lambda: legacy.insert(factura(0)), [()] * 50)
+        for i in range(half, args.legacy_records):
+            legacy.insert(factura(i))
+        second = timed(lambda: legacy.insert(factura(0)), [()] * 50)
+        slope = (percentile(second, 50) - percentile(first, 50)) / (args.legacy_records - half)
+        projected = percentile(second, 50) + slope * (args.records - args.legacy_records)
+        report(f"legacy insert @ {args.legacy_records:,}", second)
+        report(f"legacy get @ {args.legacy_records:,}",
+               timed(lambda: legacy.get("id", args.legacy_records), [()] * 50))
+        print(f"ℹ️  legacy insert projected @ {args.records:,}: ~{projected * 1000:.1f}ms "
+              f"(vs {percentile(tail, 50) * 1e6:.1f}µs append)")
+
+    print("✅ results consistent" if ok else "❌ inconsistent results")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost and correctness of the metrics hooks
+
+    python -m benchmarks.bench_metrics --requests 50000 --queries 20000
+
+Times an in-process request through App with and without the metrics
+middleware, and a SQLite statement through a configured engine with and
+without the cursor-execute hooks. It then checks that /metrics renders
+parseable Prometheus text with the expected counts, that a statement
+above the threshold lands in the slow-query log, that morgan access
+log lines are ingested under normalized routes, that a streaming body is
+timed until it is fully sent and that the shared engine behind
+SessionLocal is instrumented once it is created.
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from backend_test import percentile
+from database.connection import SessionLocal
+from database.engine import create_configured_engine, dispose_engine
+from services.http import App, Request, Response, json_response
+from services.metrics import Metrics, register_routes
+
+_MUESTRA = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"'
+                      r'(,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? [-+0-9.eEInf]+$')
+
+
+def peticion(app: App, method: str, path: str, body: bytes = b""):
+    return app.handle(Request({"REQUEST_METHOD": method, "PATH_INFO": path, "CONTENT_LENGTH": str(len(body)),
+                               "wsgi.input": io.BytesIO(body)}))
+
+
+def crear_app(metrics=None) -> App:
+    app = App()
+
+    @app.route("GET", "/api/contacto/:id")
+    def obtener(request, id):
+        return json_response({"id": int(id), "nombre": "Empresa Ejemplo"})
+
+    @app.route("POST", "/api/facturas/subir")
+    def subir(request):
+        request.body()
+        return json_response({"message": "Factura subida con éxito"}, 201)
+
+    @app.route("GET", "/api/rnc/lote")
+    def lote(request):
+        def lineas():
+            for i in range(5):
+                time.sleep(0.02)
+                yield b'{"rnc":"131793916"}\n'
+        return Response(lineas(), 200, [("Content-Type", "application/x-ndjson")])
+
+    if metrics is not None:
+        metrics.instrument_app(app)
+        register_routes(app, metrics)
+    return app
+
+
+def medir(fn, n: int) -> list:
+    tiempos = []
+    for i in range(n):
+        t = time.perf_counter()
+        fn(i)
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    return tiempos
+
+
+def linea(nombre: str, base: list, medido: list) -> None:
+    print(f"⏱️  {nombre:<22} p50 {percentile(base, 50) * 1e6:6.1f}µs -> {percentile(medido, 50) * 1e6:6.1f}µs  "
+          f"p99 {percentile(base, 99) * 1e6:6.1f}µs -> {percentile(medido, 99) * 1e6:6.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics instrumentation benchmark")
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+    ok = True
+
+    # 1. Middleware HTTP
+    metrics = Metrics(slow_query_ms=50)
+    sin = crear_app()
+    con = crear_app(metrics)
+    base = medir(lambda i: peticion(sin, "GET", f"/api/contacto/{i}"), args.requests)
+    medido = medir(lambda i: peticion(con, "GET", f"/api/contacto/{i}"), args.requests)
+    linea("request middleware", base, medido)
+    for _ in range(10):
+        peticion(con, "POST", "/api/facturas/subir", b"x" * 4096)
+    peticion(con, "GET", "/no-existe")
+
+    # 2. Hooks de SQLAlchemy
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'metrics.sqlite3')}"
+        planos, instrumentado = create_configured_engine(url), create_configured_engine(url)
+        metrics.instrument_engine(instrumentado, "sqlite")
+        tiempos = []
+        for engine in (planos, instrumentado):
+            with engine.connect() as conn:
+                conn.execute(text("CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v TEXT)"))
+                tiempos.append(medir(lambda i: conn.execute(text("SELECT :i"), {"i": i}), args.queries))
+        linea("SQL statement", *tiempos)
+        with instrumentado.connect() as conn:
+            # Consulta deliberadamente lenta para el registro de consultas lentas
+            conn.execute(text("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 500000) "
+                              "SELECT COUNT(*) FROM c")).scalar()
+        lentas = list(metrics.consultas_lentas)
+        ok_lentas = len(lentas) == 1 and "RECURSIVE" in lentas[0]["sql"]
+        ok &= ok_lentas
+        print(f"{'✅' if ok_lentas else '❌'} slow-query log: {len(lentas)} entry "
+              f"({lentas[0]['ms'] if lentas else 0:.0f}ms >= {metrics.slow_query_ms:.0f}ms)")
+
+        # 3. Registro de accesos de Express
+        lineas = [f"GET /api/contacto/{i} 200 {100 + i % 7} - {0.5 + i % 5:.3f} ms" for i in range(args.requests)]
+        t = time.perf_counter()
+        ingeridas = sum(metrics.ingest_log_line(l) for l in lineas + ["basura sin formato"])
+        elapsed = time.perf_counter() - t
+        ok &= ingeridas == len(lineas)
+        print(f"{'✅' if ingeridas == len(lineas) else '❌'} access log: {ingeridas:,} lines ingested "
+              f"({len(lineas) / elapsed:,.0f} lines/s)")
+
+        # 4. Streaming: la latencia cubre el envío completo, no solo la llamada al handler
+        response = peticion(con, "GET", "/api/rnc/lote")
+        enviado = b"".join(response.body)
+        response.body.close()
+        _, segundos = metrics.http_latency.snapshot("GET", "/api/rnc/lote", "200")
+        ok_stream = segundos >= 0.1 and len(enviado) == 100
+        ok &= ok_stream
+        print(f"{'✅' if ok_stream else '❌'} streaming body timed until exhausted: {segundos * 1e3:.0f}ms")
+
+        # 5. Engine compartido (get_engine / SessionLocal), instrumentado al crearse
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'compartido.sqlite3')}"
+        dispose_engine()
+        metrics.instrument_shared_engines()
+        with SessionLocal() as session:
+            session.execute(text("SELECT 1"))
+
+        # 6. Exposición
+        t = time.perf_counter()
+        response = peticion(con, "GET", "/metrics")
+        render = time.perf_counter() - t
+        body = response.body.decode()
+        muestras = [l for l in body.splitlines() if l and not l.startswith("#")]
+        validas = all(_MUESTRA.match(l) for l in muestras)
+        esperados = [
+            f'http_request_duration_seconds_count{{method="GET",route="/api/contacto/:id",status="200"}} '
+            f'{args.requests * 2}',
+            'http_request_bytes_total{method="POST",route="/api/facturas/subir"} 40960',
+            'http_request_duration_seconds_count{method="GET",route="(sin ruta)",status="404"} 1',
+            f'db_query_duration_seconds_count{{engine="sqlite",operation="SELECT"}} {args.queries}',
+            'db_slow_queries_total{engine="sqlite",operation="WITH"} 1',
+            'db_query_duration_seconds_count{engine="default",operation="SELECT"} 1',
+            'http_response_bytes_total{method="GET",route="/api/rnc/lote"} 100',
+        ]
+        faltan = [e for e in esperados if e not in muestras]
+        pool = any(l.startswith('db_pool_checkouts{engine="sqlite"}') for l in muestras)
+        ok &= validas and not faltan and pool and response.status == 200
+        print(f"{'✅' if validas and not faltan and pool else '❌'} /metrics: {len(muestras):,} samples, "
+              f"rendered in {render * 1e3:.1f}ms")
+        for e in faltan:
+            print(f"   falta: {e}")
+        planos.dispose()
+        instrumentado.dispose()
+        dispose_engine()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: invoice previews vs downloading the originals for a list view
+
+    python -m benchmarks.bench_previews --files 40 --max-mb 20
+
+Stores a mix of PDFs and images (plus duplicate uploads of the same
+files), lets the preview pipeline render them in its process pool, then
+compares the bytes a 50-row invoice list moves with originals vs
+thumbnails, serves the thumbnails over HTTP and checks the on-disk LRU
+bound. Which renderer ran (WebP, pdftoppm JPEG or SVG card) depends on
+whether Pillow / poppler are installed.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from backend_test import percentile
+from services.blob_store import BlobStore, sha256_archivo
+from services.http import App, make_threaded_server
+from services.local_store import LocalStore
+from services.previews import PDFTOPPM, VARIANTES, Image, PreviewCache, PreviewPipeline, register_routes
+
+TIPOS = [("application/pdf", "pdf"), ("application/pdf", "pdf"), ("image/png", "png"), ("image/jpeg", "jpg")]
+
+
+def crear_archivo(path: str, size: int, ext: str, rng: random.Random) -> None:
+    cabecera = {"pdf": b"%PDF-1.4\n", "png": b"\x89PNG\r\n\x1a\n", "jpg": b"\xff\xd8\xff\xe0"}[ext]
+    bloque = rng.randbytes(1024 * 1024)
+    with open(path, "wb") as f:
+        f.write(cabecera)
+        restante = size - len(cabecera)
+        while restante > 0:
+            f.write(bloque[:restante])
+            restante -= len(bloque)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invoice preview pipeline benchmark")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--duplicates", type=int, default=10, help="extra rows re-uploading existing files")
+    parser.add_argument("--max-mb", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    motor = "Pillow WebP" if Image is not None else "sin Pillow"
+    motor += ", pdftoppm" if PDFTOPPM else ", sin pdftoppm"
+    print(f"ℹ️  Renderer: {motor}")
+    ok = True
+
+    def check(condicion: bool, mensaje: str):
+        nonlocal ok
+        if not condicion:
+            print(f"❌ {mensaje}")
+            ok = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = os.path.join(tmp, "uploads")
+        store = LocalStore(os.path.join(tmp, "data"))
+        blobs = BlobStore(storage)
+        rng = random.Random(23)
+        filas = []
+        for i in range(args.files):
+            tipo, ext = rng.choice(TIPOS)
+            size = rng.randint(200 * 1024, args.max_mb * 1024 * 1024)
+            origen = os.path.join(tmp, f"factura_{i}.{ext}")
+            crear_archivo(origen, size, ext, rng)
+            sha256, size = sha256_archivo(origen)
+            ruta, _ = blobs.put_file(origen, sha256)
+            filas.append({"nombre_archivo": f"factura_{i}.{ext}", "ruta_storage": ruta, "tipo_archivo": tipo,
+                          "tamaño": size, "sha256": sha256})
+        filas += [dict(rng.choice(filas)) for _ in range(args.duplicates)]
+
+        cache = PreviewCache(os.path.join(tmp, "previews"))
+        pipeline = PreviewPipeline(store, storage, cache, workers=args.workers).start()
+        start = time.perf_counter()
+        store.from_("facturas").insert(filas)
+        insertado = time.perf_counter() - start
+        check(pipeline.join(timeout=300), "Previews not ready after 300s")
+        elapsed = time.perf_counter() - start
+        print(f"🖼️  {pipeline.stats['generadas']} files rendered in {elapsed:.2f}s "
+              f"(insert returned after {insertado * 1000:.1f}ms, {args.duplicates} duplicates skipped: "
+              f"{pipeline.stats['encoladas']} jobs)")
+        check(pipeline.stats["encoladas"] == args.files, "Duplicate uploads were rendered again")
+        check(pipeline.stats["fallidas"] == 0, "Some previews failed")
+        print(f"   formats: {dict(Counter(ext for _, ext, _ in cache._entradas.values()))}")
+
+        app = App()
+        register_routes(app, store, pipeline)
+        server = make_threaded_server(app, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        session = requests.Session()
+        try:
+            lista = store.from_("facturas").select("*").order("subido_en", ascending=False).data[:50]
+            originales = sum(f["tamaño"] for f in lista)
+            transferidos = 0
+            samples = []
+            for fila in lista:
+                t = time.perf_counter()
+                r = session.get(f"{base_url}/api/facturas/{fila['id']}/preview")
+                samples.append(time.perf_counter() - t)
+                check(r.status_code == 200 and r.headers["Content-Type"].startswith("image/"),
+                      f"Preview {fila['id']} returned {r.status_code}")
+                transferidos += len(r.content)
+            samples.sort()
+            print(f"📉 List of {len(lista)}: originals {originales / 1024 / 1024:.1f} MB -> previews "
+                  f"{transferidos / 1024:.1f} KB ({originales / max(transferidos, 1):,.0f}x less), "
+                  f"p50 {percentile(samples, 50) * 1000:.2f}ms per preview")
+            check(transferidos * 100 < originales, "Previews are not two orders of magnitude smaller")
+
+            r = session.get(f"{base_url}/api/facturas/{lista[0]['id']}/preview?variante=pagina")
+            check(r.status_code == 200, "pagina variant not served")
+            etag = r.headers.get("ETag")
+            r = session.get(f"{base_url}/api/facturas/{lista[0]['id']}/preview?variante=pagina",
+                            headers={"If-None-Match": etag})
+            check(r.status_code == 304, "Revalidation does not answer 304")
+            # Una tarjeta no es inmutable y su ETag no valida el render real que la sustituya
+            check(etag.endswith('-svg"') and "immutable" not in r.headers["Cache-Control"],
+                  "Placeholder card not revalidated by format")
+            pipeline.cache.put(lista[0]["sha256"], "pagina", "webp", b"RIFF....WEBP")
+            r = session.get(f"{base_url}/api/facturas/{lista[0]['id']}/preview?variante=pagina",
+                            headers={"If-None-Match": etag})
+            check(r.status_code == 200 and r.headers["Content-Type"] == "image/webp"
+                  and "immutable" in r.headers["Cache-Control"], "Real render answered 304 to a card's ETag")
+            check(session.get(f"{base_url}/api/facturas/1/preview?variante=x").status_code == 400,
+                  "Unknown variant accepted")
+            check(session.get(f"{base_url}/api/facturas/999999/preview").status_code == 404,
+                  "Unknown factura does not 404")
+        finally:
+            server.shutdown()
+            server.server_close()
+            pipeline.stop()
+
+        # Límite de la caché: con 16 KB solo sobreviven las entradas más recientes
+        total = cache.bytes
+        pequena = PreviewCache(cache.root, max_bytes=16 * 1024)
+        en_disco = sum(os.path.getsize(os.path.join(d, n)) for d, _, ns in os.walk(cache.root) for n in ns)
+        check(pequena.bytes <= 16 * 1024 and en_disco == pequena.bytes, "LRU bound not enforced on disk")
+        print(f"🧹 LRU bound: {total / 1024:.1f} KB -> {pequena.bytes / 1024:.1f} KB "
+              f"({pequena.stats['expulsadas']} evicted, {len(pequena)} kept of {len(VARIANTES) * args.files})")
+        store.close()
+
+    print("✅ Previews correct" if ok else "❌ Benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk RNC validation throughput (RNCs/sec)
+
+    python -m benchmarks.bench_rnc --count 2000000
+
+Before timing, the batch validator is checked for parity with the scalar
+port of validarRNC on random, malformed and formatted inputs.
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from services.rnc import PESOS, validar_lote, validar_rnc, validar_stream
+
+
+def generar_rncs(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    rncs = []
+    for _ in range(count):
+        digits = [rng.randrange(10) for _ in range(8)]
+        remainder = sum(d * w for d, w in zip(digits, PESOS)) % 11
+        check = remainder if remainder < 2 else 11 - remainder
+        # Mitad válidos (cuando el dígito verificador existe), mitad con dígito aleatorio
+        last = check if rng.random() < 0.5 and check < 10 else rng.randrange(10)
+        rnc = "".join(map(str, digits)) + str(last)
+        style = rng.random()
+        if style < 0.3:
+            rnc = f"{rnc[:3]}-{rnc[3:8]}-{rnc[8]}"
+        elif style < 0.35:
+            rnc = f" {rnc[:3]} {rnc[3:]} "
+        elif style < 0.4:
+            rnc = rng.choice([rnc[:8], rnc + "1", rnc[:4] + "A" + rnc[5:], "", "---", "１２３４５６７８９"])
+        rncs.append(rnc)
+    return rncs
+
+
+def verificar_paridad(rncs: List[str]) -> bool:
+    edge_cases = ["131793916", "131-79391-6", "101-23456-7", "101234567", "000000000",
+                  "12345678", "1234567890", "13179391a", "131\u00a079391\u00a06", "131793916\n"]
+    # Resultado de validarRNC en Node: el \s de JavaScript quita el BOM y deja \x1c-\x1f y \x85
+    esperados = {"\ufeff131793916": True, "131793916\x1c": False, "\x1f131793916": False,
+                 "131793916\x85": False, "\u3000131-79391-6": True, "\u2028131793916": True}
+    sample = edge_cases + list(esperados) + rncs
+    batch = validar_lote(sample).tolist()
+    mismatches = [r for r, got in zip(sample, batch) if got != validar_rnc(r) or got != esperados.get(r, got)]
+    for r in mismatches[:5]:
+        print(f"❌ {r!r}: batch={not validar_rnc(r)} scalar={validar_rnc(r)}")
+    print(f"{'✅' if not mismatches else '❌'} Parity with validarRNC: "
+          f"{len(sample) - len(mismatches)}/{len(sample)}")
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk RNC validation benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--parity-count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rncs = generar_rncs(args.count)
+    ok = verificar_paridad(rncs[:args.parity_count])
+
+    scalar_count = min(args.count, 200_000)
+    start = time.perf_counter()
+    for r in rncs[:scalar_count]:
+        validar_rnc(r)
+    scalar_rate = scalar_count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    valid = sum(v for _, v in validar_stream(rncs, args.batch_size))
+    stream_elapsed = time.perf_counter() - start
+
+    print(f"\n🐢 Scalar validarRNC: {scalar_rate:,.0f} RNCs/s")
+    print(f"⚡ Batch stream: {args.count} RNCs in {stream_elapsed:.3f}s "
+          f"({args.count / stream_elapsed:,.0f} RNCs/s, {valid} valid)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
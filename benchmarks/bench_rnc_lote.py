@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch RNC consultation vs one POST /api/dgii/consultar-rnc per RNC
+
+    python -m benchmarks.bench_rnc_lote --count 200000 --batch 20000 --single 2000
+
+Loads a synthetic registry, serves the DGII routes in-process and
+resolves the same supplier list (mostly registered RNCs, some unknown,
+some with a bad check digit) both ways. The batch is sent once as JSON
+and once as NDJSON; every item must come back exactly once with the
+expected outcome.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.bench_rnc_store import generar_registros, rnc_valido
+from services import dgii, rnc_lote
+from services.http import App, make_threaded_server
+from services.rnc_store import RNCStore
+
+
+def proveedores(count: int, n: int, seed: int = 21):
+    """(rnc, esperado) with 90% registered, 5% valid but unknown, 5% invalid"""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.90:
+            rnc = rnc_valido(10_000_000 + rng.randrange(count))
+            items.append((f"{rnc[:3]}-{rnc[3:8]}-{rnc[8]}" if rng.random() < 0.5 else rnc, "encontrado"))
+        elif r < 0.95:
+            items.append((rnc_valido(50_000_000 + rng.randrange(count)), "no_encontrado"))
+        else:
+            rnc = rnc_valido(10_000_000 + rng.randrange(count))
+            items.append((rnc[:8] + str((int(rnc[8]) + 1) % 10), "invalido"))
+    return items
+
+
+def leer_ndjson(response, start: float):
+    """(seconds from start to the first line, parsed lines)"""
+    primera = None
+    lineas = []
+    for linea in response.iter_lines():
+        if primera is None:
+            primera = time.perf_counter() - start
+        lineas.append(json.loads(linea))
+    return primera, lineas
+
+
+def verificar(lineas, items) -> bool:
+    resumen = lineas[-1].get("resumen")
+    resultados = lineas[:-1]
+    vistos = sorted(r["indice"] for r in resultados)
+    if vistos != list(range(len(items))):
+        print("❌ Faltan o sobran resultados")
+        return False
+    for r in resultados:
+        esperado = items[r["indice"]][1]
+        obtenido = ("encontrado" if r["success"] else
+                    "no_encontrado" if r["error"] == "RNC no encontrado" else "invalido")
+        if obtenido != esperado:
+            print(f"❌ {r['rnc']}: {obtenido} (esperado {esperado})")
+            return False
+    esperados = {k: sum(1 for _, e in items if e == k) for k in ("encontrado", "no_encontrado", "invalido")}
+    if resumen != {"total": len(items), "encontrados": esperados["encontrado"],
+                   "no_encontrados": esperados["no_encontrado"], "invalidos": esperados["invalido"]}:
+        print(f"❌ Resumen inesperado: {resumen}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs single RNC consultation")
+    parser.add_argument("--count", type=int, default=200_000, help="registry size")
+    parser.add_argument("--batch", type=int, default=20_000, help="RNCs in the batch request")
+    parser.add_argument("--single", type=int, default=2_000, help="sequential single calls to time")
+    parser.add_argument("--workers", type=int, default=rnc_lote.DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RNCStore(os.path.join(tmp, "rnc.sqlite3"))
+        start = time.perf_counter()
+        store.cargar(generar_registros(args.count))
+        print(f"📥 Loaded {args.count} RNCs in {time.perf_counter() - start:.2f}s")
+
+        app = App()
+        dgii.register_routes(app, store)
+        consulta = rnc_lote.ConsultaLote(store, workers=args.workers)
+        rnc_lote.register_routes(app, consulta)
+        server = make_threaded_server(app, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        session = requests.Session()
+
+        try:
+            items = proveedores(args.count, args.batch)
+
+            store.cache.clear()
+            start = time.perf_counter()
+            for rnc, _ in items[:args.single]:
+                session.post(f"{base_url}/api/dgii/consultar-rnc", json={"rnc": rnc})
+            single_rps = args.single / (time.perf_counter() - start)
+            print(f"🐢 Single calls: {args.single} in {args.single / single_rps:.2f}s ({single_rps:,.0f} RNC/s)")
+
+            ok = True
+            batch_rps = 0.0
+            for formato in ("json", "ndjson"):
+                store.cache.clear()
+                if formato == "json":
+                    kwargs = {"json": {"rncs": [rnc for rnc, _ in items]}}
+                else:
+                    kwargs = {"data": "".join(json.dumps(rnc) + "\n" for rnc, _ in items).encode(),
+                              "headers": {"Content-Type": rnc_lote.NDJSON}}
+                start = time.perf_counter()
+                response = session.post(f"{base_url}/api/dgii/consultar-rnc/lote", stream=True, **kwargs)
+                primera, lineas = leer_ndjson(response, start)
+                elapsed = time.perf_counter() - start
+                rps = len(items) / elapsed
+                batch_rps = min(batch_rps, rps) if batch_rps else rps
+                print(f"🚀 Batch ({formato}): {len(items)} in {elapsed:.2f}s ({rps:,.0f} RNC/s, "
+                      f"first result after {primera * 1000:.1f}ms)")
+                ok = verificar(lineas, items) and ok
+
+            demasiados = session.post(f"{base_url}/api/dgii/consultar-rnc/lote",
+                                      json={"rncs": ["131793916"] * (rnc_lote.MAX_LOTE + 1)})
+            if demasiados.status_code != 413:
+                print(f"❌ Lote sobre el máximo devolvió {demasiados.status_code}")
+                ok = False
+
+            # Un cuerpo chunked (sin Content-Length) no puede leerse: 411 en vez de un lote vacío
+            chunked = session.post(f"{base_url}/api/dgii/consultar-rnc/lote", data=(l for l in [b'"131793916"\n']),
+                                   headers={"Content-Type": rnc_lote.NDJSON})
+            if chunked.status_code != 411:
+                print(f"❌ NDJSON sin Content-Length devolvió {chunked.status_code}")
+                ok = False
+
+            print(f"⚡ Batch speed-up: {batch_rps / single_rps:.1f}x")
+            if batch_rps <= single_rps:
+                print("❌ Batch is not faster than single calls")
+                ok = False
+        finally:
+            server.shutdown()
+            server.server_close()
+            consulta.close()
+            store.close()
+
+    print("✅ Batch results complete and correct" if ok else "❌ Benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
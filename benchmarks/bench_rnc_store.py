@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: RNC directory load time and lookup latency
+
+    python -m benchmarks.bench_rnc_store --count 1000000 --db /tmp/rnc_bench.sqlite3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from backend_test import percentile
+from services.rnc import PESOS
+from services.rnc_store import REGISTROS_EJEMPLO, RNCStore
+
+PALABRAS = ["COMERCIAL", "INVERSIONES", "DISTRIBUIDORA", "CONSTRUCTORA", "FARMACIA",
+            "TECNOLOGIA", "SERVICIOS", "GRUPO", "INDUSTRIAS", "AGROPECUARIA"]
+
+
+def rnc_valido(base: int) -> str:
+    digits = [int(c) for c in f"{base:08d}"]
+    remainder = sum(d * w for d, w in zip(digits, PESOS)) % 11
+    check = remainder if remainder < 2 else 11 - remainder
+    return f"{base:08d}{check % 10}"
+
+
+def generar_registros(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "rnc": rnc_valido(10_000_000 + i),
+            "razon_social": f"{rng.choice(PALABRAS)} {rng.choice(PALABRAS)} {i} SRL",
+            "categoria": "CONTRIBUYENTE NORMAL",
+            "regimen": "ORDINARIO",
+            "estado": rng.choice(["ACTIVO", "ACTIVO", "ACTIVO", "SUSPENDIDO"]),
+        }
+
+
+def medir(label, func, keys):
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        func(key)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label}: n={len(samples)} p50={percentile(samples, 50) * 1e6:.1f}µs "
+          f"p99={percentile(samples, 99) * 1e6:.1f}µs max={samples[-1] * 1e6:.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RNC directory benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--db", default="rnc_bench.sqlite3")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    store = RNCStore(args.db, cache_size=10_000)
+
+    start = time.perf_counter()
+    total = store.cargar(generar_registros(args.count)) + store.cargar(REGISTROS_EJEMPLO)
+    elapsed = time.perf_counter() - start
+    print(f"📥 Loaded {total} RNCs in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)")
+
+    ok = store.consultar("131-79391-6")["razon_social"] == "EMPRESA EJEMPLO SRL"
+    ok = ok and store.consultar("000000000") is None
+
+    rng = random.Random(3)
+    uniform = [rnc_valido(10_000_000 + rng.randrange(args.count)) for _ in range(args.lookups)]
+    # Distribución sesgada: el 80 % de las consultas cae sobre 1 000 RNC "calientes"
+    hot = [rnc_valido(10_000_000 + i) for i in range(1000)]
+    skewed = [rng.choice(hot) if rng.random() < 0.8 else key for key in uniform]
+
+    store.cache.clear()
+    medir("🔑 Uniform lookups", store.consultar, uniform)
+    store.cache.clear()
+    medir("🔥 Skewed lookups", store.consultar, skewed)
+    print(f"   cache: {store.cache.stats()}")
+    medir("🔎 Prefix search", lambda p: store.buscar_razon_social(p, 20),
+          [f"{rng.choice(PALABRAS)} {rng.choice(PALABRAS)[:3]}" for _ in range(2000)])
+
+    store.close()
+    print(f"{'✅' if ok else '❌'} Sample records resolve")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: search index query latency at a million documents
+
+    python -m benchmarks.bench_search --docs 1000000
+
+Indexes synthetic facturas (with extracted text) and contactos into a
+temporary SearchIndex, then times rare, common and prefix text queries,
+type/date facets and filter-only queries. Also checks that inserts,
+updates and deletes in a LocalStore reach the index through its listeners.
+Fails when any query's p99 exceeds --max-ms.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend_test import percentile
+from services.local_store import LocalStore
+from services.search import SearchIndex
+
+EMPRESAS = ["EMPRESA EJEMPLO SRL", "TECNOLOGIA AVANZADA SA", "FERRETERIA CENTRAL", "COLMADO LA ESQUINA",
+            "SUPERMERCADO NACIONAL", "FARMACIA CAROL", "SERVICIOS TECNICOS DEL CARIBE", "CONSTRUCTORA BISONO"]
+CONCEPTOS = ["servicios profesionales", "materiales de construcción", "equipos de oficina", "alquiler local",
+             "consultoría contable", "mantenimiento preventivo", "licencias de software", "combustible"]
+TIPOS = ["application/pdf", "image/png", "image/jpeg", "image/webp"]
+INICIO = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def iso(moment: datetime) -> str:
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def generar(n: int, rng: random.Random):
+    facturas, contactos = [], []
+    paso = 3 * 365 * 86400 / max(n, 1)
+    for i in range(n):
+        fecha = iso(INICIO + timedelta(seconds=i * paso))
+        if i % 4 == 3:
+            contactos.append({"id": i, "nombre": f"Cliente {i}", "email": f"cliente{i}@ejemplo.com",
+                              "mensaje": f"Consulta sobre {rng.choice(CONCEPTOS)}", "fecha_creacion": fecha})
+        else:
+            empresa = rng.choice(EMPRESAS)
+            facturas.append({"id": i, "nombre_archivo": f"factura_{i}.pdf", "tipo_archivo": rng.choice(TIPOS),
+                             "subido_en": fecha, "extraccion": {
+                                 "rnc": f"{rng.randint(100000000, 999999999)}",
+                                 "texto": f"{empresa} FACTURA {i} {rng.choice(CONCEPTOS)} Subtotal RD$ {i % 9999}.00"}})
+    return facturas, contactos
+
+
+def medir(index, label, kwargs, repeticiones, max_ms):
+    latencies = []
+    for _ in range(repeticiones):
+        start = time.perf_counter()
+        result = index.buscar(**kwargs)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p99 = percentile(latencies, 99) * 1000
+    ok = p99 <= max_ms
+    print(f"{'✅' if ok else '❌'} {label:<34} p50={percentile(latencies, 50) * 1000:7.2f}ms "
+          f"p99={p99:7.2f}ms total={result['total']:>6}{'' if result['exacto'] else '+'} hits={len(result['hits'])}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search index benchmark")
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--max-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    rng = random.Random(15)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "busqueda.sqlite3"))
+        facturas, contactos = generar(args.docs, rng)
+        start = time.perf_counter()
+        for i in range(0, len(facturas), 50_000):
+            index.indexar("facturas", facturas[i:i + 50_000])
+        for i in range(0, len(contactos), 50_000):
+            index.indexar("contactos", contactos[i:i + 50_000])
+        elapsed = time.perf_counter() - start
+        print(f"ℹ️  {args.docs:,} documents indexed in {elapsed:.1f}s ({args.docs / elapsed:,.0f}/s)")
+        del facturas, contactos
+
+        casos = [
+            ("rare term", {"q": "factura_123457"}),
+            ("common term", {"q": "servicios"}),
+            ("prefix", {"q": "ferret"}),
+            ("two terms + tipo facet", {"q": "carol combustible", "tipo": "application/pdf"}),
+            ("term + date range", {"q": "consulta", "desde": "2024-03-01", "hasta": "2024-03-31"}),
+            ("term by relevance", {"q": "empresa ejemplo", "orden": "relevancia"}),
+            ("filters only (date + tabla)", {"tabla": "facturas", "desde": "2024-01-01", "hasta": "2024-06-30"}),
+            ("no filters", {}),
+        ]
+        for label, kwargs in casos:
+            ok &= medir(index, label, kwargs, args.repeticiones, args.max_ms)
+
+        consistente = True
+        for kwargs in ({"q": "servicios"}, {"tabla": "facturas"}, {"q": "servicios", "orden": "relevancia"}):
+            page = index.buscar(limit=20, **kwargs)
+            second = index.buscar(limit=20, cursor=page["next_cursor"], **kwargs)
+            vistos = {(h["tabla"], h["id"]) for h in page["hits"]}
+            consistente &= len(second["hits"]) == 20 and not vistos & {(h["tabla"], h["id"]) for h in second["hits"]}
+
+        store = LocalStore(os.path.join(tmp, "data"))
+        index.attach(store)
+        contacto = store.from_("contactos").insert([{"nombre": "Zoila Incremental", "email": "z@ejemplo.com",
+                                                     "mensaje": "Prueba de índice"}]).data[0]
+        factura = store.from_("facturas").insert([{"nombre_archivo": "nueva.pdf",
+                                                   "tipo_archivo": "application/pdf"}]).data[0]
+        store.from_("facturas").update({"extraccion": {"texto": "texto extraido xylofono"}}).eq("id", factura["id"])
+        consistente &= index.buscar("zoila")["total"] == 1
+        consistente &= index.buscar("xylofono")["hits"][0]["id"] == factura["id"]
+        store.from_("contactos").delete().eq("id", contacto["id"])
+        consistente &= index.buscar("zoila")["total"] == 0
+        ok &= consistente
+        print(f"{'✅' if consistente else '❌'} incremental insert/update/delete and cursor pagination")
+        store.close()
+        index.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scenario grid over an invoice set
+
+    python -m benchmarks.bench_simulador --rows 1000000 --scenarios 100 --memoria-mb 256
+
+Evaluates a 10 × 10 ITBIS / retención grid (by default) over a
+synthetic invoice set with the chunked simulator, checks a few scenarios
+against calcular_lote on the whole set and reports wall time and the
+peak extra memory the sweep allocated (tracemalloc sees NumPy buffers).
+"""
+
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from services.calculadora import calcular_lote
+from services.simulador import Facturas, rejilla, simular
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tax scenario simulator benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scenarios", type=int, default=100, help="rounded to a square ITBIS × retención grid")
+    parser.add_argument("--memoria-mb", type=int, default=256)
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(24)
+    facturas = Facturas(np.round(rng.lognormal(9, 1.5, args.rows), 2), rng.random(args.rows) < 0.9,
+                        rng.random(args.rows) < 0.1, rng.random(args.rows) < 0.3)
+    lado = max(1, round(math.sqrt(args.scenarios)))
+    escenarios = rejilla(itbis=np.linspace(14, 22, lado), retencion=np.linspace(0, 15, lado))
+    print(f"📊 {args.rows:,} invoices × {len(escenarios)} scenarios, {args.memoria_mb}MB budget")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    resultados = simular(facturas, escenarios, args.memoria_mb)
+    elapsed = time.perf_counter() - start
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    celdas = args.rows * len(escenarios)
+    print(f"⏱️  {elapsed:.2f}s ({celdas / elapsed / 1e6:,.0f}M invoice-scenarios/s), "
+          f"peak extra memory {pico / 1024 / 1024:.0f}MB")
+
+    ok = elapsed <= args.max_seconds
+    if not ok:
+        print(f"❌ Slower than {args.max_seconds}s")
+    if pico > args.memoria_mb * 1024 * 1024 * 1.25:
+        print("❌ Memory budget exceeded")
+        ok = False
+
+    for i in (0, len(escenarios) // 2, len(escenarios) - 1):
+        e = escenarios[i]
+        esperado = calcular_lote(facturas.subtotal, facturas.aplicar_itbis, facturas.aplicar_iva,
+                                 facturas.aplicar_retencion, e.porcentaje_itbis, e.porcentaje_iva,
+                                 e.porcentaje_retencion).totales()
+        for monto, valor in esperado.items():
+            # Solo cambia el orden de la suma entre bloques: error relativo del orden de 1e-15
+            if not math.isclose(resultados[i][monto], valor, rel_tol=1e-12, abs_tol=0.01):
+                print(f"❌ Scenario {e}: {monto} {resultados[i][monto]} != {valor}")
+                ok = False
+
+    mayor = max(resultados, key=lambda r: r["total"])
+    print(f"📈 Highest total: ITBIS {mayor['escenario']['porcentajeITBIS']:g}% / retención "
+          f"{mayor['escenario']['porcentajeRetencion']:g}% -> RD${mayor['total']:,.2f} "
+          f"({mayor['variacion']['total']:+,.2f} vs today)")
+    print("✅ Simulation correct and within budget" if ok else "❌ Benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
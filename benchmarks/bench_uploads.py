@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming upload ingest vs. buffered (multer + readFileSync) path
+
+    python -m benchmarks.bench_uploads --sizes 1 10 50
+
+For each file size (MB) a multipart body is generated on the fly, so the
+benchmark itself never holds the file, and fed to recibir_factura(). Peak
+Python memory is measured with tracemalloc and throughput in a separate
+untraced run. The buffered baseline spools the part to disk and then reads
+it back whole, as the Express route does. Fails if the streaming peak grows
+with the file size or the stored size/SHA-256 do not match.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from services.local_store import LocalStore
+from services.uploads import recibir_factura
+
+BOUNDARY = "----BillesssBenchBoundary7MA4YWxkTrZu0gW"
+PATRON = bytes(range(256)) * 256  # 64KB que se repiten
+
+
+class SyntheticMultipart:
+    """File-like multipart body whose file part is generated while it is read"""
+
+    def __init__(self, size: int, filename: str = "factura.pdf"):
+        self.head = (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"factura\"; "
+                     f"filename=\"{filename}\"\r\nContent-Type: application/pdf\r\n\r\n").encode()
+        self.tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+        self.size = size
+        self.length = len(self.head) + size + len(self.tail)
+        self.pos = 0
+
+    def _slice(self, start: int, n: int) -> bytes:
+        out = bytearray()
+        while n:
+            if start < len(self.head):
+                part = self.head[start:start + n]
+            elif start < len(self.head) + self.size:
+                offset = start - len(self.head)
+                take = min(n, self.size - offset, len(PATRON) - offset % len(PATRON))
+                part = PATRON[offset % len(PATRON):offset % len(PATRON) + take]
+            else:
+                part = self.tail[start - len(self.head) - self.size:][:n]
+                if not part:
+                    break
+            out += part
+            start += len(part)
+            n -= len(part)
+        return bytes(out)
+
+    def readinto(self, buffer) -> int:
+        data = self._slice(self.pos, min(len(buffer), self.length - self.pos))
+        buffer[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+    def expected_sha256(self) -> str:
+        digest = hashlib.sha256()
+        remaining = self.size
+        while remaining:
+            take = min(remaining, len(PATRON))
+            digest.update(PATRON[:take])
+            remaining -= take
+        return digest.hexdigest()
+
+
+def buffered_baseline(body: SyntheticMultipart, tmp: str) -> int:
+    """multer writes the file, then fs.readFileSync loads it whole before uploading"""
+    path = os.path.join(tmp, "multer.part")
+    chunk = bytearray(64 * 1024)
+    with open(path, "wb") as f:
+        while True:
+            n = body.readinto(chunk)
+            if not n:
+                break
+            f.write(memoryview(chunk)[:n])
+    with open(path, "rb") as f:
+        file_buffer = f.read()
+    with open(os.path.join(tmp, "storage.bin"), "wb") as f:
+        f.write(file_buffer)
+    return len(file_buffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload ingest benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50], help="file sizes in MB")
+    parser.add_argument("--max-peak-mb", type=float, default=1.0)
+    args = parser.parse_args()
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalStore(os.path.join(tmp, "data"))
+        storage = os.path.join(tmp, "storage")
+        for mb in args.sizes:
+            size = mb * 1024 * 1024
+
+            body = SyntheticMultipart(size)
+            start = time.perf_counter()
+            result = recibir_factura(body, f"multipart/form-data; boundary={BOUNDARY}", body.length,
+                                     store, storage)
+            elapsed = time.perf_counter() - start
+            factura = result["factura"]
+            correct = factura["tamano_archivo"] == size and factura["sha256"] == body.expected_sha256()
+            correct &= os.path.getsize(os.path.join(storage, result["storagePath"])) == size
+
+            body = SyntheticMultipart(size)
+            tracemalloc.start()
+            recibir_factura(body, f"multipart/form-data; boundary={BOUNDARY}", body.length, store, storage)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            body = SyntheticMultipart(size)
+            tracemalloc.start()
+            buffered_baseline(body, tmp)
+            baseline_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            flat = peak / 1024 / 1024 <= args.max_peak_mb
+            ok &= correct and flat
+            print(f"{'✅' if correct and flat else '❌'} {mb:>3}MB  {size / elapsed / 1024 / 1024:8.1f} MB/s  "
+                  f"peak {peak / 1024:8.1f}KB (buffered {baseline_peak / 1024 / 1024:6.1f}MB)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
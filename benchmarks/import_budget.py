@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the database package
+
+    python -m benchmarks.import_budget --budget-ms 15 --models-budget-ms 25 --models-total-budget-ms 1000
+
+Runs `python -X importtime` in fresh interpreters and fails when the
+cumulative import time exceeds the budget for:
+
+- `import database` (lazy package, nothing loaded),
+- `import database.models`, the path every real caller takes: its own
+  cost with SQLAlchemy and python-dotenv already imported, and the whole
+  cold import including them (so a new heavy dependency is caught).
+
+It also checks that importing the models and sessions leaves the engine
+uncreated and the .env unread until first use.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SIDE_EFFECT_CHECK = """
+import os
+import database.models, database.connection, database.full_models, database.init_db
+import database.engine as engine_module
+assert engine_module._engine is None, "engine created at import time"
+assert "DATABASE_URL" not in os.environ, ".env loaded at import time"
+"""
+
+
+# Dependencias de terceros que database.models necesita de todas formas
+DEPENDENCIAS = "sqlalchemy, sqlalchemy.orm, dotenv"
+
+
+def cumulative_import_us(module: str, env, preload: str = "") -> int:
+    code = f"import {preload}; import {module}" if preload else f"import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    # Formato: "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 15)))
+    parser.add_argument("--models-budget-ms", type=float,
+                        default=float(os.getenv("IMPORT_BUDGET_MODELS_MS", 25)),
+                        help="database.models on top of SQLAlchemy / python-dotenv")
+    parser.add_argument("--models-total-budget-ms", type=float,
+                        default=float(os.getenv("IMPORT_BUDGET_MODELS_TOTAL_MS", 1000)),
+                        help="cold import of database.models, dependencies included")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    # El mejor de varios arranques en frío reduce el ruido del sistema
+    best_us = min(cumulative_import_us("database", env) for _ in range(args.runs))
+    models_us = min(cumulative_import_us("database.models", env, DEPENDENCIAS) for _ in range(args.runs))
+    models_total_us = min(cumulative_import_us("database.models", env) for _ in range(args.runs))
+    checks = [
+        ("import database", best_us, args.budget_ms),
+        ("import database.models (own code)", models_us, args.models_budget_ms),
+        ("import database.models (cold, with dependencies)", models_total_us, args.models_total_budget_ms),
+    ]
+    within_budget = all(us / 1000 <= budget for _, us, budget in checks)
+
+    side_effects = subprocess.run([sys.executable, "-c", SIDE_EFFECT_CHECK],
+                                  capture_output=True, text=True, env=env)
+    lazy = side_effects.returncode == 0
+
+    for nombre, us, budget in checks:
+        print(f"{'✅' if us / 1000 <= budget else '❌'} {nombre}: {us / 1000:.2f}ms (budget {budget}ms)")
+    print(f"{'✅' if lazy else '❌'} no engine or .env at import time"
+          + ("" if lazy else f": {side_effects.stderr.strip().splitlines()[-1]}"))
+    return 0 if within_budget and lazy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
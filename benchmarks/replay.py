@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Offline replay benchmark against the local stand-in backend
+
+    python -m benchmarks.replay run --mix ui --requests 5000 --workers 8
+    python -m benchmarks.replay run --mix all --update-baseline
+    python -m benchmarks.replay run --mix ui --base-url http://localhost:4000   # Express en marcha
+    python -m benchmarks.replay record backend/access.log --output benchmarks/traffic/produccion.json
+
+`run` starts `python -m services.servidor` on a free port over a temporary
+data directory (unless --base-url is given), seeds contacts and invoices
+through the API, and replays a weighted traffic mix from
+benchmarks/traffic/<mix>.json with a fixed seed. Each run is stored as
+benchmarks/results/<mix>/<timestamp>.json. When a baseline.json exists
+next to it, the run fails if throughput drops, or an endpoint's p95 grows,
+by more than --tolerance (plus --slack-ms for sub-millisecond noise).
+
+`record` turns a morgan "tiny" access log into a mix: the request weights
+come from the log, the bodies from the templates of the shipped mixes.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from backend_test import percentile
+from services.metrics import ruta_normalizada
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+TRAFFIC_DIR = os.path.join(BENCH_DIR, "traffic")
+RESULTS_DIR = os.getenv("REPLAY_RESULTS_DIR", os.path.join(BENCH_DIR, "results"))
+
+
+def cargar_mix(nombre: str) -> Dict[str, Any]:
+    path = nombre if nombre.endswith(".json") else os.path.join(TRAFFIC_DIR, f"{nombre}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def mixes_disponibles() -> List[str]:
+    return sorted(n[:-5] for n in os.listdir(TRAFFIC_DIR) if n.endswith(".json"))
+
+
+# --- servidor local ---------------------------------------------------------------
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(tmp: str, timeout: float = 15.0) -> Tuple[subprocess.Popen, str]:
+    port = puerto_libre()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "services.servidor", "--port", str(port),
+         "--data-dir", os.path.join(tmp, "data"), "--storage-dir", os.path.join(tmp, "uploads")],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"El servidor local terminó: {proc.stderr.read().decode(errors='replace')}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("El servidor local no respondió a /health")
+
+
+# --- mezcla de tráfico ------------------------------------------------------------
+
+def sembrar(session: requests.Session, base_url: str, seed: Dict[str, int]) -> Dict[str, List[Any]]:
+    """Create the contacts/invoices the mix refers to, through the API; returns their ids"""
+    ids: Dict[str, List[Any]] = {"contacto_id": [], "factura_id": []}
+    for i in range(seed.get("contactos", 0)):
+        r = session.post(f"{base_url}/api/contacto/enviar", json={
+            "nombre": f"Cliente {i}", "email": f"cliente{i}@ejemplo.com", "mensaje": "Mensaje de prueba"})
+        r.raise_for_status()
+        ids["contacto_id"].append(r.json()["contacto"]["id"])
+    for i in range(seed.get("facturas", 0)):
+        contenido = f"%PDF-1.4\n% factura {i}\n".encode() + os.urandom(2048)
+        r = session.post(f"{base_url}/api/facturas/subir",
+                         files={"factura": (f"factura_{i}.pdf", contenido, "application/pdf")})
+        r.raise_for_status()
+        ids["factura_id"].append(r.json()["factura"]["id"])
+    return ids
+
+
+def _rellenar(value: Any, rng: random.Random, ids: Dict[str, List[Any]]) -> Any:
+    if isinstance(value, dict):
+        return {k: _rellenar(v, rng, ids) for k, v in value.items()}
+    if value == "{subtotal}":
+        return round(rng.uniform(1, 250_000), 2)
+    if isinstance(value, str) and "{" in value:
+        for nombre, valores in ids.items():
+            if f"{{{nombre}}}" in value:
+                value = value.replace(f"{{{nombre}}}", str(rng.choice(valores) if valores else 0))
+    return value
+
+
+def preparar(mix: Dict[str, Any], n: int, seed: int, ids: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """The n concrete requests of a run, drawn by weight with a fixed seed"""
+    rng = random.Random(seed)
+    plantillas = mix["requests"]
+    elegidas = rng.choices(plantillas, weights=[p["weight"] for p in plantillas], k=n)
+    peticiones = []
+    for plantilla in elegidas:
+        peticion = {"key": f"{plantilla['method']} {plantilla['path']}", "method": plantilla["method"],
+                    "path": _rellenar(plantilla["path"], rng, ids), "status": plantilla.get("status", 200)}
+        if "json" in plantilla:
+            peticion["json"] = _rellenar(plantilla["json"], rng, ids)
+        if "file" in plantilla:
+            archivo = plantilla["file"]
+            peticion["files"] = {archivo.get("field", "factura"): (
+                archivo["name"], b"%PDF-1.4\n" + os.urandom(archivo["size"]), archivo["type"])}
+        peticiones.append(peticion)
+    return peticiones
+
+
+def reproducir(base_url: str, peticiones: List[Dict[str, Any]], workers: int) -> Dict[str, Any]:
+    muestras: Dict[str, List[float]] = {}
+    errores: Dict[str, int] = {}
+    lock = threading.Lock()
+    siguiente = iter(peticiones)
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                peticion = next(siguiente, None)
+            if peticion is None:
+                return
+            kwargs = {k: peticion[k] for k in ("json", "files") if k in peticion}
+            t = time.perf_counter()
+            try:
+                fallo = session.request(peticion["method"], base_url + peticion["path"],
+                                        **kwargs).status_code != peticion["status"]
+            except requests.RequestException:
+                fallo = True
+            elapsed = time.perf_counter() - t
+            with lock:
+                muestras.setdefault(peticion["key"], []).append(elapsed)
+                if fallo:
+                    errores[peticion["key"]] = errores.get(peticion["key"], 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for key, valores in sorted(muestras.items()):
+        valores.sort()
+        endpoints[key] = {"count": len(valores), "errors": errores.get(key, 0),
+                          "p50_ms": round(percentile(valores, 50) * 1000, 3),
+                          "p95_ms": round(percentile(valores, 95) * 1000, 3),
+                          "p99_ms": round(percentile(valores, 99) * 1000, 3)}
+    todas = sorted(v for valores in muestras.values() for v in valores)
+    return {"requests": len(todas), "errors": sum(errores.values()), "duration_s": round(elapsed, 3),
+            "throughput_rps": round(len(todas) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(todas, 50) * 1000, 3), "p95_ms": round(percentile(todas, 95) * 1000, 3),
+            "p99_ms": round(percentile(todas, 99) * 1000, 3), "endpoints": endpoints}
+
+
+# --- resultados y regresiones -------------------------------------------------------
+
+def comparar(actual: Dict[str, Any], base: Dict[str, Any], tolerancia: float, slack_ms: float,
+             min_muestras: int = 100) -> List[str]:
+    """Regressions of a run against a baseline run of the same mix"""
+    problemas = []
+    minimo = base["throughput_rps"] * (1 - tolerancia)
+    if actual["throughput_rps"] < minimo:
+        problemas.append(f"throughput {actual['throughput_rps']} req/s < {minimo:.2f} "
+                         f"(baseline {base['throughput_rps']})")
+    for key, stats in actual["endpoints"].items():
+        previo = base["endpoints"].get(key)
+        # Con pocas muestras el p95 es casi el máximo: solo cuenta el throughput global
+        if previo is None or min(stats["count"], previo["count"]) < min_muestras:
+            continue
+        limite = previo["p95_ms"] * (1 + tolerancia) + slack_ms
+        if stats["p95_ms"] > limite:
+            problemas.append(f"{key}: p95 {stats['p95_ms']}ms > {limite:.3f}ms (baseline {previo['p95_ms']}ms)")
+    return problemas
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ejecutar(args, nombre: str) -> bool:
+    mix = cargar_mix(nombre)
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        base_url = args.base_url
+        if base_url is None:
+            proc, base_url = iniciar_servidor(tmp)
+        try:
+            ids = sembrar(requests.Session(), base_url, mix.get("seed", {}))
+            peticiones = preparar(mix, args.requests, args.seed, ids)
+            reproducir(base_url, peticiones[:min(len(peticiones), args.warmup)], args.workers)
+            resultado = reproducir(base_url, peticiones, args.workers)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    resultado.update({"mix": mix["name"], "base_url": args.base_url or "local", "workers": args.workers,
+                      "seed": args.seed, "commit": _commit(),
+                      "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")})
+    carpeta = os.path.join(RESULTS_DIR, mix["name"])
+    os.makedirs(carpeta, exist_ok=True)
+    path = os.path.join(carpeta, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, sort_keys=True)
+
+    print(f"\n📈 {mix['name']}: {resultado['requests']} requests in {resultado['duration_s']}s "
+          f"({resultado['throughput_rps']} req/s, {resultado['errors']} errors) "
+          f"p50={resultado['p50_ms']}ms p95={resultado['p95_ms']}ms p99={resultado['p99_ms']}ms")
+    for key, stats in resultado["endpoints"].items():
+        print(f"   {key}: n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+              f"p99={stats['p99_ms']}ms{' ❌ ' + str(stats['errors']) + ' errors' if stats['errors'] else ''}")
+    print(f"💾 {os.path.relpath(path, ROOT_DIR)}")
+
+    ok = resultado["errors"] == 0
+    baseline_path = os.path.join(carpeta, "baseline.json")
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            problemas = comparar(resultado, json.load(f), args.tolerance, args.slack_ms,
+                                 args.min_samples)
+        for problema in problemas:
+            print(f"❌ Regresión: {problema}")
+        if not problemas:
+            print(f"✅ Dentro de la tolerancia ({args.tolerance:.0%}) respecto a baseline.json")
+        ok &= not problemas
+    else:
+        print("ℹ️  Sin baseline.json: usa --update-baseline para fijar esta ejecución como referencia")
+    if ok and args.update_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, sort_keys=True)
+        print("📌 baseline.json actualizado")
+    return ok
+
+
+def grabar(log_path: str) -> Dict[str, Any]:
+    """Mix whose weights are the request counts of an access log, matched to the shipped templates"""
+    from services.metrics import _MORGAN_TINY
+
+    plantillas = {}
+    for nombre in mixes_disponibles():
+        for plantilla in cargar_mix(nombre)["requests"]:
+            ruta = ruta_normalizada(plantilla["path"].replace("{contacto_id}", "0").replace("{factura_id}", "0"))
+            plantillas.setdefault((plantilla["method"], ruta), plantilla)
+
+    conteos: Dict[Tuple[str, str], int] = {}
+    sin_plantilla: Dict[Tuple[str, str], int] = {}
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = _MORGAN_TINY.match(line.strip())
+            if match is None:
+                continue
+            key = (match["method"], ruta_normalizada(match["url"]))
+            destino = conteos if key in plantillas else sin_plantilla
+            destino[key] = destino.get(key, 0) + 1
+    for (method, ruta), n in sorted(sin_plantilla.items()):
+        print(f"⚠️  Sin plantilla para {method} {ruta} ({n} peticiones)", file=sys.stderr)
+    return {
+        "name": os.path.splitext(os.path.basename(log_path))[0],
+        "description": f"Recorded from {os.path.basename(log_path)}",
+        "seed": {"contactos": 200, "facturas": 50},
+        "requests": [dict(plantillas[key], weight=n) for key, n in sorted(conteos.items())],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay traffic mixes against a local stand-in backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="replay one mix (or all) and check for regressions")
+    run.add_argument("--mix", default="all", help="mix name in benchmarks/traffic, a .json path, or 'all'")
+    run.add_argument("--requests", type=int, default=3000)
+    run.add_argument("--workers", type=int, default=8)
+    run.add_argument("--warmup", type=int, default=200)
+    run.add_argument("--seed", type=int, default=20)
+    run.add_argument("--base-url", default=None, help="replay against a running backend instead of a local one")
+    run.add_argument("--tolerance", type=float, default=0.25, help="allowed throughput drop / p95 growth")
+    run.add_argument("--slack-ms", type=float, default=1.0, help="absolute p95 slack for fast endpoints")
+    run.add_argument("--min-samples", type=int, default=100, help="endpoints with fewer requests skip the p95 check")
+    run.add_argument("--update-baseline", action="store_true")
+    record = sub.add_parser("record", help="build a mix from a morgan 'tiny' access log")
+    record.add_argument("log")
+    record.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        mix = grabar(args.log)
+        text = json.dumps(mix, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"💾 {len(mix['requests'])} request templates written to {args.output}")
+        else:
+            print(text)
+        return 0
+
+    nombres = mixes_disponibles() if args.mix == "all" else [args.mix]
+    resultados = [ejecutar(args, nombre) for nombre in nombres]
+    return 0 if all(resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Stress test: many threads sharing SessionLocal must not open more
+connections than pool_size + max_overflow.
+
+    DATABASE_URL=sqlite:////tmp/stress.sqlite3 python -m benchmarks.stress_pool --threads 200
+
+Every database module is imported to show that they all share one engine.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection pool stress test")
+    parser.add_argument("--threads", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="time each session keeps its connection")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite:///stress_pool.sqlite3")
+
+    from database import connection, database, full_models
+    from database.engine import get_engine, pool_metrics, pool_settings
+
+    engines = {id(m.engine) for m in (connection, database, full_models)}
+    SessionLocal = connection.SessionLocal
+    settings = pool_settings()
+    limit = settings["pool_size"] + settings["max_overflow"]
+
+    errors = []
+    barrier = threading.Barrier(args.threads)
+
+    def worker():
+        barrier.wait()
+        for _ in range(args.iterations):
+            try:
+                with SessionLocal() as session:
+                    session.execute(text("SELECT 1"))
+                    time.sleep(args.hold_ms / 1000)
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    metrics = pool_metrics(get_engine())
+    print(f"🧵 {args.threads} threads × {args.iterations} sessions in {elapsed:.2f}s")
+    print(f"📊 {metrics}")
+
+    checks = [
+        (len(engines) == 1, f"database modules share one engine ({len(engines)} found)"),
+        (metrics["connects"] <= limit, f"connections opened {metrics['connects']} <= {limit}"),
+        (metrics["peak_checked_out"] <= limit, f"peak checked out {metrics['peak_checked_out']} <= {limit}"),
+        (metrics["checked_out"] == 0, "every connection returned to the pool"),
+        (not errors, f"no session errors ({len(errors)}; first: {errors[:1]})"),
+    ]
+    for passed, label in checks:
+        print(f"{'✅' if passed else '❌'} {label}")
+    return 0 if all(passed for passed, _ in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
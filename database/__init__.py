@@ -0,0 +1,20 @@
+from importlib import import_module
+
+# Exportaciones diferidas: `import database` no carga SQLAlchemy ni crea el engine
+_EXPORTS = {
+    "Base": "database.connection",
+    "SessionLocal": "database.connection",
+    "Contacto": "database.models",
+    "get_engine": "database.engine",
+    "run_migrations": "database.migrations",
+}
+
+__all__ = list(_EXPORTS) + ["engine"]
+
+
+def __getattr__(name):
+    if name == "engine":
+        return import_module("database.engine").get_engine()
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,85 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database.engine import attach_pool_metrics, pool_settings, registrar_compartido
+
+# Driver asíncrono por backend: postgresql -> asyncpg, sqlite -> aiosqlite
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(database_url):
+    """Rewrite a sync DATABASE_URL (postgresql://, sqlite:///...) to its async driver"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_driver_name() == driver:
+        return url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def create_configured_async_engine(database_url=None, **overrides):
+    """Async counterpart of create_configured_engine, sharing the same DB_* pool settings"""
+    load_dotenv()
+    database_url = database_url or os.getenv("ASYNC_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    settings = pool_settings()
+    settings.update(overrides)
+    statement_timeout_ms = settings.pop("statement_timeout_ms")
+
+    url = async_database_url(database_url)
+    kwargs = {}
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        kwargs["pool_pre_ping"] = settings["pool_pre_ping"]
+    else:
+        kwargs.update(settings)
+
+    if url.get_driver_name() == "asyncpg" and statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+
+    engine = create_async_engine(url, connect_args=connect_args, **kwargs)
+    attach_pool_metrics(engine.sync_engine)
+    return engine
+
+
+_async_engine = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine():
+    """AsyncEngine shared by the process, created on first use"""
+    global _async_engine
+    creado = None
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                _async_engine = creado = create_configured_async_engine()
+    if creado is not None:
+        registrar_compartido(creado, "async")
+    return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine
+    engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+class LazyAsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that binds to the shared AsyncEngine when the first session is created"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            self.configure(bind=get_async_engine())
+        return super().__call__(**local_kw)
+
+
+# expire_on_commit=False: los objetos siguen legibles tras el commit sin otra ida a la base
+AsyncSessionLocal = LazyAsyncSessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,92 @@
+"""
+Async CRUD helpers for contactos
+
+Each helper takes an optional AsyncSession; without one it opens (and
+closes) its own from AsyncSessionLocal.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select
+
+from database.async_connection import AsyncSessionLocal
+from database.models import Contacto
+from database.queries import Pagina, build_list_query, build_page
+from database.validation import validar_contacto
+
+CAMPOS = ("id", "nombre", "email", "telefono", "mensaje", "fecha_creacion")
+CAMPOS_EDITABLES = ("nombre", "email", "telefono", "mensaje")
+
+
+def contacto_a_dict(contacto: Contacto) -> Dict[str, Any]:
+    return {campo: getattr(contacto, campo) for campo in CAMPOS}
+
+
+@asynccontextmanager
+async def _session_scope(session=None):
+    if session is not None:
+        yield session
+        return
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def crear_contacto(data: Dict[str, Any], session=None) -> Dict[str, Any]:
+    """Validate like POST /api/contacto/enviar and insert; raises ValueError with the route's message"""
+    error = validar_contacto(data)
+    if error:
+        raise ValueError(error)
+    async with _session_scope(session) as session:
+        contacto = Contacto(
+            nombre=data["nombre"],
+            email=data["email"],
+            telefono=data.get("telefono") or None,
+            mensaje=data["mensaje"],
+            fecha_creacion=datetime.utcnow(),
+        )
+        session.add(contacto)
+        await session.commit()
+        return contacto_a_dict(contacto)
+
+
+async def obtener_contacto(id: int, session=None) -> Optional[Dict[str, Any]]:
+    async with _session_scope(session) as session:
+        contacto = await session.get(Contacto, id)
+        return contacto_a_dict(contacto) if contacto is not None else None
+
+
+async def listar_contactos(limit: int = 50, cursor: Optional[str] = None, ascending: bool = False,
+                           incluir_mensaje: bool = False, session=None) -> Pagina:
+    """Async version of database.queries.listar_contactos (same cursor format)"""
+    async with _session_scope(session) as session:
+        result = await session.execute(build_list_query(limit, cursor, ascending, incluir_mensaje))
+        return build_page(result.mappings().all(), limit)
+
+
+async def actualizar_contacto(id: int, cambios: Dict[str, Any], session=None) -> Optional[Dict[str, Any]]:
+    async with _session_scope(session) as session:
+        contacto = await session.get(Contacto, id)
+        if contacto is None:
+            return None
+        actualizado = {**contacto_a_dict(contacto), **{k: v for k, v in cambios.items() if k in CAMPOS_EDITABLES}}
+        error = validar_contacto(actualizado)
+        if error:
+            raise ValueError(error)
+        for campo in CAMPOS_EDITABLES:
+            setattr(contacto, campo, actualizado[campo])
+        await session.commit()
+        return contacto_a_dict(contacto)
+
+
+async def eliminar_contacto(id: int, session=None) -> bool:
+    async with _session_scope(session) as session:
+        result = await session.execute(delete(Contacto).where(Contacto.id == id))
+        await session.commit()
+        return result.rowcount > 0
+
+
+async def contar_contactos(session=None) -> int:
+    async with _session_scope(session) as session:
+        return (await session.execute(select(func.count()).select_from(Contacto))).scalar_one()
@@ -0,0 +1,154 @@
+"""
+Bulk loader for Contacto records
+
+Streams contacts from CSV or JSON lines, validates them with the same rules
+as POST /api/contacto/enviar and inserts them in batches, one commit per
+batch. On PostgreSQL with psycopg2 the batches go through COPY.
+
+    python -m database.bulk_load contactos.csv --batch-size 5000
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from database.models import Contacto
+from database.validation import validar_contacto
+
+COLUMNAS = ("nombre", "email", "telefono", "mensaje", "fecha_creacion")
+MAX_ERRORES = 100
+ERROR_FECHA = "Formato de fecha_creacion inválido"
+
+
+@dataclass
+class BulkLoadResult:
+    insertados: int = 0
+    rechazados: int = 0
+    lotes: int = 0
+    segundos: float = 0.0
+    errores: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.insertados / self.segundos if self.segundos else 0.0
+
+
+def leer_contactos(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream contact rows from a .csv (with header) or .jsonl file"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _normalizar(data: Dict[str, Any], ahora: datetime) -> Dict[str, Any]:
+    fecha = data.get("fecha_creacion")
+    if isinstance(fecha, str) and fecha:
+        fecha = datetime.fromisoformat(fecha.replace("Z", "+00:00"))
+    elif fecha and not isinstance(fecha, datetime):
+        raise ValueError(f"fecha_creacion no es una fecha: {fecha!r}")
+    return {
+        "nombre": data["nombre"],
+        "email": data["email"],
+        "telefono": data.get("telefono") or None,
+        "mensaje": data["mensaje"],
+        "fecha_creacion": fecha or ahora,
+    }
+
+
+def _copy_batch(session, batch: List[Dict[str, Any]]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(["" if row[c] is None else row[c] for c in COLUMNAS])
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        # Cadena vacía sin comillas = NULL en COPY ... csv
+        cursor.copy_expert(
+            f"COPY {Contacto.__tablename__} ({', '.join(COLUMNAS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def cargar_contactos(rows: Iterable[Dict[str, Any]], session_factory=None, batch_size: int = 1000,
+                     use_copy: Optional[bool] = None) -> BulkLoadResult:
+    """Validate and insert contacts in batches, committing once per batch"""
+    if session_factory is None:
+        from database.connection import SessionLocal as session_factory
+
+    result = BulkLoadResult()
+    start = time.perf_counter()
+    numbered = enumerate(rows, start=1)
+
+    with session_factory() as session:
+        if use_copy is None:
+            use_copy = session.get_bind().dialect.driver == "psycopg2"
+
+        while True:
+            chunk = list(islice(numbered, batch_size))
+            if not chunk:
+                break
+            ahora = datetime.utcnow()
+            batch = []
+            for line, data in chunk:
+                error = validar_contacto(data)
+                if not error:
+                    try:
+                        batch.append(_normalizar(data, ahora))
+                    except ValueError:
+                        error = ERROR_FECHA
+                if error:
+                    result.rechazados += 1
+                    if len(result.errores) < MAX_ERRORES:
+                        result.errores.append((line, error))
+            if not batch:
+                continue
+
+            if use_copy:
+                _copy_batch(session, batch)
+            else:
+                # insert() sobre la tabla (Core) evita el overhead del ORM: un executemany por lote
+                session.execute(insert(Contacto.__table__), batch)
+            session.commit()
+            result.insertados += len(batch)
+            result.lotes += 1
+
+    result.segundos = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load contactos from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-copy", action="store_true", help="use batched INSERT even on PostgreSQL")
+    args = parser.parse_args()
+
+    result = cargar_contactos(leer_contactos(args.path), batch_size=args.batch_size,
+                              use_copy=False if args.no_copy else None)
+    print(f"✅ {result.insertados} contactos insertados en {result.lotes} lotes "
+          f"({result.filas_por_segundo:,.0f} filas/s)")
+    if result.rechazados:
+        print(f"⚠️  {result.rechazados} filas rechazadas")
+        for line, error in result.errores[:10]:
+            print(f"   línea {line}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
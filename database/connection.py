@@ -1,12 +1,23 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
+from database.engine import get_engine
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the shared engine when the first session is created"""
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+# Importar este módulo no crea el engine ni lee el .env: eso ocurre en el primer uso
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
+
+
+def __getattr__(name):
+    # `from database.connection import engine` sigue funcionando, creando el engine bajo demanda
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,268 @@
+"""
+Write-behind ingestion queue for Contacto records
+
+Validated contacts are appended to a local SQLite queue in WAL mode and
+acknowledged as soon as that append commits; a background thread moves
+them to the contactos table through SessionLocal in batches of up to
+batch_size rows (or whatever is waiting every flush_interval seconds),
+one commit per batch. Rows leave the queue only after their batch is
+committed, so a crash replays them on the next start (at-least-once).
+A batch the database rejects (IntegrityError / DataError) is retried row
+by row and the rows that still fail move to the fallidos table of the
+queue file with their error, so one bad row never blocks the rest.
+When max_pendientes contacts are waiting, encolar raises ColaLlena
+instead of growing the queue.
+
+    cola = ContactQueue("contact_queue.sqlite3").start()
+    cola.encolar({"nombre": "Ana", "email": "ana@ejemplo.com", "mensaje": "Hola"})
+    cola.stop()
+
+    python -m database.contact_queue status
+    python -m database.contact_queue drain     # flush leftover rows and exit
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database.models import Contacto
+from database.validation import validar_contacto
+
+DEFAULT_QUEUE_PATH = os.getenv("CONTACT_QUEUE_PATH", "contact_queue.sqlite3")
+MAX_ESPERA_REINTENTO = 5.0
+
+
+class ColaLlena(Exception):
+    """Raised by ContactQueue.encolar when max_pendientes contacts are waiting to be flushed"""
+
+    def __init__(self, pendientes: int, retry_after: int = 1):
+        super().__init__(f"Cola de contactos llena ({pendientes} pendientes)")
+        self.pendientes = pendientes
+        self.retry_after = retry_after
+
+
+def _fecha(valor: Any) -> datetime:
+    # La columna es DateTime sin zona (utcnow): las fechas ISO con zona se pasan a UTC
+    if not valor:
+        return datetime.utcnow()
+    try:
+        fecha = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError("fecha_creacion debe ser una fecha ISO 8601") from None
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+
+class ContactQueue:
+    """Durable local queue in front of the contactos table with batched commits and backpressure"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, session_factory=None, batch_size: int = 500,
+                 flush_interval: float = 0.2, max_pendientes: int = 10_000, synchronous: str = "NORMAL"):
+        if session_factory is None:
+            from database.connection import SessionLocal as session_factory
+        self.path = path
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pendientes = max_pendientes
+        # NORMAL en WAL sobrevive a la caída del proceso; FULL también a un corte de energía
+        self.synchronous = synchronous
+        self._db = self._connect()
+        self._db.execute("CREATE TABLE IF NOT EXISTS cola "
+                         "(id INTEGER PRIMARY KEY AUTOINCREMENT, datos TEXT NOT NULL)")
+        # Filas que la base de datos rechazó: se conservan para revisarlas, fuera del camino de la cola
+        self._db.execute("CREATE TABLE IF NOT EXISTS fallidos "
+                         "(id INTEGER PRIMARY KEY, datos TEXT NOT NULL, error TEXT NOT NULL, fecha TEXT NOT NULL)")
+        self._pendientes = self._db.execute("SELECT COUNT(*) FROM cola").fetchone()[0]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._hay_lote = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"encolados": 0, "rechazados": 0, "insertados": 0, "commits": 0, "errores": 0,
+                      "fallidos": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit: cada encolar es su propia transacción en el WAL
+        db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={self.synchronous}")
+        db.execute("PRAGMA busy_timeout=5000")
+        return db
+
+    def __len__(self) -> int:
+        return self._pendientes
+
+    # --- entrada ---
+
+    def encolar(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate like POST /api/contacto/enviar and append to the queue; returns the queued row
+        with its id_cola. Raises ValueError with the route's message, or ColaLlena"""
+        error = validar_contacto(data)
+        if error:
+            raise ValueError(error)
+        # La fecha se normaliza aquí: una fecha inválida se rechaza al encolar, no al volcar
+        row = {"nombre": data["nombre"], "email": data["email"], "telefono": data.get("telefono") or None,
+               "mensaje": data["mensaje"], "fecha_creacion": _fecha(data.get("fecha_creacion")).isoformat()}
+        datos = json.dumps(row, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self.stats["rechazados"] += 1
+                raise ColaLlena(self._pendientes)
+            id_cola = self._db.execute("INSERT INTO cola (datos) VALUES (?)", (datos,)).lastrowid
+            self._pendientes += 1
+            self.stats["encolados"] += 1
+            if self._pendientes >= self.batch_size:
+                self._hay_lote.set()
+        return {"id_cola": id_cola, **row}
+
+    # --- ciclo de vida ---
+
+    def start(self) -> "ContactQueue":
+        self._stop.clear()
+        if self._pendientes:
+            # Filas que quedaron de una ejecución anterior: se vuelcan sin esperar al intervalo
+            self._hay_lote.set()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Flush what is waiting (while the database accepts it) and stop the worker"""
+        self._stop.set()
+        self._hay_lote.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        self._db.close()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued contact is committed to the contactos table"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pendientes:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    # --- volcado ---
+
+    def flush(self, db: Optional[sqlite3.Connection] = None) -> int:
+        """Move one batch from the queue to the contactos table; returns how many rows left the queue
+        (committed or moved to fallidos)"""
+        db = db or self._db
+        filas = db.execute("SELECT id, datos FROM cola ORDER BY id LIMIT ?", (self.batch_size,)).fetchall()
+        if not filas:
+            return 0
+        batch, fallidos = [], []
+        for id_cola, datos in filas:
+            try:
+                row = json.loads(datos)
+                row["fecha_creacion"] = _fecha(row["fecha_creacion"])
+            except (ValueError, KeyError, TypeError) as e:
+                fallidos.append((id_cola, datos, f"{type(e).__name__}: {e}"))
+                continue
+            batch.append((id_cola, datos, row))
+        commits = 0
+        if batch:
+            try:
+                with self.session_factory() as session:
+                    # Un executemany y un commit por lote, como database.bulk_load
+                    session.execute(insert(Contacto.__table__), [row for _, _, row in batch])
+                    session.commit()
+                commits = 1
+            except (IntegrityError, DataError):
+                # Alguna fila del lote no cabe en la tabla: se reintenta una a una para aislarla
+                for id_cola, datos, row in batch:
+                    try:
+                        with self.session_factory() as session:
+                            session.execute(insert(Contacto.__table__), [row])
+                            session.commit()
+                        commits += 1
+                    except (IntegrityError, DataError) as e:
+                        fallidos.append((id_cola, datos, str(e.orig)))
+        # Si el proceso cae aquí el lote se repite al arrancar: entrega al menos una vez
+        fecha = datetime.utcnow().isoformat()
+        with db:
+            db.execute("BEGIN")
+            db.executemany("INSERT OR REPLACE INTO fallidos (id, datos, error, fecha) VALUES (?, ?, ?, ?)",
+                           [(id_cola, datos, error, fecha) for id_cola, datos, error in fallidos])
+            db.execute("DELETE FROM cola WHERE id <= ?", (filas[-1][0],))
+        for id_cola, _, error in fallidos:
+            print(f"⚠️  Contacto {id_cola} no se pudo volcar, movido a fallidos: {error}")
+        with self._idle:
+            self._pendientes -= len(filas)
+            self.stats["insertados"] += len(filas) - len(fallidos)
+            self.stats["fallidos"] += len(fallidos)
+            self.stats["commits"] += commits
+            self._idle.notify_all()
+        return len(filas)
+
+    def _flush_loop(self) -> None:
+        db = self._connect()
+        fallos = 0
+        try:
+            while True:
+                self._hay_lote.wait(self.flush_interval)
+                self._hay_lote.clear()
+                parar = self._stop.is_set()
+                try:
+                    # Se vacían lotes completos seguidos; uno incompleto significa que la cola quedó vacía
+                    while self.flush(db) == self.batch_size:
+                        pass
+                    fallos = 0
+                except Exception as e:
+                    fallos += 1
+                    with self._lock:
+                        self.stats["errores"] += 1
+                    print(f"⚠️  Error volcando contactos (intento {fallos}): {e}")
+                    if parar:
+                        # Las filas siguen en la cola y se vuelcan en el próximo arranque
+                        return
+                    self._stop.wait(min(self.flush_interval * 2 ** fallos, MAX_ESPERA_REINTENTO))
+                    continue
+                if parar:
+                    return
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write-behind contact queue")
+    parser.add_argument("command", choices=["status", "drain"])
+    parser.add_argument("--path", default=DEFAULT_QUEUE_PATH)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    cola = ContactQueue(args.path, batch_size=args.batch_size)
+    if args.command == "status":
+        fallidos = cola._db.execute("SELECT COUNT(*) FROM fallidos").fetchone()[0]
+        print(f"ℹ️  {len(cola)} contactos pendientes y {fallidos} fallidos en {args.path}")
+        cola.close()
+        return 0
+
+    pendientes = len(cola)
+    while cola.flush():
+        pass
+    print(f"✅ {pendientes} contactos volcados en {cola.stats['commits']} commits")
+    cola.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
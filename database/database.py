@@ -1,12 +1,9 @@
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from database.connection import SessionLocal, Base
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def __getattr__(name):
+    if name == "engine":
+        from database.engine import get_engine
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,12 @@
-import sys
-import os
+from database.engine import get_engine
+from database.migrations import drop_schema
 
-# Asegura que el path raíz esté en el sys.path para importar correctamente
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from backend.database.connection import engine, Base
-from backend.database.models import Contacto
+def main():
+    # Elimina también el historial de migraciones para poder recrear la tabla con init_db
+    drop_schema(get_engine())
+    print("❌ Tabla 'contactos' eliminada.")
 
-# Eliminar la tabla
-Base.metadata.drop_all(bind=engine)
-print("❌ Tabla 'contactos' eliminada.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PoolMetrics:
+    """Pool usage counters: checkouts, open connections and time spent waiting"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, *_):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *_):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *_):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "timeouts": self.timeouts,
+                "wait_total_s": round(self.wait_total, 6),
+                "wait_max_s": round(self.wait_max, 6),
+                "wait_avg_s": round(self.wait_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long each checkout waits for a free connection"""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool; las métricas continúan
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_settings():
+    """Pool configuration read from the environment"""
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "statement_timeout_ms": _env_int("DB_STATEMENT_TIMEOUT_MS", 30000),
+    }
+
+
+def create_configured_engine(database_url=None, **overrides):
+    """Build an Engine with the configured pool; most code should call get_engine() instead"""
+    # El .env se lee al crear el primer engine, no al importar el paquete
+    load_dotenv()
+    database_url = database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    settings = pool_settings()
+    settings.update(overrides)
+    statement_timeout_ms = settings.pop("statement_timeout_ms")
+
+    url = make_url(database_url)
+    kwargs = {}
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # SQLite en memoria usa su propio pool de una sola conexión
+        kwargs["pool_pre_ping"] = settings["pool_pre_ping"]
+    else:
+        kwargs.update(settings)
+        kwargs["poolclass"] = InstrumentedQueuePool
+
+    if url.get_backend_name() == "postgresql" and statement_timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+
+    engine = create_engine(url, connect_args=connect_args, **kwargs)
+    attach_pool_metrics(engine)
+    return engine
+
+
+def attach_pool_metrics(engine):
+    """Count connects/checkouts/checkins on engine's pool (sync engines or AsyncEngine.sync_engine)"""
+    metrics = PoolMetrics()
+    engine.pool.metrics = metrics
+    event.listen(engine, "connect", metrics.on_connect)
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    return metrics
+
+
+_engine = None
+_engine_lock = threading.Lock()
+# Engines compartidos por nombre ("default", "async") y quién quiere enterarse de cada uno (métricas)
+_compartidos = {}
+_observadores = []
+
+
+def observar_engines(callback):
+    """Call callback(engine, name) for every shared engine: the existing ones now, new ones when created.
+    Async engines are passed as their sync_engine"""
+    with _engine_lock:
+        _observadores.append(callback)
+        existentes = list(_compartidos.items())
+    for name, engine in existentes:
+        callback(engine, name)
+
+
+def registrar_compartido(engine, name):
+    """Announce a newly created shared engine to the observar_engines callbacks"""
+    engine = getattr(engine, "sync_engine", engine)
+    with _engine_lock:
+        _compartidos[name] = engine
+        observadores = list(_observadores)
+    for callback in observadores:
+        callback(engine, name)
+
+
+def get_engine() -> Engine:
+    """Engine shared by the whole database package (one pool per process)"""
+    global _engine
+    creado = None
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = creado = create_configured_engine()
+    if creado is not None:
+        registrar_compartido(creado, "default")
+    return _engine
+
+
+def pool_metrics(engine=None):
+    """Pool counters plus the status line SQLAlchemy reports"""
+    engine = engine or get_engine()
+    counters = getattr(engine.pool, "metrics", None)
+    metrics = counters.snapshot() if counters is not None else {}
+    metrics["status"] = engine.pool.status()
+    return metrics
+
+
+def dispose_engine():
+    """Close the shared engine connections (e.g. after forking)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _compartidos.pop("default", None)
@@ -1,30 +1,19 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
-from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
-import os
-from dotenv import load_dotenv
+from database.connection import SessionLocal, Base
+from database.models import Contacto
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+def __getattr__(name):
+    if name == "engine":
+        from database.engine import get_engine
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class Contacto(Base):
-    __tablename__ = "contactos"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=False)
-    telefono = Column(String(20), nullable=True)
-    mensaje = Column(Text, nullable=False)
-    fecha_creacion = Column(DateTime, default=datetime.utcnow)
 
-# Crear todas las tablas
+# Crear / actualizar el esquema con las migraciones versionadas
 if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tablas creadas exitosamente en la base de datos")
\ No newline at end of file
+    from database.engine import get_engine
+    from database.migrations import run_migrations
+
+    run_migrations(get_engine())
+    print("✅ Tablas creadas exitosamente en la base de datos")
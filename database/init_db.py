@@ -1,25 +1,13 @@
-from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.orm import declarative_base
+from database.engine import get_engine
+from database.migrations import run_migrations
 
-from dotenv import load_dotenv
-import os
 
-load_dotenv()  # Carga el archivo .env
+def main():
+    applied = run_migrations(get_engine())
+    for migration in applied:
+        print(f"⬆️  {migration.version:04d} {migration.name}")
+    print("✅ Tabla 'contactos' creada exitosamente.")
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-Base = declarative_base()
-
-class Contacto(Base):
-    __tablename__ = "contactos"
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String, nullable=False)
-    email = Column(String, nullable=False)
-    telefono = Column(String, nullable=True)
-    mensaje = Column(String, nullable=True)
-
-# Crear la tabla
-Base.metadata.create_all(bind=engine)
-
-print("✅ Tabla 'contactos' creada exitosamente.")
+if __name__ == "__main__":
+    main()
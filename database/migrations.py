@@ -0,0 +1,236 @@
+"""
+Versioned schema migrations
+
+Each migration runs once and is recorded in schema_migrations. Index
+migrations are non-transactional: on PostgreSQL they use
+CREATE INDEX CONCURRENTLY so the table stays writable while they build.
+Nothing here runs on import; call run_migrations() or use the CLI:
+
+    python -m database.migrations status
+    python -m database.migrations upgrade
+"""
+
+import argparse
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from database.models import Contacto
+
+MIGRATIONS_TABLE = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Clave arbitraria del advisory lock que serializa ejecuciones concurrentes en PostgreSQL
+_ADVISORY_LOCK_KEY = 7_246_313
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable
+    transactional: bool = True
+
+
+def _index(name: str) -> Index:
+    return next(index for index in Contacto.__table__.indexes if index.name == name)
+
+
+def create_index(conn, index: Index) -> None:
+    """Create an index without blocking writes on PostgreSQL (conn must be in AUTOCOMMIT)"""
+    if conn.dialect.name != "postgresql":
+        index.create(conn, checkfirst=True)
+        return
+
+    # Un CREATE INDEX CONCURRENTLY interrumpido deja un índice INVALID: se elimina y se repite
+    invalid = conn.execute(
+        text("SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+             "WHERE c.relname = :name AND NOT i.indisvalid"),
+        {"name": index.name},
+    ).first()
+    if invalid:
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+
+    preparer = conn.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(column.name) for column in index.columns)
+    unique = "UNIQUE " if index.unique else ""
+    conn.execute(text(
+        f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {preparer.quote(index.name)} "
+        f"ON {preparer.format_table(index.table)} ({columns})"
+    ))
+
+
+def _create_contactos(conn) -> None:
+    # Solo columnas; los índices llegan en migraciones propias
+    if not inspect(conn).has_table(Contacto.__tablename__):
+        conn.execute(CreateTable(Contacto.__table__))
+
+
+def _add_fecha_creacion(conn) -> None:
+    # Las tablas creadas por el antiguo init_db no tenían fecha_creacion
+    columns = {column["name"] for column in inspect(conn).get_columns(Contacto.__tablename__)}
+    if "fecha_creacion" not in columns:
+        column_type = Contacto.__table__.c.fecha_creacion.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {Contacto.__tablename__} ADD COLUMN fecha_creacion {column_type}"))
+    _fecha_creacion_not_null(conn)
+
+
+# Valor con el que se rellenan los NULL antes de hacer NOT NULL cada columna que el antiguo init_db dejó nullable
+_RELLENOS = {"fecha_creacion": "CURRENT_TIMESTAMP", "mensaje": "''"}
+
+
+def _rellenar_nulos(conn) -> None:
+    tabla = Contacto.__tablename__
+    columnas = {c["name"] for c in inspect(conn).get_columns(tabla)}
+    for columna, valor in _RELLENOS.items():
+        if columna in columnas:
+            conn.execute(text(f"UPDATE {tabla} SET {columna} = {valor} WHERE {columna} IS NULL"))
+
+
+def _not_null(conn, columna: str, default: Optional[str] = None) -> None:
+    """Backfill NULLs (every column in _RELLENOS) and make columna NOT NULL [DEFAULT default]"""
+    tabla = Contacto.__tablename__
+    _rellenar_nulos(conn)
+    inspector = inspect(conn)
+    if not next(c for c in inspector.get_columns(tabla) if c["name"] == columna)["nullable"]:
+        return
+    if conn.dialect.name != "sqlite":
+        cambios = f"ALTER COLUMN {columna} SET NOT NULL"
+        if default:
+            cambios = f"ALTER COLUMN {columna} SET DEFAULT {default}, {cambios}"
+        conn.execute(text(f"ALTER TABLE {tabla} {cambios}"))
+        return
+
+    # SQLite no altera columnas: se reconstruye la tabla con el esquema del modelo y se reponen sus índices.
+    # El modelo trae todas sus restricciones NOT NULL, por eso _rellenar_nulos cubre todas las columnas
+    indices = {index["name"] for index in inspector.get_indexes(tabla)}
+    columnas = ", ".join(c["name"] for c in inspector.get_columns(tabla) if c["name"] in Contacto.__table__.c)
+    conn.execute(text(f"ALTER TABLE {tabla} RENAME TO {tabla}_anterior"))
+    conn.execute(CreateTable(Contacto.__table__))
+    conn.execute(text(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {tabla}_anterior"))
+    conn.execute(text(f"DROP TABLE {tabla}_anterior"))
+    for index in Contacto.__table__.indexes:
+        if index.name in indices:
+            index.create(conn)
+
+
+def _fecha_creacion_not_null(conn) -> None:
+    """Backfill NULL fecha_creacion and make the column NOT NULL DEFAULT CURRENT_TIMESTAMP"""
+    _not_null(conn, "fecha_creacion", default="CURRENT_TIMESTAMP")
+
+
+def _mensaje_not_null(conn) -> None:
+    """Backfill NULL mensaje (the old init_db made it nullable) with '' and make the column NOT NULL"""
+    _not_null(conn, "mensaje")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create_contactos", _create_contactos),
+    Migration(2, "add_contactos_fecha_creacion", _add_fecha_creacion),
+    Migration(3, "index_contactos_id",
+              lambda conn: create_index(conn, _index("ix_contactos_id")), transactional=False),
+    Migration(4, "index_contactos_fecha_creacion_id",
+              lambda conn: create_index(conn, _index("ix_contactos_fecha_creacion_id")), transactional=False),
+    # Para bases que ya aplicaron la 2 antes de que rellenara las fechas nulas
+    Migration(5, "contactos_fecha_creacion_not_null", _fecha_creacion_not_null),
+    Migration(6, "contactos_mensaje_not_null", _mensaje_not_null),
+]
+
+
+@contextmanager
+def _migration_lock(engine):
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            conn.commit()
+
+
+def applied_versions(engine) -> Set[int]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(MIGRATIONS_TABLE.name):
+            return set()
+        return set(conn.execute(MIGRATIONS_TABLE.select().with_only_columns(MIGRATIONS_TABLE.c.version)).scalars())
+
+
+def pending_migrations(engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def run_migrations(engine=None, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to target (default: all); returns the ones applied"""
+    if engine is None:
+        from database.engine import get_engine
+
+        engine = get_engine()
+
+    applied = []
+    with _migration_lock(engine):
+        MIGRATIONS_TABLE.create(bind=engine, checkfirst=True)
+        for migration in pending_migrations(engine):
+            if target is not None and migration.version > target:
+                break
+            if migration.transactional:
+                with engine.begin() as conn:
+                    migration.upgrade(conn)
+                    _record(conn, migration)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migration.upgrade(conn)
+                with engine.begin() as conn:
+                    _record(conn, migration)
+            applied.append(migration)
+    return applied
+
+
+def drop_schema(engine) -> None:
+    """Drop the model tables and the migration history (used by drop_table and benchmarks)"""
+    Contacto.metadata.drop_all(bind=engine)
+    MIGRATIONS_TABLE.drop(bind=engine, checkfirst=True)
+
+
+def _record(conn, migration: Migration) -> None:
+    conn.execute(MIGRATIONS_TABLE.insert().values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    parser.add_argument("--target", type=int, default=None)
+    args = parser.parse_args()
+
+    from database.engine import get_engine
+
+    engine = get_engine()
+    if args.command == "status":
+        applied = applied_versions(engine)
+        for migration in MIGRATIONS:
+            mark = "✅" if migration.version in applied else "⏳"
+            print(f"{mark} {migration.version:04d} {migration.name}")
+    else:
+        applied = run_migrations(engine, args.target)
+        for migration in applied:
+            print(f"⬆️  {migration.version:04d} {migration.name}")
+        print(f"✅ {len(applied)} migraciones aplicadas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
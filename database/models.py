@@ -1,11 +1,21 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from datetime import datetime
 from database.connection import Base
 
+# Modelo canónico de contactos: el resto del paquete lo importa desde aquí
 class Contacto(Base):
     __tablename__ = "contactos"
 
     id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String)
-    email = Column(String)
-    telefono = Column(String)
-    mensaje = Column(String)
+    nombre = Column(String(255), nullable=False)
+    email = Column(String(255), nullable=False)
+    telefono = Column(String(20), nullable=True)
+    mensaje = Column(Text, nullable=False)
+    # NOT NULL: el cursor de database.queries se construye con fecha_creacion
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.utcnow,
+                            server_default=text("CURRENT_TIMESTAMP"))
+
+    # Listados paginados por (fecha_creacion, id) sin escanear ni ordenar toda la tabla
+    __table_args__ = (
+        Index("ix_contactos_fecha_creacion_id", "fecha_creacion", "id"),
+    )
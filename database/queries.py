@@ -0,0 +1,94 @@
+"""
+Keyset-paginated contact listings
+
+GET /api/contacto returns every row ordered by fecha_creacion. These
+queries page through the same order with a (fecha_creacion, id) cursor, so
+each page is an index range scan on ix_contactos_fecha_creacion_id no
+matter how deep it is. List views skip the mensaje column.
+
+The cursor relies on fecha_creacion being NOT NULL (enforced by the model
+and by migrations 2 and 5), so no NULLS FIRST/LAST ordering is needed and
+a row can never fall outside the keyset comparison.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from database.models import Contacto
+
+# Columnas de la vista de lista: sin mensaje (Text)
+COLUMNAS_LISTA = (Contacto.id, Contacto.nombre, Contacto.email, Contacto.telefono, Contacto.fecha_creacion)
+MAX_LIMIT = 500
+
+
+@dataclass
+class Pagina:
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(fecha_creacion: datetime, id: int) -> str:
+    if fecha_creacion is None:
+        # Solo pasa en un esquema sin migrar: la columna es NOT NULL desde la migración 2
+        raise ValueError("fecha_creacion nula; ejecute python -m database.migrations upgrade")
+    raw = json.dumps([fecha_creacion.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fecha, id = json.loads(raw)
+        return datetime.fromisoformat(fecha), int(id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def build_list_query(limit: int = 50, cursor: Optional[str] = None, ascending: bool = False,
+                     incluir_mensaje: bool = False):
+    """SELECT for one page (plus one look-ahead row); shared by the sync and async listings"""
+    limit = max(1, min(limit, MAX_LIMIT))
+    columnas = COLUMNAS_LISTA + ((Contacto.mensaje,) if incluir_mensaje else ())
+    clave = tuple_(Contacto.fecha_creacion, Contacto.id)
+
+    query = select(*columnas)
+    if ascending:
+        query = query.order_by(Contacto.fecha_creacion.asc(), Contacto.id.asc())
+    else:
+        query = query.order_by(Contacto.fecha_creacion.desc(), Contacto.id.desc())
+
+    if cursor:
+        fecha, id = decode_cursor(cursor)
+        query = query.where(clave > tuple_(fecha, id) if ascending else clave < tuple_(fecha, id))
+
+    # Se pide una fila extra para saber si hay otra página
+    return query.limit(limit + 1)
+
+
+def build_page(rows, limit: int) -> Pagina:
+    limit = max(1, min(limit, MAX_LIMIT))
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["fecha_creacion"], last["id"])
+    return Pagina(items=items, next_cursor=next_cursor)
+
+
+def listar_contactos(session=None, limit: int = 50, cursor: Optional[str] = None,
+                     ascending: bool = False, incluir_mensaje: bool = False) -> Pagina:
+    """One page of contacts ordered by (fecha_creacion, id), newest first by default"""
+    if session is None:
+        from database.connection import SessionLocal
+
+        with SessionLocal() as session:
+            return listar_contactos(session, limit, cursor, ascending, incluir_mensaje)
+
+    query = build_list_query(limit, cursor, ascending, incluir_mensaje)
+    return build_page(session.execute(query).mappings().all(), limit)
@@ -0,0 +1,16 @@
+import re
+
+# Mismas reglas y mensajes que POST /api/contacto/enviar (backend/src/routes/contacto.ts)
+EMAIL_REGEX = re.compile(r"[^\s@]+@[^\s@]+\.[^\s@]+")
+
+ERROR_REQUERIDOS = "Nombre, email y mensaje son requeridos"
+ERROR_EMAIL = "Formato de email inválido"
+
+
+def validar_contacto(data):
+    """Return the route's 400 error message for an invalid contact, or None when it is valid"""
+    if not data.get("nombre") or not data.get("email") or not data.get("mensaje"):
+        return ERROR_REQUERIDOS
+    if not isinstance(data["email"], str) or not EMAIL_REGEX.fullmatch(data["email"]):
+        return ERROR_EMAIL
+    return None
@@ -0,0 +1,175 @@
+"""
+Precomputed dashboard aggregates
+
+Per-day and per-month rollups of facturas and contactos for the
+"métricas en tiempo real" dashboards: invoices uploaded, bytes uploaded,
+ITBIS / IVA / retención from each invoice's extracted calculation
+(services.extraccion) and contacts received. The rollups are built once
+from the local store and then follow it through insert/update/delete
+listeners, so a write moves one day and one month bucket and a dashboard
+read only touches the buckets it returns.
+
+Amounts are kept in integer cents so adding and removing rows never
+drifts.
+
+    aggregates = Aggregates().attach(LocalStore())
+    aggregates.serie("mes", desde="2025-01")
+    aggregates.resumen()
+"""
+
+import argparse
+import bisect
+import json
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.http import App, Request, error_response, json_response
+from services.local_store import LocalStore
+
+TABLAS = ("facturas", "contactos")
+GRANULARIDADES = {"dia": 10, "mes": 7}  # longitud del prefijo ISO de la fecha
+CONTADORES = ("facturas", "bytes", "itbis", "iva", "retencion", "contactos")
+MONTOS = ("itbis", "iva", "retencion")
+
+Aporte = Tuple[str, Tuple[int, ...]]
+
+
+def _centimos(value: Any) -> int:
+    try:
+        return int(round(float(value) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def aporte(tabla: str, row: Dict[str, Any]) -> Optional[Aporte]:
+    """(fecha, counter deltas in CONTADORES order) a row adds to the rollups"""
+    if tabla == "facturas":
+        fecha = row.get("subido_en") or row.get("fecha_creacion") or ""
+        impuestos = (((row.get("extraccion") or {}).get("calculo") or {}).get("calculo") or {}).get("impuestos") or {}
+        valores = (1, int(row.get("tamano_archivo") or 0), *(_centimos(impuestos.get(m)) for m in MONTOS), 0)
+    else:
+        fecha = row.get("fecha_creacion") or ""
+        valores = (0, 0, 0, 0, 0, 1)
+    if len(fecha) < GRANULARIDADES["dia"]:
+        return None  # sin fecha no cae en ningún cubo
+    return fecha, valores
+
+
+class _Serie:
+    """Buckets of one granularity: counters by key plus the keys kept sorted"""
+
+    def __init__(self, largo: int):
+        self.largo = largo
+        self.cubos: Dict[str, List[int]] = {}
+        self.claves: List[str] = []
+
+    def sumar(self, fecha: str, valores: Tuple[int, ...], signo: int) -> None:
+        clave = fecha[:self.largo]
+        cubo = self.cubos.get(clave)
+        if cubo is None:
+            cubo = self.cubos[clave] = [0] * len(CONTADORES)
+            bisect.insort(self.claves, clave)
+        for i, v in enumerate(valores):
+            cubo[i] += signo * v
+
+    def rango(self, desde: Optional[str], hasta: Optional[str]) -> List[str]:
+        lo = bisect.bisect_left(self.claves, desde[:self.largo]) if desde else 0
+        hi = bisect.bisect_right(self.claves, hasta[:self.largo]) if hasta else len(self.claves)
+        return self.claves[lo:hi]
+
+
+def _cubo(clave: str, cubo: List[int]) -> Dict[str, Any]:
+    fila: Dict[str, Any] = {"periodo": clave}
+    for nombre, valor in zip(CONTADORES, cubo):
+        fila[nombre] = valor / 100 if nombre in MONTOS else valor
+    return fila
+
+
+class Aggregates:
+    """Day and month rollups kept current by local store listeners"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {nombre: _Serie(largo) for nombre, largo in GRANULARIDADES.items()}
+        self._totales = [0] * len(CONTADORES)
+        # Último aporte de cada fila, para restarlo al actualizarla o borrarla
+        self._aportes: Dict[Tuple[str, Any], Aporte] = {}
+
+    def _sumar(self, contribucion: Aporte, signo: int) -> None:
+        fecha, valores = contribucion
+        for serie in self._series.values():
+            serie.sumar(fecha, valores, signo)
+        for i, v in enumerate(valores):
+            self._totales[i] += signo * v
+
+    def aplicar(self, tabla: str, evento: str, row: Dict[str, Any]) -> None:
+        """Move the rollups by one insert/update/delete of a row"""
+        clave = (tabla, row.get("id"))
+        nuevo = None if evento == "delete" else aporte(tabla, row)
+        with self._lock:
+            previo = self._aportes.pop(clave, None)
+            if previo is not None:
+                self._sumar(previo, -1)
+            if nuevo is not None:
+                self._sumar(nuevo, 1)
+                self._aportes[clave] = nuevo
+
+    def attach(self, store: LocalStore) -> "Aggregates":
+        """Load the current rows once, then follow every write"""
+        for tabla in TABLAS:
+            table = store.table(tabla)
+            # El listener se registra bajo el lock de la tabla: ninguna escritura queda entre la carga y él
+            with table.lock:
+                for row in list(table.records.values()):
+                    self.aplicar(tabla, "insert", row)
+                store.subscribe(tabla, lambda evento, row, tabla=tabla: self.aplicar(tabla, evento, row))
+        return self
+
+    def serie(self, granularidad: str = "dia", desde: Optional[str] = None,
+              hasta: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Buckets of the granularity between desde and hasta (ISO prefixes, inclusive), oldest first"""
+        if granularidad not in self._series:
+            raise ValueError(f"Granularidad inválida: {granularidad}")
+        serie = self._series[granularidad]
+        with self._lock:
+            return [_cubo(clave, serie.cubos[clave]) for clave in serie.rango(desde, hasta)
+                    if any(serie.cubos[clave])]
+
+    def resumen(self) -> Dict[str, Any]:
+        with self._lock:
+            totales = _cubo("total", self._totales)
+        del totales["periodo"]
+        return totales
+
+
+def register_routes(app: App, aggregates: Aggregates) -> None:
+    @app.route("GET", "/api/dashboard/resumen")
+    def resumen(request: Request):
+        query = request.query
+        try:
+            serie = aggregates.serie(query.get("granularidad", "dia"), query.get("desde"), query.get("hasta"))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        return json_response({"totales": aggregates.resumen(), "serie": serie})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard rollups over the local store")
+    parser.add_argument("--data-dir", default=None, help="local store directory")
+    parser.add_argument("--granularidad", choices=tuple(GRANULARIDADES), default="mes")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    args = parser.parse_args()
+
+    store = LocalStore(args.data_dir) if args.data_dir else LocalStore()
+    aggregates = Aggregates().attach(store)
+    print(json.dumps({"totales": aggregates.resumen(),
+                      "serie": aggregates.serie(args.granularidad, args.desde, args.hasta)},
+                     ensure_ascii=False, indent=2))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
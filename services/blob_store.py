@@ -0,0 +1,252 @@
+"""
+Content-addressed invoice storage
+
+Files are stored once under blobs/ab/cd/<sha256> inside the storage
+directory, so retried or repeated uploads of the same PDF share one blob.
+A blob's reference count is the number of facturas rows whose sha256
+points at it (served from the local store's equality index), and a blob
+is deleted when its last row goes.
+
+One-shot migration of the existing uploads/ trees:
+
+    python -m services.blob_store dedupe backend/uploads backend/dist/uploads --dry-run
+    python -m services.blob_store dedupe backend/uploads backend/dist/uploads
+    python -m services.blob_store gc
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.local_store import LocalStore
+
+DEFAULT_STORAGE_DIR = os.getenv(
+    "UPLOAD_STORAGE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "uploads"),
+)
+BLOB_DIR = "blobs"
+HASH_CHUNK = 1024 * 1024
+
+# Cerrojo y blobs fijados por directorio: todas las instancias sobre la misma raíz los comparten
+_ESTADO: Dict[str, Tuple[threading.Lock, Dict[str, int]]] = {}
+_ESTADO_LOCK = threading.Lock()
+
+
+def sha256_archivo(path: str) -> Tuple[str, int]:
+    """SHA-256 and size of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class BlobStore:
+    """SHA-256 keyed blobs with two levels of fan-out directories"""
+
+    def __init__(self, root: str = DEFAULT_STORAGE_DIR):
+        self.root = root
+        with _ESTADO_LOCK:
+            self._lock, self._fijados = _ESTADO.setdefault(os.path.abspath(root), (threading.Lock(), {}))
+
+    def ruta(self, sha256: str) -> str:
+        """Storage path relative to root (what facturas.ruta_storage holds)"""
+        return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, *self.ruta(sha256).split("/"))
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path(sha256))
+
+    def put_file(self, src: str, sha256: str) -> Tuple[str, bool]:
+        """Move src into the store; if the content is already there src is dropped. Returns (ruta, created)"""
+        dest = self.path(sha256)
+        with self._lock:
+            if os.path.exists(dest):
+                os.remove(src)
+                return self.ruta(sha256), False
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                os.replace(src, dest)
+            except OSError:
+                # Distinto sistema de archivos: copiar a un temporal junto al destino y renombrar
+                tmp = dest + ".tmp"
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+                os.remove(src)
+            return self.ruta(sha256), True
+
+    @contextmanager
+    def fijar(self, sha256: str):
+        """Keep release() from deleting the blob while a facturas row for it is being written"""
+        with self._lock:
+            self._fijados[sha256] = self._fijados.get(sha256, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                restantes = self._fijados.pop(sha256) - 1
+                if restantes:
+                    self._fijados[sha256] = restantes
+
+    def referencias(self, store: LocalStore, sha256: str) -> int:
+        return len(store.table("facturas").find("sha256", sha256))
+
+    def release(self, store: LocalStore, sha256: str) -> bool:
+        """Delete the blob if no facturas row (or migrated uploads/ hard link) references it any more"""
+        with self._lock:
+            path = self.path(sha256)
+            if (sha256 in self._fijados or self.referencias(store, sha256) or not os.path.exists(path)
+                    or os.stat(path).st_nlink > 1):
+                return False
+            os.remove(path)
+            return True
+
+    def iter_blobs(self) -> Iterator[Tuple[str, str]]:
+        base = os.path.join(self.root, BLOB_DIR)
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                if len(name) == 64 and not name.endswith(".tmp"):
+                    yield name, os.path.join(dirpath, name)
+
+    def collect_garbage(self, store: LocalStore) -> Tuple[int, int]:
+        """Remove unreferenced blobs; returns (blobs, bytes) freed"""
+        freed = freed_bytes = 0
+        for sha256, path in list(self.iter_blobs()):
+            size = os.path.getsize(path)
+            if self.release(store, sha256):
+                freed += 1
+                freed_bytes += size
+        return freed, freed_bytes
+
+
+def eliminar_factura(store: LocalStore, blobs: BlobStore, id) -> bool:
+    """Delete a facturas row and release its blob"""
+    result = store.from_("facturas").delete().eq("id", id)
+    if result.error or not result.data:
+        return False
+    sha256 = result.data[0].get("sha256")
+    if sha256:
+        blobs.release(store, sha256)
+    return True
+
+
+@dataclass
+class DedupeReport:
+    archivos: int = 0
+    unicos: int = 0
+    duplicados: int = 0
+    bytes_total: int = 0
+    bytes_recuperados: int = 0
+    filas_actualizadas: int = 0
+
+
+def _archivos(dirs: List[str], blob_root: str) -> Iterator[str]:
+    skip = {os.path.abspath(os.path.join(blob_root, BLOB_DIR)), os.path.abspath(os.path.join(blob_root, "tmp"))}
+    for root in dirs:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) not in skip)
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if os.path.isfile(path) and not os.path.islink(path):
+                    yield path
+
+
+def dedupe_uploads(dirs: List[str], blobs: BlobStore, store: Optional[LocalStore] = None,
+                   link: bool = True, dry_run: bool = False) -> DedupeReport:
+    """
+    Move every file under dirs into the blob store. Each original path is
+    replaced by a hard link to its blob (so /uploads URLs keep working) or,
+    with link=False, removed. facturas rows pointing at a moved file get
+    its sha256 and blob ruta_storage.
+    """
+    report = DedupeReport()
+    por_nombre = {}
+    if store is not None:
+        for row in store.table("facturas").records.values():
+            for campo in ("ruta_storage", "ruta_archivo"):
+                if row.get(campo):
+                    por_nombre.setdefault(os.path.basename(row[campo]), []).append(row["id"])
+
+    vistos = set()
+    for path in _archivos(dirs, blobs.root):
+        sha256, size = sha256_archivo(path)
+        if blobs.exists(sha256) and os.path.samefile(path, blobs.path(sha256)):
+            continue  # ya enlazado al blob en una ejecución anterior
+        report.archivos += 1
+        report.bytes_total += size
+        duplicado = sha256 in vistos or blobs.exists(sha256)
+        vistos.add(sha256)
+        if duplicado:
+            report.duplicados += 1
+            report.bytes_recuperados += size
+        else:
+            report.unicos += 1
+
+        if store is not None:
+            for id in por_nombre.get(os.path.basename(path), []):
+                report.filas_actualizadas += 1
+                if not dry_run:
+                    store.from_("facturas").update({"sha256": sha256, "ruta_storage": blobs.ruta(sha256)}).eq("id", id)
+
+        if dry_run:
+            continue
+        if duplicado:
+            os.remove(path)
+        else:
+            blobs.put_file(path, sha256)
+        if link:
+            try:
+                os.link(blobs.path(sha256), path)
+            except OSError:
+                # Sin enlaces duros (otro volumen): se deja una copia y no cuenta como recuperado
+                shutil.copyfile(blobs.path(sha256), path)
+                if duplicado:
+                    report.bytes_recuperados -= size
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed invoice storage")
+    parser.add_argument("--root", default=DEFAULT_STORAGE_DIR, help="storage directory holding blobs/")
+    parser.add_argument("--data-dir", default=None, help="local store directory (facturas)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dedupe = sub.add_parser("dedupe", help="move existing uploads into the blob store")
+    dedupe.add_argument("dirs", nargs="*", default=None)
+    dedupe.add_argument("--remove", action="store_true", help="remove originals instead of hard-linking them")
+    dedupe.add_argument("--dry-run", action="store_true")
+    sub.add_parser("gc", help="delete blobs no facturas row references")
+    args = parser.parse_args()
+
+    blobs = BlobStore(args.root)
+    store = LocalStore(args.data_dir) if args.data_dir else LocalStore()
+
+    if args.command == "dedupe":
+        dirs = args.dirs or [args.root, os.path.join(os.path.dirname(args.root), "dist", "uploads")]
+        dirs = [d for d in dirs if os.path.isdir(d)]
+        report = dedupe_uploads(dirs, blobs, store, link=not args.remove, dry_run=args.dry_run)
+        prefix = "ℹ️  (dry run) " if args.dry_run else "✅ "
+        print(f"{prefix}{report.archivos} archivos, {report.unicos} únicos, {report.duplicados} duplicados, "
+              f"{report.filas_actualizadas} facturas actualizadas")
+        print(f"{prefix}{report.bytes_recuperados:,} de {report.bytes_total:,} bytes recuperados")
+    else:
+        freed, freed_bytes = blobs.collect_garbage(store)
+        print(f"✅ {freed} blobs eliminados ({freed_bytes:,} bytes)")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Batch tax engine (ITBIS / IVA / Retención)
+
+Same arithmetic as POST /api/calculadora/calcular in
+backend/src/routes/calculadora.ts, evaluated over NumPy arrays so that
+month-end reconciliation can process whole invoice sets in one call.
+Every value is computed with the same IEEE-754 operations, in the same
+order, as the Express handler, so results match the endpoint to the cent.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Porcentajes por defecto del endpoint
+PORCENTAJE_ITBIS = 18
+PORCENTAJE_IVA = 18
+PORCENTAJE_RETENCION = 10
+
+ERROR_SUBTOTAL = "Subtotal requerido y debe ser un número"
+
+# Los mismos tipos que sirve GET /api/calculadora/tipos
+TIPOS_CALCULO = [
+    {"id": "itbis", "nombre": "ITBIS",
+     "descripcion": "Impuesto sobre Transferencias de Bienes Industrializados y Servicios", "porcentaje": 18},
+    {"id": "iva", "nombre": "IVA", "descripcion": "Impuesto al Valor Agregado", "porcentaje": 18},
+    {"id": "retencion", "nombre": "Retención", "descripcion": "Retención en la fuente", "porcentaje": 10},
+]
+
+
+def js_number(value: float) -> str:
+    """String(value) / JSON.stringify(value) as JavaScript prints a number"""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    if value == 0:
+        return "0"
+
+    sign = "-" if value < 0 else ""
+    # repr() ya da la representación más corta que conserva el valor, igual que JS
+    _, digit_tuple, exponent = Decimal(repr(abs(value))).normalize().as_tuple()
+    digits = "".join(map(str, digit_tuple))
+    k = len(digits)
+    n = k + exponent
+
+    if k <= n <= 21:
+        text = digits + "0" * (n - k)
+    elif 0 < n <= 21:
+        text = digits[:n] + "." + digits[n:]
+    elif -6 < n <= 0:
+        text = "0." + "0" * (-n) + digits
+    else:
+        mantissa = digits[0] + ("." + digits[1:] if k > 1 else "")
+        text = f"{mantissa}e{'+' if n - 1 >= 0 else '-'}{abs(n - 1)}"
+    return sign + text
+
+
+def js_json(value: Any) -> str:
+    """JSON.stringify(value): numbers printed as JavaScript does, non-finite ones as null"""
+    if isinstance(value, dict):
+        return "{" + ",".join(json.dumps(str(k), ensure_ascii=False) + ":" + js_json(v) for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(js_json(v) for v in value) + "]"
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (int, float, np.number)):
+        value = float(value)
+        return js_number(value) if math.isfinite(value) else "null"
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def to_fixed(value: float, digits: int = 2) -> str:
+    """Number.prototype.toFixed: exact binary value, ties rounded away from zero"""
+    if math.isnan(value) or abs(value) >= 1e21:
+        return js_number(value)
+    if value == 0:
+        value = 0.0  # (-0).toFixed(2) === "0.00"
+    quantum = Decimal(1).scaleb(-digits)
+    return f"{Decimal(value).quantize(quantum, rounding=ROUND_HALF_UP):f}"
+
+
+@dataclass
+class CalculoLote:
+    """Column-oriented results for a batch of calculations"""
+
+    subtotal: np.ndarray
+    itbis: np.ndarray
+    iva: np.ndarray
+    retencion: np.ndarray
+    total: np.ndarray
+    valido: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.subtotal)
+
+    def calculo(self, i: int) -> Dict[str, Any]:
+        """The ``calculo`` object returned by the endpoint for row i"""
+        return {
+            "subtotal": float(self.subtotal[i]),
+            "impuestos": {
+                "itbis": float(self.itbis[i]),
+                "iva": float(self.iva[i]),
+                "retencion": float(self.retencion[i]),
+            },
+            "total": float(self.total[i]),
+        }
+
+    def detalles(self, i: int) -> Dict[str, str]:
+        """The ``detalles`` object (toFixed(2) strings) for row i"""
+        return {
+            "subtotal": to_fixed(float(self.subtotal[i])),
+            "itbis": to_fixed(float(self.itbis[i])),
+            "iva": to_fixed(float(self.iva[i])),
+            "retencion": to_fixed(float(self.retencion[i])),
+            "total": to_fixed(float(self.total[i])),
+        }
+
+    def resultado(self, i: int) -> Dict[str, Any]:
+        """Full endpoint response body for row i (or its 400 error body)"""
+        if not self.valido[i]:
+            return {"error": ERROR_SUBTOTAL}
+        return {"calculo": self.calculo(i), "detalles": self.detalles(i)}
+
+    def resultados(self) -> List[Dict[str, Any]]:
+        return [self.resultado(i) for i in range(len(self))]
+
+    def totales(self) -> Dict[str, float]:
+        """Column sums over the valid rows"""
+        mask = self.valido
+        return {
+            "subtotal": float(self.subtotal[mask].sum()),
+            "itbis": float(self.itbis[mask].sum()),
+            "iva": float(self.iva[mask].sum()),
+            "retencion": float(self.retencion[mask].sum()),
+            "total": float(self.total[mask].sum()),
+        }
+
+
+def calcular_lote(subtotal, aplicar_itbis=True, aplicar_iva=False, aplicar_retencion=False,
+                  porcentaje_itbis=PORCENTAJE_ITBIS, porcentaje_iva=PORCENTAJE_IVA,
+                  porcentaje_retencion=PORCENTAJE_RETENCION) -> CalculoLote:
+    """Evaluate /calcular for every row.
+
+    Flags and percentages may be scalars (applied to every row) or arrays
+    broadcastable against ``subtotal``.
+    """
+    subtotal = np.asarray(subtotal, dtype=np.float64)
+    shape = subtotal.shape
+
+    def column(value, dtype):
+        return np.broadcast_to(np.asarray(value, dtype=dtype), shape)
+
+    aplicar_itbis = column(aplicar_itbis, bool)
+    aplicar_iva = column(aplicar_iva, bool)
+    aplicar_retencion = column(aplicar_retencion, bool)
+
+    # Mismo orden de operaciones que el handler: subtotal * (porcentaje / 100)
+    itbis = np.where(aplicar_itbis, subtotal * (column(porcentaje_itbis, np.float64) / 100), 0.0)
+    iva = np.where(aplicar_iva, subtotal * (column(porcentaje_iva, np.float64) / 100), 0.0)
+    retencion = np.where(aplicar_retencion, subtotal * (column(porcentaje_retencion, np.float64) / 100), 0.0)
+
+    # `iva || 0` y `retencion || 0`: NaN cuenta como 0 en JavaScript
+    total = subtotal + itbis + np.nan_to_num(iva, nan=0.0) - np.nan_to_num(retencion, nan=0.0)
+
+    # `!subtotal`: 0 y NaN se rechazan con 400
+    valido = (subtotal != 0) & ~np.isnan(subtotal)
+
+    return CalculoLote(subtotal=subtotal, itbis=itbis, iva=iva, retencion=retencion,
+                       total=total, valido=valido)
+
+
+# StringNumericLiteral de ECMAScript: decimal con signo, Infinity, o entero hex/octal/binario sin signo
+_DECIMAL_JS = re.compile(r"[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+_ENTERO_JS = re.compile(r"0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+")
+
+
+def js_string(value: Any) -> str:
+    """String(value) for a JSON value"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return js_number(js_to_number(value))
+    if isinstance(value, list):
+        # Array.prototype.join: null y undefined se unen como cadena vacía
+        return ",".join("" if v is None else js_string(v) for v in value)
+    if isinstance(value, dict):
+        return "[object Object]"
+    return str(value)
+
+
+def js_to_number(value: Any) -> float:
+    """Number(value) for a JSON value: null -> 0, "" -> 0, " 12 " -> 12, "0x10" -> 16, [5] -> 5,
+    "abc" / {} / [1, 2] -> NaN"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        try:
+            return float(value)
+        except OverflowError:
+            return math.inf if value > 0 else -math.inf
+    if isinstance(value, dict):
+        return math.nan
+    text = js_string(value).strip().strip("\ufeff")
+    if not text:
+        return 0.0
+    if _ENTERO_JS.fullmatch(text):
+        try:
+            return float(int(text, 0))
+        except OverflowError:
+            return math.inf
+    if _DECIMAL_JS.fullmatch(text):
+        # float() ya da inf fuera de rango, igual que JavaScript
+        return float(text.replace("Infinity", "inf"))
+    return math.nan
+
+
+def js_truthy(value: Any) -> bool:
+    """Boolean(value): [] and {} are true, NaN is false"""
+    if isinstance(value, (list, dict)):
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    return bool(value)
+
+
+def _es_numero(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _porcentaje(body: Dict[str, Any], key: str, default: float) -> float:
+    # El valor por defecto solo aplica cuando la clave no viene (undefined); `porcentaje / 100` usa Number()
+    if key not in body:
+        return float(default)
+    return js_to_number(body[key])
+
+
+def normalizar_solicitud(body: Any) -> Tuple[float, bool, bool, bool, float, float, float]:
+    """(subtotal, aplicarITBIS, aplicarIVA, aplicarRetencion, porcentajeITBIS, porcentajeIVA,
+    porcentajeRetencion) as the handler sees them: defaults filled in, values coerced like JavaScript.
+    subtotal is NaN when the body is not a number (the endpoint answers 400 when it is NaN or 0)"""
+    if not isinstance(body, dict):
+        body = {}
+    subtotal = body.get("subtotal")
+    # js_to_number y no float(): un entero JSON fuera de rango es ±Infinity, como en JavaScript
+    return (js_to_number(subtotal) if _es_numero(subtotal) else math.nan,
+            js_truthy(body.get("aplicarITBIS", True)),
+            js_truthy(body.get("aplicarIVA", False)),
+            js_truthy(body.get("aplicarRetencion", False)),
+            _porcentaje(body, "porcentajeITBIS", PORCENTAJE_ITBIS),
+            _porcentaje(body, "porcentajeIVA", PORCENTAJE_IVA),
+            _porcentaje(body, "porcentajeRetencion", PORCENTAJE_RETENCION))
+
+
+def calcular_solicitudes(bodies: Iterable[Dict[str, Any]]) -> CalculoLote:
+    """Evaluate a list of /calcular JSON request bodies in one batch"""
+    filas = [normalizar_solicitud(b) for b in bodies]
+    if not filas:
+        return calcular_lote(np.empty(0))
+    subtotal, itbis, iva, retencion, p_itbis, p_iva, p_retencion = zip(*filas)
+    return calcular_lote(np.array(subtotal, dtype=np.float64), itbis, iva, retencion, p_itbis, p_iva, p_retencion)
+
+
+def calcular(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Single-request equivalent of the endpoint; raises ValueError where it answers 400"""
+    subtotal = body.get("subtotal")
+    if not _es_numero(subtotal) or not subtotal or math.isnan(js_to_number(subtotal)):
+        raise ValueError(ERROR_SUBTOTAL)
+    return calcular_solicitudes([body]).resultado(0)
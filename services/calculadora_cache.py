@@ -0,0 +1,95 @@
+"""
+Memoized POST /api/calculadora/calcular
+
+Calculator traffic is mostly the UI's quick buttons repeating the same
+subtotal / percentage / aplicar* combinations. Each request body is
+normalized to the tuple the Express handler actually computes from
+(defaults filled in, values coerced as JavaScript would), and the
+response for that tuple, status plus body already serialized as
+res.json() would send it, is kept in a bounded LRU cache with a TTL. A
+repeated request is answered without recomputing or re-serializing.
+
+    service = CalculadoraCache(maxsize=10_000, ttl=3600)
+    status, body = service.responder({"subtotal": 1000, "aplicarIVA": True})
+    service.stats()  # hits, misses, hit_ratio, ...
+"""
+
+import math
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from services.cache import LRUCache
+from services.calculadora import ERROR_SUBTOTAL, TIPOS_CALCULO, calcular_lote, js_json, normalizar_solicitud
+from services.http import App, Request, Response, error_response, json_response
+
+DEFAULT_MAXSIZE = int(os.getenv("CALC_CACHE_SIZE", "10000"))
+DEFAULT_TTL = float(os.getenv("CALC_CACHE_TTL", "3600"))
+
+# (subtotal, aplicarITBIS, aplicarIVA, aplicarRetencion, porcentajeITBIS, porcentajeIVA, porcentajeRetencion)
+Clave = Tuple[float, bool, bool, bool, float, float, float]
+
+_INVALIDA = ("invalida",)
+
+
+def normalizar(body: Any) -> Optional[Clave]:
+    """The inputs the handler computes from, or None when it answers 400"""
+    clave = normalizar_solicitud(body)
+    # `!subtotal || typeof subtotal !== 'number'`: NaN marca un subtotal que no es número
+    if not clave[0] or math.isnan(clave[0]):
+        return None
+    return clave
+
+
+def calcular_respuesta(clave: Optional[Clave]) -> Tuple[int, bytes]:
+    """(status, serialized body) the endpoint sends for a normalized request"""
+    if clave is None:
+        return 400, js_json({"error": ERROR_SUBTOTAL}).encode("utf-8")
+    subtotal, itbis, iva, retencion, p_itbis, p_iva, p_retencion = clave
+    lote = calcular_lote([subtotal], itbis, iva, retencion, p_itbis, p_iva, p_retencion)
+    return 200, js_json(lote.resultado(0)).encode("utf-8")
+
+
+class CalculadoraCache:
+    """/calcular responses memoized by normalized inputs"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: Optional[float] = DEFAULT_TTL, historial=None):
+        self.cache = LRUCache(maxsize, ttl)
+        # services.historial.HistorialCalculos opcional: cada cálculo respondido se registra
+        self.historial = historial
+
+    def responder(self, body: Any) -> Tuple[int, bytes]:
+        clave = normalizar(body)
+        if clave is not None and self.historial is not None:
+            self.historial.registrar(clave)
+        # NaN != NaN: una clave con NaN nunca se encontraría, así que no se guarda
+        if clave is not None and any(math.isnan(v) for v in clave[4:]):
+            return calcular_respuesta(clave)
+        key = _INVALIDA if clave is None else clave
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = calcular_respuesta(clave)
+            self.cache.put(key, cached)
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def register_routes(app: App, service: CalculadoraCache) -> None:
+    @app.route("POST", "/api/calculadora/calcular")
+    def calcular(request: Request):
+        try:
+            body = request.json()
+        except ValueError:
+            return error_response("JSON inválido", 400)
+        status, data = service.responder(body)
+        return Response(data, status, [("Content-Type", "application/json; charset=utf-8"),
+                                       ("Content-Length", str(len(data)))])
+
+    @app.route("GET", "/api/calculadora/tipos")
+    def tipos(request: Request):
+        return json_response(TIPOS_CALCULO)
+
+    @app.route("GET", "/api/calculadora/cache")
+    def cache_stats(request: Request):
+        return json_response(service.stats())
@@ -0,0 +1,109 @@
+"""
+Contact form routes over the local store
+
+Python counterpart of backend/src/routes/contacto.ts with the same
+validation, messages and status codes. With a database.contact_queue
+ContactQueue, POST /api/contacto/enviar appends to the write-behind queue
+and answers 202 (503 with Retry-After while the queue is full) instead of
+writing to the local store, and the GET routes read the contactos table
+the queue flushes into. The 202 body's contacto carries id_cola and
+"id": null: the database assigns the id when the queue flushes, within
+about flush_interval, and the contact is listed from then on.
+
+    app = App()
+    register_routes(app, LocalStore())
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from database import validation as validacion
+from services.http import App, Request, error_response, json_response
+from services.local_store import LocalStore, now_iso
+
+
+def validar_contacto(body: Any) -> Tuple[Dict[str, Any], str]:
+    """(row to insert, error message); the message is empty when the body is valid"""
+    body = body if isinstance(body, dict) else {}
+    # Mismas reglas y mensajes que el resto del proyecto (database.validation)
+    error = validacion.validar_contacto(body)
+    if error:
+        return {}, error
+    return {"nombre": body["nombre"], "email": body["email"], "telefono": body.get("telefono") or None,
+            "mensaje": body["mensaje"], "fecha_creacion": now_iso()}, ""
+
+
+def register_routes(app: App, store: LocalStore, cola: Optional[Any] = None) -> None:
+    @app.route("POST", "/api/contacto/enviar")
+    def enviar(request: Request):
+        try:
+            body = request.json()
+        except ValueError:
+            return error_response("JSON inválido", 400)
+        if cola is not None:
+            from database.contact_queue import ColaLlena
+            # encolar valida con las mismas reglas; la fecha la pone el servidor, no el cliente
+            body = body if isinstance(body, dict) else {}
+            try:
+                row = cola.encolar({**body, "fecha_creacion": now_iso()})
+            except ValueError as e:
+                return error_response(str(e), 400)
+            except ColaLlena as e:
+                return json_response({"error": "Servicio ocupado, intente de nuevo"}, 503,
+                                     [("Retry-After", str(e.retry_after))])
+            return json_response({"message": "Mensaje enviado exitosamente", "contacto": {"id": None, **row}}, 202)
+        row, error = validar_contacto(body)
+        if error:
+            return error_response(error, 400)
+        result = store.from_("contactos").insert([row])
+        if result.error:
+            raise RuntimeError(result.error["message"])
+        return json_response({"message": "Mensaje enviado exitosamente", "contacto": result.data[0]}, 201)
+
+    if cola is not None:
+        _register_sql_reads(app, cola.session_factory)
+        return
+
+    @app.route("GET", "/api/contacto")
+    def listar(request: Request):
+        result = store.from_("contactos").select("*").order("fecha_creacion", ascending=False)
+        if result.error:
+            raise RuntimeError(result.error["message"])
+        return json_response(result.data)
+
+    @app.route("GET", "/api/contacto/:id")
+    def obtener(request: Request, id: str):
+        result = store.from_("contactos").select("*").eq("id", id).single()
+        if result.error or not result.data:
+            return error_response("Contacto no encontrado", 404)
+        return json_response(result.data)
+
+
+def _fila_sql(contacto) -> Dict[str, Any]:
+    # Mismo formato que las filas del store: fecha UTC como new Date().toISOString()
+    row = {c.name: getattr(contacto, c.name) for c in contacto.__table__.columns}
+    row["fecha_creacion"] = row["fecha_creacion"].isoformat(timespec="milliseconds") + "Z"
+    return row
+
+
+def _register_sql_reads(app: App, session_factory) -> None:
+    """GET routes over the contactos table the write-behind queue flushes into"""
+    from sqlalchemy import select
+
+    from database.models import Contacto
+
+    @app.route("GET", "/api/contacto")
+    def listar(request: Request):
+        with session_factory() as session:
+            contactos = session.scalars(select(Contacto).order_by(Contacto.fecha_creacion.desc(),
+                                                                  Contacto.id.desc())).all()
+            return json_response([_fila_sql(c) for c in contactos])
+
+    @app.route("GET", "/api/contacto/:id")
+    def obtener(request: Request, id: str):
+        contacto = None
+        if id.isdigit():
+            with session_factory() as session:
+                contacto = session.get(Contacto, int(id))
+        if contacto is None:
+            return error_response("Contacto no encontrado", 404)
+        return json_response(_fila_sql(contacto))
@@ -0,0 +1,274 @@
+"""
+Invoice downloads: cached signed URLs and /uploads file serving
+
+GET /api/facturas/:id/download used to fetch the row and mint a new
+60-second signed URL on every call. Here an id -> ruta_storage index
+follows the facturas table (services.local_store listeners), and each
+signed URL is kept in an LRU until shortly before it expires, so a
+repeated download is answered from memory.
+
+GET /uploads/<ruta> replaces express.static: it checks the signature
+when one is given, answers If-None-Match / If-Modified-Since with 304,
+serves single byte ranges (206) from an mmap of the file, and sends
+whole files through wsgi.file_wrapper (sendfile on servers that
+support it). Content-addressed blobs get their SHA-256 as a strong ETag
+and are marked immutable, so neither needs reading the file.
+
+    descargas = Descargas(storage_dir).attach(store)
+    register_routes(app, descargas)
+"""
+
+import hashlib
+import hmac
+import mimetypes
+import mmap
+import os
+import re
+import secrets
+import stat
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from services.blob_store import BLOB_DIR, DEFAULT_STORAGE_DIR
+from services.cache import LRUCache
+from services.http import App, Request, Response, error_response, json_response
+from services.local_store import LocalStore, Table
+
+DEFAULT_URL_TTL = int(os.getenv("DOWNLOAD_URL_TTL", "60"))  # segundos, como createSignedUrl(ruta, 60)
+DEFAULT_URL_MARGIN = int(os.getenv("DOWNLOAD_URL_MARGIN", "10"))
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
+BLOQUE = 256 * 1024
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_ESTATICO = "public, max-age=0"  # lo que envía express.static por defecto
+
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+_RANGO = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class FirmaURL:
+    """HMAC-SHA256 signatures over (ruta, expires)"""
+
+    def __init__(self, clave: Optional[bytes] = None):
+        # Sin clave configurada las URL firmadas solo valen para este proceso
+        self.clave = clave or os.getenv("DOWNLOAD_SIGNING_KEY", "").encode() or secrets.token_bytes(32)
+
+    def token(self, ruta: str, expires: int) -> str:
+        return hmac.new(self.clave, f"{ruta}\n{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def firmar(self, ruta: str, ttl: int) -> Tuple[str, int]:
+        """(/uploads URL with expires and token, expiry as epoch seconds)"""
+        expires = int(time.time()) + ttl
+        return f"/uploads/{quote(ruta)}?expires={expires}&token={self.token(ruta, expires)}", expires
+
+    def verificar(self, ruta: str, expires: Optional[str], token: Optional[str]) -> bool:
+        if not expires or not token or not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(self.token(ruta, int(expires)), token)
+
+
+def parse_rango(valor: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single 'bytes=' range, None to ignore the header;
+    ValueError when the range cannot be satisfied"""
+    match = _RANGO.fullmatch(valor.strip())
+    if match is None:
+        # Varios rangos o unidades desconocidas: se responde el archivo completo
+        return None
+    inicio, fin = match.groups()
+    if not inicio:
+        if not fin:
+            return None
+        sufijo = int(fin)
+        if sufijo == 0 or size == 0:
+            raise ValueError("Rango no satisfacible")
+        return max(size - sufijo, 0), size - 1
+    inicio = int(inicio)
+    fin = min(int(fin), size - 1) if fin else size - 1
+    if inicio >= size or fin < inicio:
+        raise ValueError("Rango no satisfacible")
+    return inicio, fin
+
+
+def _trozos(f, inicio: int, fin: int) -> Iterator[bytes]:
+    """Bytes inicio..fin (inclusive) of an open file, sliced from an mmap; closes the file"""
+    try:
+        if fin >= inicio:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for pos in range(inicio, fin + 1, BLOQUE):
+                    yield mm[pos:min(pos + BLOQUE, fin + 1)]
+    finally:
+        f.close()
+
+
+class Descargas:
+    """Signed-URL cache plus id -> storage path index over the facturas table"""
+
+    def __init__(self, storage_dir: str = DEFAULT_STORAGE_DIR, firma: Optional[FirmaURL] = None,
+                 ttl: int = DEFAULT_URL_TTL, margen: int = DEFAULT_URL_MARGIN, base_url: str = PUBLIC_BASE_URL,
+                 maxsize: int = 100_000, exigir_firma: bool = False):
+        if ttl <= margen:
+            raise ValueError("ttl must be greater than margen")
+        self.root = storage_dir
+        self.firma = firma or FirmaURL()
+        self.ttl = ttl
+        self.base_url = base_url.rstrip("/")
+        # Una URL se reutiliza hasta `margen` segundos antes de caducar
+        self.urls = LRUCache(maxsize, ttl - margen)
+        # express.static sirve /uploads sin firma; exigir_firma lo cierra
+        self.exigir_firma = exigir_firma
+        self._rutas: Dict[Any, str] = {}
+        self._tipos: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"firmadas": 0, "servidas": 0, "parciales": 0, "no_modificadas": 0}
+
+    # --- índice -----------------------------------------------------------------
+
+    def aplicar(self, evento: str, row: Dict[str, Any]) -> None:
+        key = Table._key(row["id"])
+        with self._lock:
+            if evento == "delete":
+                self._rutas.pop(key, None)
+            elif row.get("ruta_storage"):
+                self._rutas[key] = row["ruta_storage"]
+                if row.get("tipo_archivo"):
+                    self._tipos[row["ruta_storage"]] = row["tipo_archivo"]
+        if evento != "insert":
+            # La ruta pudo cambiar o desaparecer: la URL firmada ya no sirve
+            self.urls.pop(key)
+
+    def attach(self, store: LocalStore) -> "Descargas":
+        """Load the current rows once, then follow every write"""
+        table = store.table("facturas")
+        with table.lock:
+            for row in list(table.records.values()):
+                self.aplicar("insert", row)
+            store.subscribe("facturas", self.aplicar)
+        return self
+
+    def url(self, id: Any) -> Optional[str]:
+        """Signed download URL for a factura id, None when there is no such factura"""
+        key = Table._key(id)
+        url = self.urls.get(key)
+        if url is not None:
+            return url
+        with self._lock:
+            ruta = self._rutas.get(key)
+        if ruta is None:
+            return None
+        url, _ = self.firma.firmar(ruta, self.ttl)
+        url = self.base_url + url
+        self.urls.put(key, url)
+        self.stats["firmadas"] += 1
+        return url
+
+    # --- archivos ---------------------------------------------------------------
+
+    def _path(self, ruta: str) -> Optional[str]:
+        partes = ruta.split("/")
+        # Sin syscalls: basta con rechazar segmentos que salgan de la carpeta
+        if any(p in ("", ".", "..") or "\\" in p or "\0" in p for p in partes):
+            return None
+        return os.path.join(self.root, *partes)
+
+    @staticmethod
+    def _etag(ruta: str, st: os.stat_result) -> Tuple[str, bool]:
+        """(ETag, immutable): blobs are named by their SHA-256; other files use express' W/"size-mtime" """
+        nombre = ruta.rsplit("/", 1)[-1]
+        if ruta.startswith(BLOB_DIR + "/") and _SHA256.fullmatch(nombre):
+            return f'"{nombre}"', True
+        return f'W/"{st.st_size:x}-{int(st.st_mtime * 1000):x}"', False
+
+    @staticmethod
+    def _no_modificado(request: Request, etag: str, mtime: float) -> bool:
+        if_none_match = request.header("If-None-Match")
+        if if_none_match is not None:
+            etiquetas = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+            return "*" in etiquetas or etag.removeprefix("W/") in etiquetas
+        if_modified_since = request.header("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def servir(self, request: Request, ruta: str) -> Response:
+        # PATH_INFO llega decodificado como latin-1 (PEP 3333)
+        ruta = ruta.encode("latin-1").decode("utf-8", "replace")
+        query = request.query
+        if (self.exigir_firma or "token" in query) and not self.firma.verificar(
+                ruta, query.get("expires"), query.get("token")):
+            return error_response("URL de descarga inválida o expirada", 403)
+        path = self._path(ruta)
+        try:
+            if path is None:
+                raise FileNotFoundError(ruta)
+            f = open(path, "rb")
+        except OSError:
+            return error_response("Archivo no encontrado", 404)
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            f.close()
+            return error_response("Archivo no encontrado", 404)
+
+        etag, inmutable = self._etag(ruta, st)
+        ultima_modificacion = formatdate(st.st_mtime, usegmt=True)
+        headers = [
+            ("ETag", etag),
+            ("Last-Modified", ultima_modificacion),
+            ("Cache-Control", CACHE_INMUTABLE if inmutable else CACHE_ESTATICO),
+            ("Accept-Ranges", "bytes"),
+        ]
+        if self._no_modificado(request, etag, st.st_mtime):
+            f.close()
+            self.stats["no_modificadas"] += 1
+            return Response(b"", 304, headers)
+
+        headers.append(("Content-Type", self._tipos.get(ruta) or mimetypes.guess_type(ruta)[0]
+                        or "application/octet-stream"))
+        size = st.st_size
+        rango = None
+        # If-Range: el rango solo vale si el cliente tiene la misma versión del archivo
+        if_range = request.header("If-Range")
+        if request.header("Range") and (if_range is None or if_range in (etag, ultima_modificacion)):
+            try:
+                rango = parse_rango(request.header("Range"), size)
+            except ValueError:
+                f.close()
+                return Response(b"", 416, [("Content-Range", f"bytes */{size}")] + headers[:4])
+
+        if request.method == "HEAD":
+            f.close()
+            body, status, length = b"", 200, size
+        elif rango is not None:
+            inicio, fin = rango
+            body, status, length = _trozos(f, inicio, fin), 206, fin - inicio + 1
+            headers.append(("Content-Range", f"bytes {inicio}-{fin}/{size}"))
+            self.stats["parciales"] += 1
+        else:
+            file_wrapper = request.environ.get("wsgi.file_wrapper")
+            body = file_wrapper(f, BLOQUE) if file_wrapper else _trozos(f, 0, size - 1)
+            status, length = 200, size
+        self.stats["servidas"] += 1
+        headers.append(("Content-Length", str(length)))
+        return Response(body, status, headers)
+
+
+def register_routes(app: App, descargas: Descargas) -> None:
+    @app.route("GET", "/api/facturas/:id/download")
+    def descargar(request: Request, id: str):
+        url = descargas.url(id)
+        if url is None:
+            return error_response("Factura no encontrada", 404)
+        return json_response({"downloadUrl": url})
+
+    @app.route("GET", "/uploads/*ruta")
+    def archivo(request: Request, ruta: str):
+        return descargas.servir(request, ruta)
+
+    @app.route("HEAD", "/uploads/*ruta")
+    def archivo_head(request: Request, ruta: str):
+        return descargas.servir(request, ruta)
@@ -0,0 +1,78 @@
+"""
+DGII routes: RNC lookup and validation
+
+Python counterpart of backend/src/routes/dgii.ts. consultar-rnc answers
+from the indexed registry (services.rnc_store) when one is given and
+falls back to the same two simulated taxpayers as the Express handler.
+
+    app = App()
+    register_routes(app, RNCStore("rnc_registro.sqlite3"))
+"""
+
+from typing import Any, Dict, Optional
+
+from services.http import App, Request, error_response, json_response
+from services.local_store import now_iso
+from services.rnc import limpiar_rnc, validar_rnc
+from services.rnc_store import REGISTROS_EJEMPLO
+
+# Los dos contribuyentes de consultarRNCSimulado, indexados por RNC limpio
+SIMULADOS = {limpiar_rnc(registro["rnc"]): registro for registro in REGISTROS_EJEMPLO}
+
+CATEGORIAS = [
+    {"id": "normal", "nombre": "Contribuyente Normal",
+     "descripcion": "Contribuyentes con ingresos anuales menores a RD$7,000,000"},
+    {"id": "gran_contribuyente", "nombre": "Gran Contribuyente",
+     "descripcion": "Contribuyentes con ingresos anuales mayores a RD$7,000,000"},
+    {"id": "regimen_simplificado", "nombre": "Régimen Simplificado",
+     "descripcion": "Pequeños contribuyentes con ingresos anuales hasta RD$500,000"},
+    {"id": "no_residente", "nombre": "No Residente",
+     "descripcion": "Contribuyentes no residentes en territorio dominicano"},
+]
+
+REGIMENES = [
+    {"id": "ordinario", "nombre": "Régimen Ordinario", "descripcion": "Régimen tributario general"},
+    {"id": "especial", "nombre": "Régimen Especial", "descripcion": "Régimen para grandes contribuyentes"},
+    {"id": "simplificado", "nombre": "Régimen Simplificado", "descripcion": "Régimen para pequeños contribuyentes"},
+]
+
+
+def consultar_rnc(rnc: str, rnc_store=None) -> Optional[Dict[str, Any]]:
+    """RNCData for a valid rnc from the registry or the simulated set, None when not found"""
+    if rnc_store is not None:
+        data = rnc_store.consultar(rnc)
+        if data is not None:
+            return data
+    simulado = SIMULADOS.get(limpiar_rnc(rnc))
+    return dict(simulado, ultima_actualizacion=now_iso()) if simulado else None
+
+
+def register_routes(app: App, rnc_store=None) -> None:
+    @app.route("POST", "/api/dgii/consultar-rnc")
+    def consultar(request: Request):
+        try:
+            body = request.json()
+        except ValueError:
+            return error_response("JSON inválido", 400)
+        rnc = body.get("rnc") if isinstance(body, dict) else None
+        if not rnc:
+            return error_response("RNC es requerido", 400)
+        if not isinstance(rnc, str) or not validar_rnc(rnc):
+            return error_response("RNC inválido", 400)
+        data = consultar_rnc(rnc, rnc_store)
+        if data is None:
+            return error_response("RNC no encontrado", 404)
+        return json_response({"success": True, "data": data, "mensaje": "RNC consultado exitosamente"})
+
+    @app.route("GET", "/api/dgii/validar-rnc/:rnc")
+    def validar(request: Request, rnc: str):
+        valido = validar_rnc(rnc)
+        return json_response({"rnc": rnc, "valido": valido, "mensaje": "RNC válido" if valido else "RNC inválido"})
+
+    @app.route("GET", "/api/dgii/categorias")
+    def categorias(request: Request):
+        return json_response(CATEGORIAS)
+
+    @app.route("GET", "/api/dgii/regimenes")
+    def regimenes(request: Request):
+        return json_response(REGIMENES)
@@ -0,0 +1,380 @@
+"""
+Background text extraction for uploaded facturas
+
+New facturas rows are picked up from the local store (insert listener) and
+their files are processed in a process pool sized to the cores: text is
+pulled from the PDF (pypdf when installed, otherwise a built-in parser for
+Tj/TJ text operators in plain or Flate streams), the RNC and the
+subtotal/ITBIS/total amounts are located, and the subtotal is run through
+the same tax calculation as /api/calculadora/calcular. Results are written
+back on the row as `extraccion` with `extraccion_estado`.
+
+The upload path only enqueues an id (never blocks): when the queue is full
+the row stays without estado and is picked up by the next sweep. At most
+max_in_flight files are inside the pool at once, and failures are retried
+with exponential backoff before the row is marked "fallida".
+
+    python -m services.extraccion run            # process pending rows and exit
+    python -m services.extraccion archivo x.pdf  # extract one file
+"""
+
+import argparse
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, Optional
+
+from services.blob_store import DEFAULT_STORAGE_DIR
+from services.calculadora import calcular
+from services.local_store import LocalStore
+from services.rnc import limpiar_rnc, validar_rnc
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+MAX_TEXTO = 20_000
+
+PENDIENTE, COMPLETADA, FALLIDA = "pendiente", "completada", "fallida"
+
+# --- extracción de texto --------------------------------------------------------
+
+_INICIO_STREAM = re.compile(rb"stream(?:\r\n|\n)")
+_LONGITUD = re.compile(rb"/Length\s+(\d+)(?!\s+\d+\s+R)")
+# Cadena literal: admite un nivel de paréntesis balanceados sin escapar
+_LITERAL = rb"\(((?:[^()\\]|\\.|\((?:[^()\\]|\\.)*\))*)\)"
+_OPERADOR = re.compile(
+    rb"\[((?:[^\]\\(]|\\.|" + _LITERAL + rb")*)\]\s*TJ"
+    rb"|" + _LITERAL + rb"\s*(?:Tj|'|\")"
+    rb"|(T\*|Td|TD|ET)(?![A-Za-z])",
+    re.S,
+)
+_CADENA = re.compile(_LITERAL, re.S)
+_ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|[\s\S])")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _unescape(raw: bytes) -> bytes:
+    def replace(match):
+        value = match.group(1)
+        if value[:1].isdigit():
+            return bytes([int(value, 8) & 0xFF])
+        if value in (b"\n", b"\r", b"\r\n"):
+            return b""  # continuación de línea
+        return _ESCAPES.get(value, value)
+    return _ESCAPE.sub(replace, raw)
+
+
+def _texto_stream(data: bytes) -> str:
+    parts = []
+    for match in _OPERADOR.finditer(data):
+        array, _, single, salto = match.groups()
+        if salto is not None:
+            parts.append("\n")
+        elif single is not None:
+            parts.append(_unescape(single).decode("latin-1"))
+        else:
+            parts.append("".join(_unescape(s).decode("latin-1") for s in _CADENA.findall(array)))
+    return "".join(parts)
+
+
+def _streams(data: bytes) -> Iterator[bytes]:
+    pos = 0
+    while True:
+        match = _INICIO_STREAM.search(data, pos)
+        if match is None:
+            return
+        pos = match.end()
+        if data[max(0, match.start() - 3):match.start()] == b"end":
+            continue
+        start, end = match.end(), None
+        # /Length directo del diccionario del stream; si es una referencia se busca endstream
+        longitudes = _LONGITUD.findall(data, max(0, match.start() - 512), match.start())
+        if longitudes:
+            n = int(longitudes[-1])
+            if data[start + n:start + n + 12].lstrip().startswith(b"endstream"):
+                end = start + n
+        if end is None:
+            end = data.find(b"endstream", start)
+            if end < 0:
+                return
+            if data[end - 2:end] == b"\r\n":
+                end -= 2
+            elif data[end - 1:end] in (b"\n", b"\r"):
+                end -= 1
+        pos = end
+        yield data[start:end]
+
+
+def texto_pdf_basico(data: bytes) -> str:
+    """Text from Tj/TJ operators in the content streams (no fonts/CMaps)"""
+    textos = []
+    for contenido in _streams(data):
+        try:
+            contenido = zlib.decompress(contenido)
+        except zlib.error:
+            pass
+        if b"BT" in contenido:
+            textos.append(_texto_stream(contenido))
+    return "\n".join(t.strip() for t in textos if t.strip())
+
+
+def texto_pdf(path: str) -> str:
+    if pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(path)
+            return "\n".join(page.extract_text() or "" for page in reader.pages)
+        except Exception:
+            pass  # PDF que pypdf no acepta: se intenta el lector básico
+    with open(path, "rb") as f:
+        return texto_pdf_basico(f.read())
+
+
+# --- datos de la factura --------------------------------------------------------
+
+_RNC_ETIQUETADO = re.compile(r"R\.?\s*N\.?\s*C\.?\s*[:#.\-]?\s*(\d[\d\s-]{7,12}\d)", re.I)
+_RNC_SUELTO = re.compile(r"(?<![\d-])(\d{3}-?\d{5}-?\d|\d{9})(?![\d-])")
+_MONTO = r"(?:RD\s*\$|\$)?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)"
+_PORCENTAJE = r"(?:\s*\(?\s*\d{1,2}(?:\.\d+)?\s*%\s*\)?)?"
+_ETIQUETAS = {
+    "subtotal": re.compile(r"sub\s*-?\s*total" + _PORCENTAJE + r"\s*[:=]?\s*" + _MONTO, re.I),
+    "itbis": re.compile(r"itbis" + _PORCENTAJE + r"\s*[:=]?\s*" + _MONTO, re.I),
+    "total": re.compile(r"(?<![a-z])(?<!sub)(?<!sub )(?<!sub-)total(?:\s+a\s+pagar|\s+general)?\s*[:=]?\s*"
+                        + _MONTO, re.I),
+}
+
+
+def _monto(texto: str) -> float:
+    return float(texto.replace(",", ""))
+
+
+def extraer_datos(texto: str) -> Dict[str, Any]:
+    """RNC and subtotal/ITBIS/total amounts found in the invoice text"""
+    rnc = None
+    match = _RNC_ETIQUETADO.search(texto) or _RNC_SUELTO.search(texto)
+    if match:
+        rnc = limpiar_rnc(match.group(1))
+
+    montos = {}
+    for campo, patron in _ETIQUETAS.items():
+        encontrados = patron.findall(texto)
+        if encontrados:
+            # El total definitivo suele ser el último; subtotal e ITBIS, el primero
+            montos[campo] = _monto(encontrados[-1] if campo == "total" else encontrados[0])
+
+    datos: Dict[str, Any] = {"rnc": rnc, "rnc_valido": validar_rnc(rnc) if rnc else False, "montos": montos}
+    if montos.get("subtotal"):
+        datos["calculo"] = calcular({"subtotal": montos["subtotal"], "aplicarITBIS": True})
+    return datos
+
+
+def procesar_archivo(path: str, tipo_archivo: str) -> Dict[str, Any]:
+    """Worker entry point (runs in the process pool)"""
+    if tipo_archivo == "application/pdf":
+        texto = texto_pdf(path)
+    else:
+        # Imágenes: sin motor OCR instalado solo se registra que no hay texto
+        texto = ""
+    return {"texto": texto[:MAX_TEXTO], **extraer_datos(texto)}
+
+
+# --- pipeline -------------------------------------------------------------------
+
+
+class ExtractionPipeline:
+    """Feeds new facturas rows to a process pool with bounded in-flight work and retries"""
+
+    def __init__(self, store: LocalStore, storage_dir: str = DEFAULT_STORAGE_DIR,
+                 workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 queue_size: int = 10_000, max_retries: int = 3, retry_delay: float = 0.5,
+                 sweep_interval: float = 30.0):
+        self.store = store
+        self.storage_dir = storage_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sweep_interval = sweep_interval
+        self.queue: "queue.Queue[int]" = queue.Queue(maxsize=queue_size)
+        self.slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._en_curso = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.stats = {"encoladas": 0, "descartadas": 0, "completadas": 0, "fallidas": 0, "reintentos": 0,
+                      "pools_reiniciados": 0}
+
+    # --- entrada ---
+
+    def _on_change(self, evento: str, row: Dict[str, Any]) -> None:
+        if evento == "insert":
+            self.submit(row["id"])
+
+    def submit(self, id: int) -> bool:
+        """Enqueue without blocking; False when the queue is full (the sweep retries it later)"""
+        with self._lock:
+            if id in self._en_curso:
+                return True
+            try:
+                self.queue.put_nowait(id)
+            except queue.Full:
+                self.stats["descartadas"] += 1
+                return False
+            self._en_curso.add(id)
+            self.stats["encoladas"] += 1
+            return True
+
+    def pendientes(self):
+        return [id for id, row in list(self.store.table("facturas").records.items())
+                if row.get("extraccion_estado") in (None, PENDIENTE)]
+
+    def sweep(self) -> int:
+        return sum(self.submit(id) for id in self.pendientes())
+
+    # --- ciclo de vida ---
+
+    def start(self) -> "ExtractionPipeline":
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.store.subscribe("facturas", self._on_change)
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+        self.sweep()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        self.store.unsubscribe("facturas", self._on_change)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every enqueued row is done (completed or failed)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._en_curso:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    # --- despacho ---
+
+    def _dispatch(self) -> None:
+        last_sweep = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                id = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                if time.monotonic() - last_sweep >= self.sweep_interval:
+                    self.sweep()
+                    last_sweep = time.monotonic()
+                continue
+            # Backpressure: no se envía más trabajo al pool hasta que se libere un hueco
+            while not self.slots.acquire(timeout=0.2):
+                if self._stop.is_set():
+                    return
+            self._run(id, attempt=1)
+
+    def _run(self, id: int, attempt: int) -> None:
+        row = self.store.table("facturas").records.get(id)
+        if row is None or not row.get("ruta_storage"):
+            self._finish(id, {"extraccion_estado": FALLIDA, "extraccion_error": "Factura sin archivo"}, "fallidas")
+            return
+        path = os.path.join(self.storage_dir, *row["ruta_storage"].split("/"))
+        executor = self.executor
+        try:
+            future = executor.submit(procesar_archivo, path, row.get("tipo_archivo", ""))
+        except (BrokenProcessPool, RuntimeError) as e:
+            # Pool roto (un proceso murió) o cerrado por stop(): sin esto la fila y su hueco quedarían colgados
+            if self._stop.is_set():
+                self._abandonar(id)
+                return
+            self._reconstruir(executor)
+            self._finish(id, {"extraccion_estado": FALLIDA, "extraccion_error": str(e) or "Pool roto"}, "fallidas")
+            return
+        future.add_done_callback(lambda f: self._done(id, attempt, f, executor))
+
+    def _reconstruir(self, roto: ProcessPoolExecutor) -> None:
+        """Replace a broken pool (only once, whichever job notices first)"""
+        with self._lock:
+            if self.executor is not roto or self._stop.is_set():
+                return
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.stats["pools_reiniciados"] += 1
+        roto.shutdown(wait=False, cancel_futures=True)
+
+    def _abandonar(self, id: int) -> None:
+        # Se detiene el pipeline: la fila queda pendiente para el próximo barrido
+        self.slots.release()
+        with self._idle:
+            self._en_curso.discard(id)
+            self._idle.notify_all()
+
+    def _done(self, id: int, attempt: int, future, executor: ProcessPoolExecutor) -> None:
+        try:
+            resultado = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # El reintento va al pool nuevo, no al que murió
+                self._reconstruir(executor)
+            if attempt < self.max_retries and not self._stop.is_set():
+                self.stats["reintentos"] += 1
+                # El hueco del pool se conserva durante el reintento
+                timer = threading.Timer(self.retry_delay * 2 ** (attempt - 1), self._run, args=(id, attempt + 1))
+                timer.daemon = True
+                timer.start()
+                return
+            self._finish(id, {"extraccion_estado": FALLIDA, "extraccion_error": str(e)}, "fallidas")
+            return
+        self._finish(id, {"extraccion_estado": COMPLETADA, "extraccion": resultado}, "completadas")
+
+    def _finish(self, id: int, values: Dict[str, Any], stat: str) -> None:
+        self.store.from_("facturas").update(values).eq("id", id)
+        self.slots.release()
+        with self._idle:
+            self.stats[stat] += 1
+            self._en_curso.discard(id)
+            self._idle.notify_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invoice text extraction")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="process every pending facturas row and exit")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--data-dir", default=None)
+    run.add_argument("--storage-dir", default=DEFAULT_STORAGE_DIR)
+    archivo = sub.add_parser("archivo", help="extract one file and print the result")
+    archivo.add_argument("path")
+    archivo.add_argument("--tipo", default="application/pdf")
+    args = parser.parse_args()
+
+    if args.command == "archivo":
+        print(json.dumps(procesar_archivo(args.path, args.tipo), ensure_ascii=False, indent=2))
+        return 0
+
+    store = LocalStore(args.data_dir) if args.data_dir else LocalStore()
+    pipeline = ExtractionPipeline(store, args.storage_dir, workers=args.workers).start()
+    pipeline.join()
+    pipeline.stop()
+    store.close()
+    print(f"✅ {pipeline.stats['completadas']} completadas, {pipeline.stats['fallidas']} fallidas, "
+          f"{pipeline.stats['reintentos']} reintentos")
+    return 0 if not pipeline.stats["fallidas"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+Invoice listing route over the local store
+
+Python counterpart of GET /api/facturas in backend/src/routes/facturas.ts.
+POST /subir lives in services.uploads and GET /:id/download, with the
+/uploads file serving, in services.descargas.
+
+    app = App()
+    register_routes(app, LocalStore())
+"""
+
+from services.http import App, Request, json_response
+from services.local_store import LocalStore
+
+
+def register_routes(app: App, store: LocalStore) -> None:
+    @app.route("GET", "/api/facturas")
+    def listar(request: Request):
+        result = store.from_("facturas").select("*").order("subido_en", ascending=False)
+        if result.error:
+            raise RuntimeError(result.error["message"])
+        return json_response(result.data)
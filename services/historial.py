@@ -0,0 +1,275 @@
+"""
+Columnar calculation log ("historial de cálculos")
+
+Every /calcular request that gets a result is appended here. The request
+path only appends its normalized inputs (services.calculadora_cache) and
+a timestamp to an in-memory batch. A background thread computes the
+batch's amounts with the vectorized engine and appends each column to
+its own little-endian array file, partitioned by UTC day:
+
+    historial/2025-07-14/ts.i8   subtotal.f8   itbis.f8   ...
+
+A query reads just the columns it needs, memory-mapped, one partition at
+a time, so summing ITBIS by month over tens of millions of rows never
+loads the whole log. Partition sums are remembered until the partition
+grows.
+
+    historial = HistorialCalculos().start()
+    historial.registrar((1000.0, True, False, False, 18.0, 18.0, 10.0))
+    historial.sumar("itbis", por="mes", desde="2025-01")
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.calculadora import calcular_lote
+from services.http import App, Request, error_response, json_response
+from services.local_store import DEFAULT_DATA_DIR
+
+DEFAULT_HISTORIAL_DIR = os.getenv("HISTORIAL_DIR", os.path.join(DEFAULT_DATA_DIR, "historial"))
+
+# Columna -> tipo en disco; la extensión del archivo es el código del tipo
+COLUMNAS = {
+    "ts": np.dtype("<i8"),  # milisegundos desde epoch (UTC)
+    "subtotal": np.dtype("<f8"),
+    "itbis": np.dtype("<f8"),
+    "iva": np.dtype("<f8"),
+    "retencion": np.dtype("<f8"),
+    "total": np.dtype("<f8"),
+    "porcentaje_itbis": np.dtype("<f8"),
+    "porcentaje_iva": np.dtype("<f8"),
+    "porcentaje_retencion": np.dtype("<f8"),
+    "aplicar": np.dtype("u1"),  # bits: 1 ITBIS, 2 IVA, 4 retención
+}
+MONTOS = ("subtotal", "itbis", "iva", "retencion", "total")
+PERIODOS = {"dia": 10, "mes": 7, "anio": 4}
+MS_POR_DIA = 86_400_000
+
+
+def _archivo(columna: str) -> str:
+    return f"{columna}.{COLUMNAS[columna].kind}{COLUMNAS[columna].itemsize}"
+
+
+def _dia(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class HistorialCalculos:
+    """Day-partitioned column files fed by an in-memory batch"""
+
+    def __init__(self, root: str = DEFAULT_HISTORIAL_DIR, flush_rows: int = 10_000,
+                 flush_interval: float = 1.0, fsync: bool = False):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        os.makedirs(root, exist_ok=True)
+        for dia in self.particiones():
+            self._alinear(dia)
+        self._pendientes: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # (dia, columna) -> (filas, suma): válido mientras la partición no crezca
+        self._sumas: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self.stats = {"registradas": 0, "escritas": 0, "flushes": 0, "errores": 0}
+
+    # --- escritura --------------------------------------------------------------
+
+    def registrar(self, clave: Sequence, ts: Optional[float] = None) -> None:
+        """Queue one calculation (normalized inputs as in calculadora_cache.Clave); never blocks on disk"""
+        ms = int((time.time() if ts is None else ts) * 1000)
+        with self._lock:
+            self._pendientes.append((ms, *clave))
+            self.stats["registradas"] += 1
+            lleno = len(self._pendientes) >= self.flush_rows
+        if lleno:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Compute and append the pending batch; returns the rows written"""
+        with self._write_lock:
+            with self._lock:
+                pendientes, self._pendientes = self._pendientes, []
+            if not pendientes:
+                return 0
+            escritas = np.zeros(len(pendientes), dtype=bool)
+            try:
+                self._escribir(*(np.array(c) for c in zip(*pendientes)), escritas=escritas)
+            except Exception:
+                # Las filas de los días que no llegaron a disco vuelven al frente del lote
+                with self._lock:
+                    self._pendientes[:0] = [fila for fila, ok in zip(pendientes, escritas) if not ok]
+                    self.stats["errores"] += 1
+                raise
+            self.stats["flushes"] += 1
+            return len(pendientes)
+
+    def registrar_lote(self, ts_ms, subtotal, aplicar_itbis=True, aplicar_iva=False, aplicar_retencion=False,
+                       porcentaje_itbis=18.0, porcentaje_iva=18.0, porcentaje_retencion=10.0) -> int:
+        """Append a whole batch synchronously (imports and backfills); arguments broadcast like calcular_lote"""
+        ts_ms = np.asarray(ts_ms, dtype=np.int64)
+        columnas = np.broadcast_arrays(ts_ms, subtotal, aplicar_itbis, aplicar_iva, aplicar_retencion,
+                                       porcentaje_itbis, porcentaje_iva, porcentaje_retencion)
+        with self._write_lock:
+            self._escribir(*columnas)
+        return len(columnas[0])
+
+    def _escribir(self, ts, subtotal, a_itbis, a_iva, a_ret, p_itbis, p_iva, p_ret,
+                  escritas: Optional[np.ndarray] = None) -> None:
+        lote = calcular_lote(subtotal, a_itbis, a_iva, a_ret, p_itbis, p_iva, p_ret)
+        a_itbis, a_iva, a_ret = (np.asarray(a, dtype=bool).astype("u1") for a in (a_itbis, a_iva, a_ret))
+        columnas = {
+            "ts": ts, "subtotal": lote.subtotal, "itbis": lote.itbis, "iva": lote.iva,
+            "retencion": lote.retencion, "total": lote.total,
+            "porcentaje_itbis": p_itbis, "porcentaje_iva": p_iva, "porcentaje_retencion": p_ret,
+            "aplicar": a_itbis | (a_iva << 1) | (a_ret << 2),
+        }
+        dias = ts // MS_POR_DIA
+        for dia in np.unique(dias):
+            mask = dias == dia
+            self._append(_dia(int(dia) * MS_POR_DIA), {c: v[mask] for c, v in columnas.items()})
+            self.stats["escritas"] += int(mask.sum())
+            if escritas is not None:
+                escritas |= mask
+
+    def _append(self, dia: str, columnas: Dict[str, np.ndarray]) -> None:
+        """Append one partition's rows to every column, or to none (a failed write is truncated back)"""
+        carpeta = os.path.join(self.root, dia)
+        os.makedirs(carpeta, exist_ok=True)
+        rutas = {columna: os.path.join(carpeta, _archivo(columna)) for columna in columnas}
+        tamanos = {columna: os.path.getsize(ruta) if os.path.exists(ruta) else 0 for columna, ruta in rutas.items()}
+        try:
+            for columna, valores in columnas.items():
+                with open(rutas[columna], "ab") as f:
+                    f.write(np.ascontiguousarray(valores, dtype=COLUMNAS[columna]).tobytes())
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+        except BaseException:
+            for columna, ruta in rutas.items():
+                try:
+                    os.truncate(ruta, tamanos[columna])
+                except OSError:
+                    pass  # _alinear lo corrige al reabrir
+            raise
+
+    def _alinear(self, dia: str) -> None:
+        """Cut every column of a partition to the shortest one (a crash mid-append leaves them uneven)"""
+        carpeta = os.path.join(self.root, dia)
+        rutas = {columna: os.path.join(carpeta, _archivo(columna)) for columna in COLUMNAS}
+        filas = min(os.path.getsize(ruta) // COLUMNAS[columna].itemsize if os.path.exists(ruta) else 0
+                    for columna, ruta in rutas.items())
+        for columna, ruta in rutas.items():
+            if os.path.exists(ruta) and os.path.getsize(ruta) > filas * COLUMNAS[columna].itemsize:
+                os.truncate(ruta, filas * COLUMNAS[columna].itemsize)
+
+    def _flusher(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # El lote sigue pendiente: se reintenta en el próximo ciclo
+                print(f"❌ Error escribiendo el historial (se reintentará): {e}")
+
+    def start(self) -> "HistorialCalculos":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flusher, name="historial-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    # --- consulta ---------------------------------------------------------------
+
+    def particiones(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[str]:
+        """Day partitions between desde and hasta (ISO prefixes, inclusive)"""
+        dias = sorted(d for d in os.listdir(self.root) if len(d) == 10 and d[4] == "-")
+        return [d for d in dias if (not desde or d >= desde[:10]) and (not hasta or d[:len(hasta)] <= hasta)]
+
+    def columna(self, dia: str, columna: str) -> np.ndarray:
+        """Memory-mapped column of one partition (complete rows only)"""
+        path = os.path.join(self.root, dia, _archivo(columna))
+        dtype = COLUMNAS[columna]
+        filas = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        if not filas:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(filas,))
+
+    def _suma_particion(self, dia: str, columna: str) -> Tuple[int, float]:
+        path = os.path.join(self.root, dia, _archivo(columna))
+        filas = os.path.getsize(path) // COLUMNAS[columna].itemsize if os.path.exists(path) else 0
+        cached = self._sumas.get((dia, columna))
+        if cached is not None and cached[0] == filas:
+            return cached
+        valores = self.columna(dia, columna)
+        # /calcular responde 200 con montos null (NaN) para porcentajes no numéricos: no cuentan ni suman
+        finitos = np.isfinite(valores)
+        resultado = (int(finitos.sum()), float(valores.sum(where=finitos)))
+        self._sumas[(dia, columna)] = resultado
+        return resultado
+
+    def sumar(self, columna: str = "itbis", por: str = "mes", desde: Optional[str] = None,
+              hasta: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Count and sum of the column's finite values per day/month/year, oldest first
+        (pending rows are flushed first)"""
+        if columna not in MONTOS:
+            raise ValueError(f"Columna inválida: {columna}")
+        if por not in PERIODOS:
+            raise ValueError(f"Periodo inválido: {por}")
+        self.flush()
+        grupos: Dict[str, List[float]] = {}
+        for dia in self.particiones(desde, hasta):
+            filas, suma = self._suma_particion(dia, columna)
+            grupo = grupos.setdefault(dia[:PERIODOS[por]], [0, 0.0])
+            grupo[0] += filas
+            grupo[1] += suma
+        return [{"periodo": periodo, "calculos": int(n), columna: round(suma, 2)}
+                for periodo, (n, suma) in sorted(grupos.items())]
+
+
+def register_routes(app: App, historial: HistorialCalculos) -> None:
+    @app.route("GET", "/api/calculadora/historial")
+    def resumen(request: Request):
+        query = request.query
+        try:
+            return json_response(historial.sumar(query.get("columna", "itbis"), query.get("por", "mes"),
+                                                 query.get("desde"), query.get("hasta")))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar calculation log")
+    parser.add_argument("--root", default=DEFAULT_HISTORIAL_DIR)
+    parser.add_argument("--columna", choices=MONTOS, default="itbis")
+    parser.add_argument("--por", choices=tuple(PERIODOS), default="mes")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    args = parser.parse_args()
+
+    historial = HistorialCalculos(args.root)
+    print(json.dumps(historial.sumar(args.columna, args.por, args.desde, args.hasta), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Minimal WSGI routing for the Python services
+
+    app = App()
+
+    @app.route("GET", "/api/facturas/:id")
+    def obtener(request, id):
+        return json_response({"id": id})
+
+    serve(app, port=4000)
+
+Handlers get a Request plus the :params of the path and return a Response.
+Bodies can be bytes or any iterable of bytes, so streaming responses and
+wsgi.file_wrapper pass straight through to the server.
+"""
+
+import json
+import re
+import sys
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 202: "Accepted", 204: "No Content", 206: "Partial Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    413: "Payload Too Large", 416: "Range Not Satisfiable", 429: "Too Many Requests", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Request:
+    """Thin view over a WSGI environ"""
+
+    def __init__(self, environ: Dict[str, Any]):
+        self.environ = environ
+        self.method = environ.get("REQUEST_METHOD", "GET").upper()
+        self.path = environ.get("PATH_INFO", "/") or "/"
+        self.query = {k: v[-1] for k, v in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        self.content_type = environ.get("CONTENT_TYPE", "")
+        self.route: Optional[str] = None  # patrón de la ruta que atendió la petición
+        self._body: Optional[bytes] = None
+
+    @property
+    def content_length(self) -> Optional[int]:
+        try:
+            return int(self.environ.get("CONTENT_LENGTH") or "")
+        except ValueError:
+            return None
+
+    @property
+    def stream(self):
+        return self.environ["wsgi.input"]
+
+    def header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        key = name.upper().replace("-", "_")
+        if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            return self.environ.get(key, default)
+        return self.environ.get(f"HTTP_{key}", default)
+
+    def body(self) -> bytes:
+        if self._body is None:
+            length = self.content_length
+            self._body = self.stream.read(length) if length else b""
+        return self._body
+
+    def json(self) -> Any:
+        """Parsed JSON body; an empty body is {} like express.json()"""
+        body = self.body()
+        return json.loads(body) if body.strip() else {}
+
+
+class Response:
+    def __init__(self, body: Union[bytes, Iterable[bytes]] = b"", status: int = 200,
+                 headers: Optional[List[Tuple[str, str]]] = None):
+        self.body = body
+        self.status = status
+        self.headers = headers or []
+
+    def status_line(self) -> str:
+        return f"{self.status} {STATUS_TEXT.get(self.status, 'Unknown')}"
+
+
+def json_bytes(data: Any) -> bytes:
+    # Mismo formato compacto que res.json() en Express
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(data: Any, status: int = 200, headers: Optional[List[Tuple[str, str]]] = None) -> Response:
+    body = json_bytes(data)
+    return Response(body, status, [("Content-Type", "application/json; charset=utf-8"),
+                                   ("Content-Length", str(len(body)))] + (headers or []))
+
+
+def error_response(message: str, status: int) -> Response:
+    return json_response({"error": message}, status)
+
+
+Handler = Callable[..., Response]
+
+
+class App:
+    """Method + path router; ':name' segments (and a trailing '*name' rest of path) are passed
+    to the handler as keyword arguments"""
+
+    def __init__(self):
+        self.routes: List[Tuple[str, str, re.Pattern, Handler]] = []
+        self.middleware: List[Callable[[Request, Callable[[Request], Response]], Response]] = []
+
+    def route(self, method: str, pattern: str) -> Callable[[Handler], Handler]:
+        regex = pattern.rstrip("/") or "/"
+        regex = re.sub(r"\*(\w+)$", r"(?P<\1>.+)", re.sub(r":(\w+)", r"(?P<\1>[^/]+)", regex))
+        regex = re.compile("^" + regex + "/?$")
+
+        def decorator(handler: Handler) -> Handler:
+            self.routes.append((method.upper(), pattern, regex, handler))
+            return handler
+        return decorator
+
+    def add_middleware(self, middleware) -> None:
+        """middleware(request, call_next) -> Response, applied in registration order"""
+        self.middleware.append(middleware)
+
+    def dispatch(self, request: Request) -> Response:
+        allowed = False
+        for method, pattern, regex, handler in self.routes:
+            match = regex.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            request.route = pattern
+            try:
+                return handler(request, **match.groupdict())
+            except Exception as e:
+                print(f"Error en {request.method} {request.path}: {e}", file=sys.stderr)
+                return error_response("Error interno del servidor", 500)
+        if allowed:
+            return error_response("Método no permitido", 405)
+        return error_response("Ruta no encontrada", 404)
+
+    def handle(self, request: Request) -> Response:
+        call = self.dispatch
+        for middleware in reversed(self.middleware):
+            call = (lambda m, nxt: lambda req: m(req, nxt))(middleware, call)
+        return call(request)
+
+    def __call__(self, environ, start_response):
+        response = self.handle(Request(environ))
+        start_response(response.status_line(), response.headers)
+        if isinstance(response.body, (bytes, bytearray)):
+            return [bytes(response.body)]
+        return response.body
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    # wsgiref cierra cada conexión; con la cola por defecto (5) los picos de
+    # conexiones nuevas acaban en reintentos de SYN de 1s
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_threaded_server(app: App, host: str = "127.0.0.1", port: int = 4000):
+    return make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+
+
+def serve(app: App, host: str = "127.0.0.1", port: int = 4000) -> None:
+    with make_threaded_server(app, host, port) as server:
+        print(f"🚀 Servidor en http://{host}:{server.server_port}")
+        server.serve_forever()
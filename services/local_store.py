@@ -0,0 +1,395 @@
+"""
+Append-only local store
+
+Python counterpart of backend/src/utils/localSupabase.js with the same
+from(table).insert / select().eq().single() / select().order() contract,
+but each table is a JSON-lines append log: an insert writes one line
+instead of rewriting the whole file, and reads are served from in-memory
+id and date indexes instead of re-parsing the file. The log is compacted
+when superseded lines pile up.
+
+Existing <table>.json arrays written by localSupabase.js are imported the
+first time a table is opened.
+"""
+
+import bisect
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DATA_DIR = os.getenv(
+    "LOCAL_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "src", "data"),
+)
+
+# Columnas de fecha que localSupabase.js rellena en cada insert (y por las que se ordena)
+DATE_COLUMNS = ("fecha_creacion", "subido_en")
+
+# listener(evento, registro) con evento "insert", "update" o "delete"
+Listener = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass
+class Result:
+    data: Any = None
+    error: Optional[Dict[str, str]] = None
+
+
+def now_iso() -> str:
+    # Mismo formato que new Date().toISOString()
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _timestamp(value: Any) -> float:
+    if not value:
+        return float("-inf")
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return float("-inf")
+
+
+def _descending(entries: List[Tuple[float, int]]) -> Iterator[Tuple[float, int]]:
+    # Orden descendente estable: los empates conservan el orden de inserción, como Array.sort en JS
+    end = len(entries)
+    while end > 0:
+        start = end - 1
+        while start > 0 and entries[start - 1][0] == entries[end - 1][0]:
+            start -= 1
+        yield from entries[start:end]
+        end = start
+
+
+class Table:
+    """One table: an append log on disk plus in-memory indexes"""
+
+    def __init__(self, store: "LocalStore", name: str):
+        self.store = store
+        self.name = name
+        self.path = os.path.join(store.data_dir, f"{name}.jsonl")
+        self.lock = threading.RLock()
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.date_index: Dict[str, List[Tuple[float, int]]] = {c: [] for c in DATE_COLUMNS}
+        self.eq_indexes: Dict[str, Dict[Any, List[int]]] = {}
+        self.listeners: List[Listener] = []
+        self.next_id = 1
+        self.log_lines = 0
+        self._load()
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    # --- carga y compactación -------------------------------------------------
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            legacy = os.path.join(self.store.data_dir, f"{self.name}.json")
+            rows = []
+            if os.path.exists(legacy):
+                with open(legacy, encoding="utf-8") as f:
+                    rows = json.load(f) or []
+            with open(self.path, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        with open(self.path, "rb+") as f:
+            offset = 0
+            line = b""
+            for line in f:
+                inicio, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    if line.endswith(b"\n"):
+                        raise
+                    # Última línea a medio escribir (caída durante un append): se descarta del log
+                    print(f"⚠️  {self.path}: línea final truncada descartada ({len(line)} bytes)")
+                    f.truncate(inicio)
+                    return
+                self.log_lines += 1
+                if row.get("_deleted"):
+                    self._unindex(self.records.pop(row["id"], None))
+                else:
+                    self._apply(row)
+            if line and not line.endswith(b"\n"):
+                # Última línea completa sin salto: el próximo append no debe pegarse a ella
+                f.seek(0, os.SEEK_END)
+                f.write(b"\n")
+
+    def _apply(self, row: Dict[str, Any]) -> None:
+        previous = self.records.get(row["id"])
+        if previous is not None:
+            self._unindex(previous)
+        self.records[row["id"]] = row
+        self.next_id = max(self.next_id, row["id"] + 1)
+        for column, entries in self.date_index.items():
+            entry = (_timestamp(row.get(column)), row["id"])
+            # Camino rápido: las inserciones llegan casi siempre en orden cronológico
+            if not entries or entry >= entries[-1]:
+                entries.append(entry)
+            else:
+                bisect.insort(entries, entry)
+        for column, index in self.eq_indexes.items():
+            index.setdefault(self._key(row.get(column)), []).append(row["id"])
+
+    def _unindex(self, row: Optional[Dict[str, Any]]) -> None:
+        if row is None:
+            return
+        for column, entries in self.date_index.items():
+            entry = (_timestamp(row.get(column)), row["id"])
+            i = bisect.bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+        for column, index in self.eq_indexes.items():
+            ids = index.get(self._key(row.get(column)), [])
+            if row["id"] in ids:
+                ids.remove(row["id"])
+
+    def _append(self, row: Dict[str, Any]) -> None:
+        self._log.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._log.flush()
+        if self.store.fsync:
+            os.fsync(self._log.fileno())
+        self.log_lines += 1
+
+    def needs_compaction(self) -> bool:
+        dead = self.log_lines - len(self.records)
+        return dead >= self.store.compact_min_dead and dead > len(self.records)
+
+    def compact(self) -> None:
+        """Rewrite the log with one line per live record (atomic replace)"""
+        with self.lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in self.records.values():
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._log.close()
+            os.replace(tmp, self.path)
+            self._log = open(self.path, "a", encoding="utf-8")
+            self.log_lines = len(self.records)
+
+    def close(self) -> None:
+        with self.lock:
+            self._log.close()
+
+    def _notify(self, evento: str, rows: List[Dict[str, Any]]) -> None:
+        # Fuera del lock: un listener lento no bloquea a otros escritores
+        for listener in list(self.listeners):
+            for row in rows:
+                try:
+                    listener(evento, row)
+                except Exception as e:
+                    print(f"Error en listener de {self.name}: {e}")
+
+    # --- búsquedas ------------------------------------------------------------
+
+    @staticmethod
+    def _key(value: Any) -> Any:
+        # eq() de localSupabase compara con ==: "3" y 3 deben coincidir
+        if isinstance(value, str) and value.lstrip("-").isdigit():
+            return int(value)
+        return value
+
+    def find(self, column: str, value: Any) -> List[Dict[str, Any]]:
+        with self.lock:
+            if column == "id":
+                row = self.records.get(self._key(value))
+                return [row] if row is not None else []
+            index = self.eq_indexes.get(column)
+            if index is None:
+                # Índice hash creado en la primera búsqueda por esta columna y mantenido después
+                index = self.eq_indexes[column] = {}
+                for row in self.records.values():
+                    index.setdefault(self._key(row.get(column)), []).append(row["id"])
+            return [self.records[i] for i in index.get(self._key(value), [])]
+
+    def ordered(self, column: str, ascending: bool = True, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self.lock:
+            entries = self.date_index.get(column)
+            if entries is None:
+                rows = sorted(self.records.values(), key=lambda r: _timestamp(r.get(column)),
+                              reverse=not ascending)
+                return rows[:limit] if limit is not None else rows
+            iterator = iter(entries) if ascending else _descending(entries)
+            rows = []
+            for _, id in iterator:
+                rows.append(self.records[id])
+                if limit is not None and len(rows) >= limit:
+                    break
+            return rows
+
+    # --- escrituras -----------------------------------------------------------
+
+    def insert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        inserted = []
+        with self.lock:
+            for data in rows:
+                now = now_iso()
+                record = {
+                    "id": self.next_id,
+                    **data,
+                    "fecha_creacion": data.get("fecha_creacion") or now,
+                    "subido_en": data.get("subido_en") or now,
+                }
+                self._append(record)
+                self._apply(record)
+                inserted.append(record)
+        self._notify("insert", inserted)
+        return inserted
+
+    def update(self, values: Dict[str, Any], column: str, value: Any) -> List[Dict[str, Any]]:
+        with self.lock:
+            updated = []
+            for row in self.find(column, value):
+                record = {**row, **values, "id": row["id"]}
+                self._append(record)
+                self._apply(record)
+                updated.append(record)
+            if self.needs_compaction():
+                self.compact()
+        self._notify("update", updated)
+        return updated
+
+    def delete(self, column: str, value: Any) -> List[Dict[str, Any]]:
+        with self.lock:
+            deleted = self.find(column, value)
+            for row in deleted:
+                self._append({"id": row["id"], "_deleted": True})
+                self._unindex(self.records.pop(row["id"]))
+            if self.needs_compaction():
+                self.compact()
+        self._notify("delete", deleted)
+        return deleted
+
+
+class _Filter:
+    def __init__(self, table: Table, column: str, value: Any, columns: str):
+        self.table, self.column, self.value, self.columns = table, column, value, columns
+
+    def single(self) -> Result:
+        try:
+            rows = self.table.find(self.column, self.value)
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+        if not rows:
+            return Result(None, {"message": "Record not found"})
+        return Result(_project(rows[0], self.columns))
+
+    def execute(self) -> Result:
+        try:
+            return Result([_project(r, self.columns) for r in self.table.find(self.column, self.value)])
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+
+
+class _Select:
+    def __init__(self, table: Table, columns: str):
+        self.table, self.columns = table, columns
+
+    def eq(self, column: str, value: Any) -> _Filter:
+        return _Filter(self.table, column, value, self.columns)
+
+    def order(self, column: str, ascending: bool = True, limit: Optional[int] = None) -> Result:
+        try:
+            rows = self.table.ordered(column, ascending, limit)
+            return Result([_project(r, self.columns) for r in rows])
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+
+
+class _Update:
+    def __init__(self, table: Table, values: Dict[str, Any]):
+        self.table, self.values = table, values
+
+    def eq(self, column: str, value: Any) -> Result:
+        try:
+            return Result(self.table.update(self.values, column, value))
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+
+
+class _Delete:
+    def __init__(self, table: Table):
+        self.table = table
+
+    def eq(self, column: str, value: Any) -> Result:
+        try:
+            return Result(self.table.delete(column, value))
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+
+
+class _QueryBuilder:
+    def __init__(self, table: Table):
+        self.table = table
+
+    def insert(self, rows: List[Dict[str, Any]]) -> Result:
+        try:
+            return Result(self.table.insert(rows))
+        except Exception as e:
+            return Result(None, {"message": str(e)})
+
+    def select(self, columns: str = "*") -> _Select:
+        return _Select(self.table, columns)
+
+    def update(self, values: Dict[str, Any]) -> _Update:
+        return _Update(self.table, values)
+
+    def delete(self) -> _Delete:
+        return _Delete(self.table)
+
+
+def _project(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+    if columns.strip() == "*":
+        return dict(row)
+    wanted = [c.strip() for c in columns.split(",")]
+    return {c: row.get(c) for c in wanted}
+
+
+class LocalStore:
+    """Local stand-in for Supabase tables: store.from_("contactos").insert([...])"""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, fsync: bool = False,
+                 compact_min_dead: int = 1000, compact_interval: Optional[float] = None):
+        self.data_dir = data_dir
+        self.fsync = fsync
+        self.compact_min_dead = compact_min_dead
+        self._tables: Dict[str, Table] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        os.makedirs(data_dir, exist_ok=True)
+        if compact_interval:
+            threading.Thread(target=self._compactor, args=(compact_interval,), daemon=True).start()
+
+    def table(self, name: str) -> Table:
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                table = self._tables[name] = Table(self, name)
+            return table
+
+    def from_(self, name: str) -> _QueryBuilder:
+        return _QueryBuilder(self.table(name))
+
+    def subscribe(self, name: str, listener: Listener) -> None:
+        """Call listener(evento, registro) after every insert/update/delete on the table"""
+        self.table(name).listeners.append(listener)
+
+    def unsubscribe(self, name: str, listener: Listener) -> None:
+        self.table(name).listeners.remove(listener)
+
+    def _compactor(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            for table in list(self._tables.values()):
+                if table.needs_compaction():
+                    table.compact()
+
+    def close(self) -> None:
+        self._stop.set()
+        for table in self._tables.values():
+            table.close()
@@ -0,0 +1,369 @@
+"""
+Prometheus-style metrics for the API and database layers
+
+    metrics = Metrics()
+    metrics.instrument_app(app)          # latencia por ruta + bytes recibidos/enviados (subidas)
+    metrics.instrument_engine(engine)    # tiempos de consulta, consultas lentas, pool
+    metrics.instrument_shared_engines()  # lo mismo para get_engine() / SessionLocal y el engine async
+    register_routes(app, metrics)        # GET /metrics (formato de texto de Prometheus)
+
+The Express backend is covered by tailing its access log (morgan "tiny"
+format, written by backend/src/utils/accessLog.ts when ACCESS_LOG is set)
+from a sidecar that serves the same /metrics:
+
+    ACCESS_LOG=access.log npm start          # en backend/
+    python -m services.metrics tail backend/access.log --port 9100
+
+Queries slower than SLOW_QUERY_MS (default 250) are printed to stderr and
+the latest ones kept for GET /metrics/consultas-lentas.
+"""
+
+import argparse
+import bisect
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from services.http import App, Request, Response, json_response, serve
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+CONSULTAS_LENTAS = 100
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Segundos; cubren desde respuestas en caché hasta subidas de 50MB
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _valor(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escapar(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_etiquetas(self.labels, k)} {_valor(v)}" for k, v in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    """Value read at scrape time from a callback returning {labels: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], read: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help, labels)
+        self.read = read
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_etiquetas(self.labels, k)} {_valor(v)}" for k, v in sorted(self.read().items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteo por cubo (no acumulado) + desbordamiento, suma]
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self.series.get(labels)
+            if serie is None:
+                serie = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += value
+
+    def snapshot(self, *labels: str) -> Tuple[List[int], float]:
+        with self._lock:
+            serie = self.series.get(labels)
+            return (list(serie[0]), serie[1]) if serie else ([0] * (len(self.buckets) + 1), 0.0)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = [(k, list(v[0]), v[1]) for k, v in sorted(self.series.items())]
+        for labels, counts, total in series:
+            acumulado = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                acumulado += count
+                le = _etiquetas(self.labels, labels, [("le", _valor(bound))])
+                lines.append(f"{self.name}_bucket{le} {acumulado}")
+            lines.append(f"{self.name}_sum{_etiquetas(self.labels, labels)} {_valor(total)}")
+            lines.append(f"{self.name}_count{_etiquetas(self.labels, labels)} {acumulado}")
+        return lines
+
+
+@functools.lru_cache(maxsize=1024)
+def operacion_sql(statement: str) -> str:
+    """First SQL keyword (SELECT, INSERT, ...) used as the query label"""
+    match = re.match(r"\s*(?:--[^\n]*\n\s*|/\*.*?\*/\s*)*(\w+)", statement or "", re.S)
+    return match.group(1).upper() if match else "OTHER"
+
+
+_SEGMENTO_ID = re.compile(r"/(?:\d+|[0-9a-f]{8}-[0-9a-f-]{27}|[0-9a-f]{64})(?=/|$)", re.I)
+_MORGAN_TINY = re.compile(r"^(?P<method>[A-Z]+) (?P<url>\S+) (?P<status>\d{3}) (?P<length>\d+|-) - (?P<ms>[\d.]+) ms")
+
+
+def ruta_normalizada(path: str) -> str:
+    """Collapse ids in a raw path so each route is one label value (/api/contacto/12 -> /api/contacto/:id)"""
+    return _SEGMENTO_ID.sub("/:id", path.split("?", 1)[0])
+
+
+class _CuerpoMedido:
+    """Streaming response body that reports the bytes it sent once the server closes it (WSGI close())"""
+
+    def __init__(self, cuerpo: Iterable[bytes], al_cerrar: Callable[[int], None]):
+        self.cuerpo = cuerpo
+        self.al_cerrar = al_cerrar
+        self.enviados = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.cuerpo:
+            self.enviados += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        al_cerrar, self.al_cerrar = self.al_cerrar, None
+        try:
+            close = getattr(self.cuerpo, "close", None)
+            if close is not None:
+                close()
+        finally:
+            if al_cerrar is not None:
+                al_cerrar(self.enviados)
+
+
+class Metrics:
+    """Registry of the API, upload and database metrics plus the slow-query log"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.consultas_lentas: deque = deque(maxlen=CONSULTAS_LENTAS)
+        self.http_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route",
+                                      ("method", "route", "status"))
+        self.http_request_bytes = Counter("http_request_bytes_total", "Request body bytes received by route",
+                                          ("method", "route"))
+        self.http_response_bytes = Counter("http_response_bytes_total", "Response body bytes sent by route",
+                                           ("method", "route"))
+        self.db_latency = Histogram("db_query_duration_seconds", "SQL statement execution time",
+                                    ("engine", "operation"), QUERY_BUCKETS)
+        self.db_slow = Counter("db_slow_queries_total", "Statements slower than the slow-query threshold",
+                               ("engine", "operation"))
+        self._engines: Dict[str, Any] = {}
+        self.familias: List[_Metric] = [self.http_latency, self.http_request_bytes, self.http_response_bytes,
+                                       self.db_latency, self.db_slow]
+        self.familias += [Gauge(nombre, ayuda, ("engine",), lambda campo=campo: self._pool(campo))
+                          for nombre, campo, ayuda in (
+                              ("db_pool_checked_out", "checked_out", "Connections currently checked out"),
+                              ("db_pool_peak_checked_out", "peak_checked_out", "Most connections checked out at once"),
+                              ("db_pool_checkouts", "checkouts", "Connection checkouts since start"),
+                              ("db_pool_timeouts", "timeouts", "Checkouts that timed out waiting for a connection"),
+                              ("db_pool_wait_seconds", "wait_total_s", "Seconds spent waiting for a pooled connection"),
+                              ("db_pool_wait_max_seconds", "wait_max_s", "Longest wait for a pooled connection"))]
+
+    # --- HTTP ---------------------------------------------------------------------
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        request_bytes: int = 0, response_bytes: int = 0) -> None:
+        self.http_latency.observe(seconds, method, route, str(status))
+        if request_bytes:
+            self.http_request_bytes.inc(request_bytes, method, route)
+        if response_bytes:
+            self.http_response_bytes.inc(response_bytes, method, route)
+
+    def middleware(self, request: Request, call_next) -> Response:
+        start = time.perf_counter()
+        response = call_next(request)
+        body = response.body
+        size = len(body) if isinstance(body, (bytes, bytearray)) else 0
+        for name, value in response.headers:
+            if name.lower() == "content-length" and not size:
+                size = int(value)
+
+        def observar(enviados: int = 0) -> None:
+            # Rutas no encontradas comparten una etiqueta para no crear una serie por URL
+            self.observe_request(request.method, request.route or "(sin ruta)", response.status,
+                                 time.perf_counter() - start, request.content_length or 0, size or enviados)
+        if isinstance(body, (bytes, bytearray)):
+            observar()
+        else:
+            # Cuerpos en streaming (NDJSON, descargas): el reloj para cuando el servidor termina de enviarlos
+            response.body = _CuerpoMedido(body, observar)
+        return response
+
+    def instrument_app(self, app: App) -> "Metrics":
+        app.add_middleware(self.middleware)
+        return self
+
+    def ingest_log_line(self, line: str) -> bool:
+        """Feed one morgan "tiny" access log line (`GET /api/x 200 123 - 4.567 ms`) from the Express backend"""
+        match = _MORGAN_TINY.match(line.strip())
+        if match is None:
+            return False
+        route = ruta_normalizada(match["url"])
+        length = 0 if match["length"] == "-" else int(match["length"])
+        self.observe_request(match["method"], route, int(match["status"]), float(match["ms"]) / 1000,
+                             response_bytes=length)
+        return True
+
+    # --- base de datos ------------------------------------------------------------
+
+    def instrument_engine(self, engine, name: str = "default") -> "Metrics":
+        """Time every statement on a SQLAlchemy Engine (or AsyncEngine.sync_engine) and export its pool"""
+        from sqlalchemy import event
+
+        engine = getattr(engine, "sync_engine", engine)
+        self._engines[name] = engine
+
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("_metrics_start")
+            if not starts:
+                return
+            self.observe_query(name, statement, time.perf_counter() - starts.pop(), executemany)
+
+        event.listen(engine, "before_cursor_execute", before)
+        event.listen(engine, "after_cursor_execute", after)
+        return self
+
+    def instrument_shared_engines(self) -> "Metrics":
+        """Instrument the process-wide engines (database.engine.get_engine, and the async one behind
+        AsyncSessionLocal) as soon as each one is created, or now if it already exists"""
+        from database.engine import observar_engines
+
+        observar_engines(self.instrument_engine)
+        return self
+
+    def observe_query(self, engine: str, statement: str, seconds: float, executemany: bool = False) -> None:
+        operation = operacion_sql(statement)
+        self.db_latency.observe(seconds, engine, operation)
+        if seconds * 1000 >= self.slow_query_ms:
+            self.db_slow.inc(1, engine, operation)
+            sql = " ".join(statement.split())[:500]
+            self.consultas_lentas.append({"engine": engine, "ms": round(seconds * 1000, 3), "sql": sql,
+                                          "executemany": executemany, "en": time.time()})
+            print(f"⚠️  Consulta lenta ({seconds * 1000:.1f}ms, {engine}): {sql}", file=sys.stderr)
+
+    def _pool(self, campo: str) -> Dict[Tuple[str, ...], float]:
+        valores = {}
+        for name, engine in list(self._engines.items()):
+            counters = getattr(engine.pool, "metrics", None)
+            if counters is not None:
+                valores[(name,)] = counters.snapshot()[campo]
+        return valores
+
+    # --- exposición ---------------------------------------------------------------
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.familias:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def register_routes(app: App, metrics: Metrics) -> None:
+    @app.route("GET", "/metrics")
+    def exponer(request: Request):
+        body = metrics.render().encode("utf-8")
+        return Response(body, 200, [("Content-Type", CONTENT_TYPE), ("Content-Length", str(len(body)))])
+
+    @app.route("GET", "/metrics/consultas-lentas")
+    def consultas_lentas(request: Request):
+        return json_response({"umbral_ms": metrics.slow_query_ms, "consultas": list(metrics.consultas_lentas)})
+
+
+def seguir(path: str, metrics: Metrics, stop: threading.Event, interval: float = 0.5) -> None:
+    """Tail an access log (handles truncation/rotation by reopening) and feed each line to metrics"""
+    f = None
+    while not stop.is_set():
+        if f is None:
+            try:
+                f = open(path, "r", encoding="utf-8", errors="replace")
+                f.seek(0, os.SEEK_END)
+            except FileNotFoundError:
+                stop.wait(interval)
+                continue
+        line = f.readline()
+        if line:
+            metrics.ingest_log_line(line)
+            continue
+        try:
+            rotado = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino or os.path.getsize(path) < f.tell()
+        except FileNotFoundError:
+            rotado = True
+        if rotado:
+            f.close()
+            f = None
+        stop.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics sidecar for the Express access log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tail = sub.add_parser("tail", help="follow an access log and serve /metrics")
+    tail.add_argument("log")
+    tail.add_argument("--host", default="127.0.0.1")
+    tail.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    stop = threading.Event()
+    threading.Thread(target=seguir, args=(args.log, metrics, stop), daemon=True).start()
+    app = App()
+    register_routes(app, metrics)
+    try:
+        serve(app, args.host, args.port)
+    except KeyboardInterrupt:
+        stop.set()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
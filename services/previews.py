@@ -0,0 +1,413 @@
+"""
+Invoice thumbnails and first-page previews
+
+List views used to download each original (up to 50MB) just to draw a
+preview. When a facturas row is inserted (services.local_store insert
+listener, i.e. right after POST /api/facturas/subir), its file is sent
+to a process pool that renders two small derivatives:
+
+    miniatura  320px wide, for the invoice list
+    pagina     1200px wide, first page of a PDF / the scaled image
+
+Images are scaled with Pillow and PDFs rendered with poppler's pdftoppm,
+both saved as WebP. Without Pillow a PDF page stays as pdftoppm's JPEG;
+with no renderer at all (or a file that cannot be rendered) the
+derivative is a small SVG card with the file type and size, so the list
+never falls back to the original. Transient failures (a pdftoppm
+timeout, the renderer killed, out of memory or descriptors) fail the job
+instead, so the next request renders it again.
+
+Derivatives live in an on-disk LRU keyed by the file's SHA-256 (repeated
+uploads share them) and bounded in bytes; GET /api/facturas/:id/preview
+serves rendered ones with immutable caching and cards with revalidation.
+
+    python -m services.previews archivo factura.pdf --variante miniatura > mini.webp
+    python -m services.previews run --data-dir backend/src/data   # backfill existing rows
+"""
+
+import argparse
+import io
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from services.blob_store import DEFAULT_STORAGE_DIR
+from services.http import App, Request, Response, error_response, json_response
+from services.local_store import DEFAULT_DATA_DIR, LocalStore
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+PDFTOPPM = shutil.which("pdftoppm")
+
+DEFAULT_PREVIEW_DIR = os.getenv("PREVIEW_DIR", os.path.join(DEFAULT_DATA_DIR, "previews"))
+DEFAULT_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MB", "512")) * 1024 * 1024
+
+# Variante -> ancho máximo en píxeles
+VARIANTES = {"miniatura": 320, "pagina": 1200}
+CALIDAD_WEBP = 75
+RENDER_TIMEOUT = 30
+
+TIPOS = {"webp": "image/webp", "jpg": "image/jpeg", "svg": "image/svg+xml"}
+
+# --- render (se ejecuta en los procesos del pool) -------------------------------
+
+
+def _webp(imagen, ancho: int) -> bytes:
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode not in ("RGB", "RGBA"):
+        imagen = imagen.convert("RGBA" if "A" in imagen.getbands() else "RGB")
+    imagen.thumbnail((ancho, ancho * 4))
+    salida = io.BytesIO()
+    imagen.save(salida, "WEBP", quality=CALIDAD_WEBP, method=4)
+    return salida.getvalue()
+
+
+def _pdftoppm(path: str, ancho: int, formato: str) -> bytes:
+    resultado = subprocess.run(
+        [PDFTOPPM, "-f", "1", "-l", "1", "-singlefile", "-scale-to-x", str(ancho), "-scale-to-y", "-1",
+         f"-{formato}", path],
+        capture_output=True, timeout=RENDER_TIMEOUT, check=True,
+    )
+    return resultado.stdout
+
+
+def _tamano_legible(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{max(size, 1) / 1024:.0f} KB"
+
+
+def tarjeta_svg(tipo_archivo: str, size: int, ancho: int) -> bytes:
+    """Placeholder card: file type and size on a page outline (3:4)"""
+    alto = ancho * 4 // 3
+    etiqueta = "PDF" if tipo_archivo == "application/pdf" else tipo_archivo.split("/")[-1].upper()[:5]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{ancho}" height="{alto}" viewBox="0 0 300 400">'
+        '<rect x="10" y="10" width="280" height="380" rx="12" fill="#f8fafc" stroke="#cbd5e1" stroke-width="4"/>'
+        '<path d="M210 10v70h70" fill="none" stroke="#cbd5e1" stroke-width="4"/>'
+        f'<text x="150" y="215" font-family="sans-serif" font-size="64" font-weight="700" fill="#2563eb" '
+        f'text-anchor="middle">{escape(etiqueta)}</text>'
+        f'<text x="150" y="275" font-family="sans-serif" font-size="28" fill="#64748b" '
+        f'text-anchor="middle">{_tamano_legible(size)}</text></svg>'
+    ).encode("utf-8")
+
+
+def generar_preview(path: str, tipo_archivo: str, variante: str) -> Tuple[str, bytes]:
+    """(extension, bytes) of one derivative of a stored file"""
+    ancho = VARIANTES[variante]
+    try:
+        if tipo_archivo == "application/pdf" and PDFTOPPM:
+            if Image is not None:
+                return "webp", _webp(Image.open(io.BytesIO(_pdftoppm(path, ancho, "png"))), ancho)
+            return "jpg", _pdftoppm(path, ancho, "jpeg")
+        if tipo_archivo.startswith("image/") and Image is not None:
+            with Image.open(path) as imagen:
+                # JPEG: decodifica directamente a una escala reducida
+                imagen.draft("RGB", (ancho, ancho * 4))
+                return "webp", _webp(imagen, ancho)
+    except subprocess.CalledProcessError as e:
+        if e.returncode < 0:
+            raise  # pdftoppm terminado por una señal (p. ej. sin memoria): se reintenta
+    except OSError as e:
+        if e.errno is not None:
+            raise  # error del sistema (memoria, descriptores, disco), no del archivo
+    except ValueError:
+        pass
+    # Archivo corrupto o no renderizable: mejor una tarjeta que el original.
+    # subprocess.TimeoutExpired no se captura: bajo carga el mismo archivo puede renderizarse luego
+    return "svg", tarjeta_svg(tipo_archivo, os.path.getsize(path), ancho)
+
+
+def generar_previews(path: str, tipo_archivo: str) -> Dict[str, Tuple[str, bytes]]:
+    return {variante: generar_preview(path, tipo_archivo, variante) for variante in VARIANTES}
+
+
+# --- caché en disco ---------------------------------------------------------------
+
+
+class PreviewCache:
+    """Derivatives on disk as <root>/ab/<sha256>-<variante>.<ext>, evicted least recently used
+    once their total size exceeds max_bytes"""
+
+    def __init__(self, root: str = DEFAULT_PREVIEW_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # (sha256, variante) -> (ruta, extensión, tamaño), del menos al más reciente
+        self._entradas: "OrderedDict[Tuple[str, str], Tuple[str, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "escritas": 0, "expulsadas": 0}
+        os.makedirs(root, exist_ok=True)
+        self._cargar()
+
+    def _cargar(self) -> None:
+        # Al arrancar, el orden LRU se reconstruye por fecha de modificación
+        encontrados = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                base, _, ext = name.rpartition(".")
+                sha256, _, variante = base.partition("-")
+                if ext in TIPOS and variante in VARIANTES:
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    encontrados.append((st.st_mtime, (sha256, variante), (path, ext, st.st_size)))
+        for _, key, entrada in sorted(encontrados):
+            self._entradas[key] = entrada
+            self.bytes += entrada[2]
+        self._expulsar()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._entradas
+
+    def get(self, sha256: str, variante: str) -> Optional[Tuple[str, str, int]]:
+        """(path, extension, size) of a cached derivative, marking it recently used"""
+        key = (sha256, variante)
+        with self._lock:
+            entrada = self._entradas.get(key)
+            if entrada is None:
+                self.stats["misses"] += 1
+                return None
+            self._entradas.move_to_end(key)
+            self.stats["hits"] += 1
+            return entrada
+
+    def put(self, sha256: str, variante: str, ext: str, data: bytes) -> str:
+        carpeta = os.path.join(self.root, sha256[:2])
+        os.makedirs(carpeta, exist_ok=True)
+        path = os.path.join(carpeta, f"{sha256}-{variante}.{ext}")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            anterior = self._entradas.pop((sha256, variante), None)
+            if anterior is not None:
+                self.bytes -= anterior[2]
+                if anterior[0] != path and os.path.exists(anterior[0]):
+                    os.remove(anterior[0])
+            self._entradas[(sha256, variante)] = (path, ext, len(data))
+            self.bytes += len(data)
+            self.stats["escritas"] += 1
+            self._expulsar()
+        return path
+
+    def _expulsar(self) -> None:
+        while self.bytes > self.max_bytes and self._entradas:
+            _, (path, _, size) = self._entradas.popitem(last=False)
+            self.bytes -= size
+            self.stats["expulsadas"] += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+# --- pipeline ---------------------------------------------------------------------
+
+
+class PreviewPipeline:
+    """Renders derivatives for new facturas rows in a process pool, one job per file hash"""
+
+    def __init__(self, store: LocalStore, storage_dir: str = DEFAULT_STORAGE_DIR,
+                 cache: Optional[PreviewCache] = None, workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, queue_size: int = 10_000):
+        self.store = store
+        self.storage_dir = storage_dir
+        self.cache = cache if cache is not None else PreviewCache()
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = threading.BoundedSemaphore(max_in_flight or self.workers * 2)
+        self.queue: "queue.Queue[Tuple[str, str, str]]" = queue.Queue(maxsize=queue_size)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._en_curso = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"encoladas": 0, "descartadas": 0, "generadas": 0, "fallidas": 0, "pools_reiniciados": 0}
+
+    def completo(self, sha256: str) -> bool:
+        return all((sha256, variante) in self.cache for variante in VARIANTES)
+
+    def _on_change(self, evento: str, row: Dict[str, Any]) -> None:
+        if evento == "insert":
+            self.submit(row)
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Enqueue a row's file without blocking; False when the queue is full"""
+        sha256, ruta = row.get("sha256"), row.get("ruta_storage")
+        if not sha256 or not ruta or self.completo(sha256):
+            return True
+        with self._lock:
+            if sha256 in self._en_curso:
+                return True
+            try:
+                self.queue.put_nowait((sha256, ruta, row.get("tipo_archivo") or ""))
+            except queue.Full:
+                self.stats["descartadas"] += 1
+                return False
+            self._en_curso.add(sha256)
+            self.stats["encoladas"] += 1
+            return True
+
+    def sweep(self) -> int:
+        return sum(self.submit(row) for row in list(self.store.table("facturas").records.values()))
+
+    def start(self) -> "PreviewPipeline":
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.store.subscribe("facturas", self._on_change)
+        self._thread = threading.Thread(target=self._dispatch, name="previews", daemon=True)
+        self._thread.start()
+        self.sweep()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        self.store.unsubscribe("facturas", self._on_change)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every enqueued file has its derivatives (or failed)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._en_curso:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _dispatch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sha256, ruta, tipo = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            # Backpressure: no se envía más trabajo al pool hasta que se libere un hueco
+            while not self.slots.acquire(timeout=0.2):
+                if self._stop.is_set():
+                    return
+            path = os.path.join(self.storage_dir, *ruta.split("/"))
+            executor = self.executor
+            try:
+                future = executor.submit(generar_previews, path, tipo)
+            except (BrokenProcessPool, RuntimeError) as e:
+                # Un proceso del pool murió (p. ej. sin memoria con una imagen enorme): el hilo sigue vivo
+                if not self._stop.is_set():
+                    print(f"❌ Error generando la vista previa de {sha256}: {e or 'pool roto'}")
+                    self._reconstruir(executor)
+                self._terminar(sha256, "fallidas")
+                continue
+            future.add_done_callback(lambda f, sha256=sha256, executor=executor: self._done(sha256, f, executor))
+
+    def _reconstruir(self, roto: ProcessPoolExecutor) -> None:
+        """Replace a broken pool (only once, whichever job notices first)"""
+        with self._lock:
+            if self.executor is not roto or self._stop.is_set():
+                return
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.stats["pools_reiniciados"] += 1
+        roto.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, sha256: str, future, executor: ProcessPoolExecutor) -> None:
+        try:
+            for variante, (ext, data) in future.result().items():
+                self.cache.put(sha256, variante, ext, data)
+            stat = "generadas"
+        except Exception as e:
+            print(f"❌ Error generando la vista previa de {sha256}: {e}")
+            stat = "fallidas"
+            if isinstance(e, BrokenProcessPool):
+                self._reconstruir(executor)
+        self._terminar(sha256, stat)
+
+    def _terminar(self, sha256: str, stat: str) -> None:
+        # Una vista previa fallida sale de _en_curso: la próxima petición vuelve a encolarla
+        self.slots.release()
+        with self._idle:
+            self.stats[stat] += 1
+            self._en_curso.discard(sha256)
+            self._idle.notify_all()
+
+
+def register_routes(app: App, store: LocalStore, pipeline: PreviewPipeline) -> None:
+    @app.route("GET", "/api/facturas/:id/preview")
+    def preview(request: Request, id: str):
+        variante = request.query.get("variante", "miniatura")
+        if variante not in VARIANTES:
+            return error_response(f"Variante inválida: {variante}", 400)
+        filas = store.table("facturas").find("id", id)
+        if not filas or not filas[0].get("sha256"):
+            return error_response("Factura no encontrada", 404)
+        sha256 = filas[0]["sha256"]
+        entrada = pipeline.cache.get(sha256, variante)
+        if entrada is None:
+            # Aún en el pool o expulsada de la caché: se (re)genera y el cliente reintenta
+            pipeline.submit(filas[0])
+            return json_response({"estado": "pendiente"}, 202, [("Retry-After", "1")])
+        path, ext, size = entrada
+        # El formato va en el ETag: una tarjeta y el render real del mismo archivo nunca comparten 304
+        etag = f'"{sha256}-{variante}-{ext}"'
+        # Las tarjetas se revalidan siempre; solo un render real es inmutable
+        cache_control = "no-cache" if ext == "svg" else "public, max-age=31536000, immutable"
+        headers = [("ETag", etag), ("Cache-Control", cache_control)]
+        if request.header("If-None-Match") == etag:
+            return Response(b"", 304, headers)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            pipeline.submit(filas[0])
+            return json_response({"estado": "pendiente"}, 202, [("Retry-After", "1")])
+        return Response(data, 200, headers + [("Content-Type", TIPOS[ext]), ("Content-Length", str(len(data)))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invoice previews")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="render missing previews for every facturas row and exit")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--data-dir", default=None)
+    run.add_argument("--storage-dir", default=DEFAULT_STORAGE_DIR)
+    run.add_argument("--preview-dir", default=DEFAULT_PREVIEW_DIR)
+    archivo = sub.add_parser("archivo", help="render one file to stdout")
+    archivo.add_argument("path")
+    archivo.add_argument("--tipo", default="application/pdf")
+    archivo.add_argument("--variante", choices=tuple(VARIANTES), default="miniatura")
+    args = parser.parse_args()
+
+    if args.command == "archivo":
+        ext, data = generar_preview(args.path, args.tipo, args.variante)
+        print(f"ℹ️  {ext}, {len(data)} bytes", file=sys.stderr)
+        sys.stdout.buffer.write(data)
+        return 0
+
+    store = LocalStore(args.data_dir) if args.data_dir else LocalStore()
+    pipeline = PreviewPipeline(store, args.storage_dir, PreviewCache(args.preview_dir), workers=args.workers).start()
+    pipeline.join()
+    pipeline.stop()
+    store.close()
+    print(f"✅ {pipeline.stats['generadas']} generadas, {pipeline.stats['fallidas']} fallidas "
+          f"({len(pipeline.cache)} archivos, {pipeline.cache.bytes / 1024:.0f} KB en caché)")
+    return 0 if not pipeline.stats["fallidas"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Bulk RNC check-digit validation
+
+Same rule as validarRNC in backend/src/routes/dgii.ts (weights
+7,9,8,6,5,4,3,2, modulo 11), evaluated over NumPy batches so that a full
+DGII registry dump can be validated as a stream:
+
+    python -m services.rnc DGII_RNC.TXT --only-invalid > invalidos.tsv
+"""
+
+import argparse
+import re
+import sys
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+PESOS = (7, 9, 8, 6, 5, 4, 3, 2)
+
+# Tablas precalculadas: producto dígito × peso por posición y dígito verificador por residuo
+_PRODUCTOS = (np.array(PESOS, dtype=np.int32)[:, None] * np.arange(10, dtype=np.int32)).ravel()
+_OFFSETS = np.arange(len(PESOS), dtype=np.int32) * 10
+_DIGITO_VERIFICADOR = np.array([r if r < 2 else 11 - r for r in range(11)], dtype=np.int32)
+
+# \s de JavaScript, que no es el de Python: incluye BOM (U+FEFF) y excluye \x1c-\x1f y \x85
+_LIMPIAR = re.compile(r"[-\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]")
+_FORMATO = re.compile(r"[0-9]{9}")
+_LIMPIAR_ASCII = str.maketrans("", "", "- \t\n\r\v\f")
+
+
+def limpiar_rnc(rnc: str) -> str:
+    """Strip dashes and whitespace, as rnc.replace(/[-\\s]/g, '')"""
+    cleaned = rnc.translate(_LIMPIAR_ASCII)
+    # \s de JavaScript también cubre espacios Unicode (p. ej. NBSP) y el BOM
+    return cleaned if cleaned.isascii() else _LIMPIAR.sub("", cleaned)
+
+
+def validar_rnc(rnc: str) -> bool:
+    """Scalar port of validarRNC"""
+    clean = limpiar_rnc(rnc)
+    if not _FORMATO.fullmatch(clean):
+        return False
+    digits = [int(c) for c in clean]
+    total = sum(d * w for d, w in zip(digits, PESOS))
+    remainder = total % 11
+    check_digit = remainder if remainder < 2 else 11 - remainder
+    return check_digit == digits[8]
+
+
+def validar_lote(rncs: Sequence[str]) -> np.ndarray:
+    """Validate a batch of RNCs, returning a boolean array aligned with the input"""
+    cleaned = [limpiar_rnc(r) for r in rncs]
+    result = np.zeros(len(cleaned), dtype=bool)
+
+    candidates = np.fromiter((len(c) == 9 for c in cleaned), dtype=bool, count=len(cleaned))
+    index = np.flatnonzero(candidates)
+    if not len(index):
+        return result
+
+    raw = "".join(cleaned[i] for i in index).encode("latin-1", errors="replace")
+    digits = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 9) - np.uint8(48)
+    # uint8: cualquier carácter fuera de '0'..'9' queda >= 10 tras restar '0'
+    numeric = (digits < 10).all(axis=1)
+    digits = np.where(digits < 10, digits, 0).astype(np.int32)
+
+    total = _PRODUCTOS[_OFFSETS + digits[:, :8]].sum(axis=1)
+    valid = numeric & (_DIGITO_VERIFICADOR[total % 11] == digits[:, 8])
+    result[index] = valid
+    return result
+
+
+def validar_stream(rncs: Iterable[str], batch_size: int = 100_000) -> Iterator[Tuple[str, bool]]:
+    """Yield (rnc, valido) pairs, validating the input in batches of batch_size"""
+    iterator = iter(rncs)
+    while True:
+        batch: List[str] = [line.rstrip("\r\n") for line in islice(iterator, batch_size)]
+        if not batch:
+            return
+        batch = [line for line in batch if line.strip()]
+        yield from zip(batch, validar_lote(batch).tolist())
+
+
+def validar_archivo(path: str, batch_size: int = 100_000) -> Iterator[Tuple[str, bool]]:
+    """Stream-validate a file with one RNC per line"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from validar_stream(f, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate RNCs in bulk (one per line)")
+    parser.add_argument("input", help="file with one RNC per line, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--only-invalid", action="store_true")
+    args = parser.parse_args()
+
+    results = (validar_stream(sys.stdin, args.batch_size) if args.input == "-"
+               else validar_archivo(args.input, args.batch_size))
+    out = sys.stdout
+    for rnc, valido in results:
+        if valido and args.only_invalid:
+            continue
+        out.write(f"{rnc}\t{'valido' if valido else 'invalido'}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
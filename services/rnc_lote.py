@@ -0,0 +1,190 @@
+"""
+Batch RNC consultation
+
+POST /api/dgii/consultar-rnc resolves one RNC per round trip. This
+service takes a whole list, either as JSON ({"rncs": [...]}) or as an
+NDJSON stream (one RNC string or {"rnc": ...} object per line), and
+answers with NDJSON:
+
+    {"indice":0,"rnc":"131-79391-6","success":true,"data":{...}}
+    {"indice":1,"rnc":"123","success":false,"error":"RNC inválido"}
+    ...
+    {"resumen":{"total":2,"encontrados":1,"no_encontrados":0,"invalidos":1}}
+
+The input is cut into chunks. Each chunk is validated with the vectorized
+validarRNC (services.rnc.validar_lote) and looked up with one IN (...)
+query (RNCStore.consultar_lote) on a small thread pool, so SQLite reads
+overlap with parsing and with writing earlier results. Lines are
+written as each chunk completes, so their order follows completion, not
+the input; "indice" is the item's position in the request.
+
+    consulta = ConsultaLote(RNCStore("rnc_registro.sqlite3"), workers=4)
+    for resultados in consulta.resolver(["131793916", "101-23456-7"]):
+        ...
+"""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from services.dgii import SIMULADOS
+from services.http import App, Request, Response, error_response, json_bytes
+from services.local_store import now_iso
+from services.rnc import limpiar_rnc, validar_lote
+
+MAX_LOTE = int(os.getenv("RNC_LOTE_MAX", "50000"))
+DEFAULT_WORKERS = int(os.getenv("RNC_LOTE_WORKERS", "4"))
+DEFAULT_CHUNK = 500
+
+NDJSON = "application/x-ndjson"
+
+# Línea NDJSON que no es JSON: se informa como error de ese elemento
+_JSON_INVALIDO = object()
+
+
+def _rnc_de(entrada: Any) -> Any:
+    if entrada is _JSON_INVALIDO:
+        return None
+    return entrada.get("rnc") if isinstance(entrada, dict) else entrada
+
+
+class ConsultaLote:
+    """Validates and resolves RNCs chunk by chunk on a thread pool"""
+
+    def __init__(self, rnc_store=None, workers: int = DEFAULT_WORKERS, chunk: int = DEFAULT_CHUNK):
+        self.rnc_store = rnc_store
+        self.chunk = chunk
+        self.workers = workers
+        # Lotes en vuelo: acota la memoria cuando la entrada es un stream largo
+        self.max_en_vuelo = workers * 2
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rnc-lote")
+
+    def _resolver_chunk(self, chunk: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+        rncs = [_rnc_de(entrada) for _, entrada in chunk]
+        textos = [rnc if isinstance(rnc, str) else "" for rnc in rncs]
+        validos = validar_lote(textos).tolist()
+        encontrados = {}
+        if self.rnc_store is not None:
+            encontrados = self.rnc_store.consultar_lote([t for t, ok in zip(textos, validos) if ok])
+        ahora = None
+
+        resultados = []
+        for (indice, entrada), rnc, texto, valido in zip(chunk, rncs, textos, validos):
+            item: Dict[str, Any] = {"indice": indice, "rnc": rnc}
+            if entrada is _JSON_INVALIDO:
+                item.update(success=False, error="JSON inválido")
+            elif not rnc:
+                item.update(success=False, error="RNC es requerido")
+            elif not valido:
+                item.update(success=False, error="RNC inválido")
+            else:
+                limpio = limpiar_rnc(texto)
+                data = encontrados.get(limpio)
+                if data is None and limpio in SIMULADOS:
+                    ahora = ahora or now_iso()
+                    data = dict(SIMULADOS[limpio], ultima_actualizacion=ahora)
+                if data is None:
+                    item.update(success=False, error="RNC no encontrado")
+                else:
+                    item.update(success=True, data=data)
+            resultados.append(item)
+        return resultados
+
+    def resolver(self, entradas: Iterable[Any]) -> Iterator[List[Dict[str, Any]]]:
+        """Results for each input RNC (string or {"rnc": ...}), one list per completed chunk"""
+        iterator = enumerate(entradas)
+        en_curso: Set[Future] = set()
+        try:
+            while True:
+                chunk = list(islice(iterator, self.chunk))
+                if not chunk:
+                    break
+                if len(en_curso) >= self.max_en_vuelo:
+                    hechos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+                    for future in hechos:
+                        yield future.result()
+                en_curso.add(self.executor.submit(self._resolver_chunk, chunk))
+            while en_curso:
+                hechos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+                for future in hechos:
+                    yield future.result()
+        finally:
+            # Cliente desconectado: no seguir resolviendo lotes que nadie leerá
+            for future in en_curso:
+                future.cancel()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def leer_lineas(stream, length: Optional[int], bloque: int = 64 * 1024) -> Iterator[bytes]:
+    """Lines of a request body read incrementally, without buffering the whole body"""
+    restante = length or 0
+    resto = b""
+    while restante > 0:
+        data = stream.read(min(bloque, restante))
+        if not data:
+            break
+        restante -= len(data)
+        *lineas, resto = (resto + data).split(b"\n")
+        yield from lineas
+    if resto:
+        yield resto
+
+
+def entradas_ndjson(lineas: Iterable[bytes], limite: int, estado: Dict[str, Any]) -> Iterator[Any]:
+    for linea in lineas:
+        linea = linea.strip()
+        if not linea:
+            continue
+        if estado["leidas"] >= limite:
+            estado["excedido"] = True
+            return
+        estado["leidas"] += 1
+        try:
+            yield json.loads(linea)
+        except ValueError:
+            yield _JSON_INVALIDO
+
+
+def register_routes(app: App, consulta: ConsultaLote, max_lote: int = MAX_LOTE) -> None:
+    @app.route("POST", "/api/dgii/consultar-rnc/lote")
+    def consultar_lote(request: Request):
+        estado = {"leidas": 0, "excedido": False}
+        if request.content_type.split(";")[0].strip() == NDJSON:
+            if request.content_length is None:
+                # El servidor WSGI no decodifica cuerpos chunked: sin longitud se leería un lote vacío
+                return error_response("Se requiere Content-Length para NDJSON", 411)
+            entradas: Iterable[Any] = entradas_ndjson(
+                leer_lineas(request.stream, request.content_length), max_lote, estado)
+        else:
+            try:
+                body = request.json()
+            except ValueError:
+                return error_response("JSON inválido", 400)
+            entradas = body.get("rncs") if isinstance(body, dict) else body
+            if not isinstance(entradas, list) or not entradas:
+                return error_response("Lista de RNC es requerida", 400)
+            if len(entradas) > max_lote:
+                return error_response(f"Máximo {max_lote} RNC por lote", 413)
+
+        def cuerpo():
+            resumen = {"total": 0, "encontrados": 0, "no_encontrados": 0, "invalidos": 0}
+            for resultados in consulta.resolver(entradas):
+                for item in resultados:
+                    resumen["total"] += 1
+                    if item["success"]:
+                        resumen["encontrados"] += 1
+                    elif item["error"] == "RNC no encontrado":
+                        resumen["no_encontrados"] += 1
+                    else:
+                        resumen["invalidos"] += 1
+                yield b"\n".join(json_bytes(item) for item in resultados) + b"\n"
+            if estado["excedido"]:
+                yield json_bytes({"error": f"Máximo {max_lote} RNC por lote"}) + b"\n"
+            yield json_bytes({"resumen": resumen}) + b"\n"
+
+        return Response(cuerpo(), 200, [("Content-Type", f"{NDJSON}; charset=utf-8"),
+                                        ("Cache-Control", "no-store")])
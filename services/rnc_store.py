@@ -0,0 +1,267 @@
+"""
+Indexed RNC directory
+
+Replaces the per-call simulatedData dictionary of consultarRNCSimulado
+(backend/src/routes/dgii.ts) with an SQLite file loaded once from a DGII
+registry dump. Lookups go through the primary-key index on the cleaned
+RNC, name searches through an index on the normalised razón social, and
+hot entries are served from a bounded LRU.
+
+    python -m services.rnc_store load registro.csv --db rnc_registro.sqlite3
+    python -m services.rnc_store get 131-79391-6 --db rnc_registro.sqlite3
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from services.cache import LRUCache
+from services.rnc import limpiar_rnc
+
+DEFAULT_DB_PATH = os.getenv("RNC_DB_PATH", "rnc_registro.sqlite3")
+
+# Campos de la interfaz RNCData
+CAMPOS = (
+    "rnc", "razon_social", "nombre_comercial", "categoria", "regimen", "estado",
+    "actividad_economica", "direccion", "telefono", "email", "fecha_constitucion",
+    "fecha_inicio_operaciones", "ultima_actualizacion",
+)
+
+# Los mismos registros que devuelve hoy consultarRNCSimulado
+REGISTROS_EJEMPLO = [
+    {
+        "rnc": "131-79391-6",
+        "razon_social": "EMPRESA EJEMPLO SRL",
+        "nombre_comercial": "EJEMPLO",
+        "categoria": "CONTRIBUYENTE NORMAL",
+        "regimen": "ORDINARIO",
+        "estado": "ACTIVO",
+        "actividad_economica": "COMERCIO AL POR MENOR",
+        "direccion": "CALLE EJEMPLO #123, SANTO DOMINGO",
+        "telefono": "809-555-0123",
+        "email": "info@ejemplo.com",
+        "fecha_constitucion": "2020-01-15",
+        "fecha_inicio_operaciones": "2020-02-01",
+    },
+    {
+        "rnc": "101-23456-7",
+        "razon_social": "TECNOLOGIA AVANZADA SA",
+        "nombre_comercial": "TECNO AVANZADA",
+        "categoria": "GRAN CONTRIBUYENTE",
+        "regimen": "ESPECIAL",
+        "estado": "ACTIVO",
+        "actividad_economica": "DESARROLLO DE SOFTWARE",
+        "direccion": "AV. TECNOLOGIA #456, SANTO DOMINGO",
+        "telefono": "809-555-0456",
+        "email": "contacto@tecnoavanzada.com",
+        "fecha_constitucion": "2018-05-10",
+        "fecha_inicio_operaciones": "2018-06-01",
+    },
+]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rnc (
+    rnc_limpio TEXT PRIMARY KEY,
+    razon_social_busqueda TEXT NOT NULL,
+    {", ".join(f"{campo} TEXT" for campo in CAMPOS)}
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_rnc_razon_social ON rnc (razon_social_busqueda);
+"""
+
+_MISSING = object()
+
+
+def _normalizar_nombre(nombre: str) -> str:
+    return " ".join((nombre or "").upper().split())
+
+
+def _normalizar_columna(nombre: str) -> str:
+    return "_".join(nombre.strip().lower().split())
+
+
+def leer_registro(path: str, delimiter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Read a registry dump: JSON lines, or a delimited file whose header uses the RNCData field names"""
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        if delimiter is None:
+            delimiter = "|" if "|" in f.readline() else ","
+            f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        header = [_normalizar_columna(h) for h in next(reader)]
+        for row in reader:
+            yield dict(zip(header, (value.strip() for value in row)))
+
+
+class RNCStore:
+    """Read-mostly RNC directory backed by an SQLite file with an LRU in front"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, cache_size: int = 100_000,
+                 mmap_size: int = 256 * 1024 * 1024):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache = LRUCache(cache_size)
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        self._local = threading.local()
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def cargar(self, registros: Iterable[Dict[str, Any]], batch_size: int = 50_000) -> int:
+        """Upsert registry records in batches; returns the number of rows written"""
+        ahora = datetime.now(timezone.utc).isoformat()
+        columns = ("rnc_limpio", "razon_social_busqueda") + CAMPOS
+        sql = (f"INSERT OR REPLACE INTO rnc ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+
+        def filas(batch):
+            for registro in batch:
+                rnc = limpiar_rnc(str(registro.get("rnc", "")))
+                if not rnc:
+                    continue
+                values = [registro.get(campo) or None for campo in CAMPOS]
+                values[CAMPOS.index("ultima_actualizacion")] = registro.get("ultima_actualizacion") or ahora
+                yield (rnc, _normalizar_nombre(registro.get("razon_social", ""))) + tuple(values)
+
+        total = 0
+        iterator = iter(registros)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                with conn:
+                    cursor = conn.executemany(sql, filas(batch))
+                    total += cursor.rowcount
+        finally:
+            conn.close()
+        self.cache.clear()
+        return total
+
+    def cargar_archivo(self, path: str, delimiter: Optional[str] = None, batch_size: int = 50_000) -> int:
+        return self.cargar(leer_registro(path, delimiter), batch_size)
+
+    def consultar(self, rnc: str) -> Optional[Dict[str, Any]]:
+        """RNCData for rnc (dashes/whitespace ignored), or None when it is not registered"""
+        key = limpiar_rnc(rnc)
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        row = self.conn.execute(
+            f"SELECT {', '.join(CAMPOS)} FROM rnc WHERE rnc_limpio = ?", (key,)
+        ).fetchone()
+        data = dict(row) if row is not None else None
+        # También se guardan los "no encontrado" para no repetir la consulta
+        self.cache.put(key, data)
+        return data
+
+    def consultar_lote(self, rncs: Iterable[str], chunk: int = 500) -> Dict[str, Optional[Dict[str, Any]]]:
+        """RNCData (or None) per cleaned RNC: LRU first, then one IN (...) query per chunk of misses"""
+        resultado: Dict[str, Optional[Dict[str, Any]]] = {}
+        faltantes = []
+        for key in dict.fromkeys(limpiar_rnc(rnc) for rnc in rncs):
+            cached = self.cache.get(key, _MISSING)
+            if cached is _MISSING:
+                faltantes.append(key)
+            else:
+                resultado[key] = cached
+        for i in range(0, len(faltantes), chunk):
+            keys = faltantes[i:i + chunk]
+            rows = self.conn.execute(
+                f"SELECT rnc_limpio, {', '.join(CAMPOS)} FROM rnc "
+                f"WHERE rnc_limpio IN ({', '.join('?' for _ in keys)})", keys
+            ).fetchall()
+            encontrados = {row["rnc_limpio"]: {campo: row[campo] for campo in CAMPOS} for row in rows}
+            for key in keys:
+                data = encontrados.get(key)
+                self.cache.put(key, data)
+                resultado[key] = data
+        return resultado
+
+    def buscar_razon_social(self, prefijo: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Taxpayers whose razón social starts with prefijo (case-insensitive)"""
+        prefijo = _normalizar_nombre(prefijo)
+        if not prefijo:
+            return []
+        rows = self.conn.execute(
+            f"SELECT {', '.join(CAMPOS)} FROM rnc "
+            "WHERE razon_social_busqueda >= ? AND razon_social_busqueda < ? "
+            "ORDER BY razon_social_busqueda LIMIT ?",
+            (prefijo, prefijo + "\uffff", limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM rnc").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"registros": self.count(), "cache": self.cache.stats()}
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RNC directory")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="load a registry dump (use 'ejemplo' for the sample records)")
+    load.add_argument("source")
+    load.add_argument("--delimiter", default=None)
+    get = sub.add_parser("get")
+    get.add_argument("rnc")
+    search = sub.add_parser("search")
+    search.add_argument("prefix")
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = RNCStore(args.db)
+    if args.command == "load":
+        total = (store.cargar(REGISTROS_EJEMPLO) if args.source == "ejemplo"
+                 else store.cargar_archivo(args.source, args.delimiter))
+        print(f"✅ {total} RNC cargados en {args.db}")
+    elif args.command == "get":
+        data = store.consultar(args.rnc)
+        if data is None:
+            print("RNC no encontrado")
+            return 1
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        for data in store.buscar_razon_social(args.prefix, args.limit):
+            print(f"{data['rnc']}\t{data['razon_social']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""
+Full-text and faceted search over facturas and contactos
+
+SQLite FTS5 index over nombre_archivo, tipo_archivo and the extracted
+invoice text (services.extraccion), and over contact nombre, email and
+mensaje. Every document also carries its table, type and date so results
+can be narrowed by type facet and date range. The index follows the local
+store through insert/update/delete listeners, so it never rescans.
+
+Text hits are returned newest first (keyset cursor over the index rowid,
+which FTS5 walks without sorting) or by relevance (bm25 over the newest
+RELEVANCIA_MAXIMA matches, so common terms cost the same as rare ones).
+Filter-only queries walk the date indexes. Totals and facet counts for
+text queries stop counting at CONTEO_MAXIMO matches; for filter-only
+queries they come exact from per-day counters. The last query word is a
+prefix, expanded through a vocabulary table into at most PREFIJO_MAXIMO
+exact words.
+
+    index = SearchIndex("busqueda.sqlite3").attach(LocalStore())
+    index.buscar("ejemplo", tabla="facturas", desde="2025-07-01", limit=20)
+
+    python -m services.search reindex --db busqueda.sqlite3
+    python -m services.search buscar "empresa ejemplo" --db busqueda.sqlite3
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.http import App, Request, error_response, json_response
+from services.local_store import LocalStore
+
+DEFAULT_DB_PATH = os.getenv("SEARCH_DB_PATH", "busqueda.sqlite3")
+TABLAS = ("facturas", "contactos")
+MAX_LIMIT = 100
+CONTEO_MAXIMO = 1_000
+RELEVANCIA_MAXIMA = 1_000
+PREFIJO_MAXIMO = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    tabla TEXT NOT NULL,
+    ref_id INTEGER NOT NULL,
+    tipo TEXT NOT NULL DEFAULT '',
+    fecha TEXT NOT NULL DEFAULT '',
+    titulo TEXT,
+    UNIQUE (tabla, ref_id)
+);
+CREATE INDEX IF NOT EXISTS ix_docs_fecha ON docs (fecha);
+CREATE INDEX IF NOT EXISTS ix_docs_tabla_fecha ON docs (tabla, fecha);
+CREATE INDEX IF NOT EXISTS ix_docs_tipo_fecha ON docs (tipo, fecha);
+CREATE INDEX IF NOT EXISTS ix_docs_tabla_tipo_fecha ON docs (tabla, tipo, fecha);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    titulo, cuerpo, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS conteos (
+    tabla TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (tabla, tipo, dia)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terminos (termino TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+# Mismos separadores que unicode61: "_" también separa palabras
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+_FECHA = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def consulta_fts(q: str, expandir: Optional[Callable[[str], Optional[List[str]]]] = None) -> str:
+    """
+    User text to an FTS5 query: every word must match, the last one as a
+    prefix. expandir(prefijo) may return the indexed words starting with it
+    (None when there are too many), which are matched as an OR of exact
+    terms; FTS5's own prefix search has to merge every doclist in the range.
+    """
+    tokens = [_sin_acentos(t) for t in _TOKEN.findall(q or "")]
+    if not tokens:
+        return ""
+    # Entre comillas: los operadores de FTS5 (AND, NEAR, *, :) se tratan como texto
+    terms = [f'"{t}"' for t in tokens]
+    palabras = expandir(tokens[-1]) if expandir else None
+    if palabras is None:
+        terms[-1] += "*"
+    elif palabras:
+        terms[-1] = "(" + " OR ".join(f'"{p}"' for p in palabras) + ")"
+    return " AND ".join(terms)
+
+
+def terminos(*textos: Optional[str]) -> Set[str]:
+    """Distinct words of the texts as unicode61 (remove_diacritics) indexes them"""
+    return {t for texto in textos if texto for t in _TOKEN.findall(_sin_acentos(texto))}
+
+
+def documento(tabla: str, row: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """(tipo, fecha, titulo, cuerpo) indexed for a local store row"""
+    if tabla == "facturas":
+        extraccion = row.get("extraccion") or {}
+        cuerpo = " ".join(str(v) for v in (row.get("tipo_archivo"), row.get("tipo"), extraccion.get("rnc"),
+                                           extraccion.get("texto")) if v)
+        return (row.get("tipo") or row.get("tipo_archivo") or "", row.get("subido_en") or row.get("fecha_creacion") or "",
+                row.get("nombre_archivo") or "", cuerpo)
+    cuerpo = " ".join(str(v) for v in (row.get("email"), row.get("telefono"), row.get("mensaje")) if v)
+    return "", row.get("fecha_creacion") or "", row.get("nombre") or "", cuerpo
+
+
+def _sin_acentos(texto: str) -> str:
+    # Carácter a carácter (misma longitud) para que las posiciones sigan valiendo en el original
+    return "".join(unicodedata.normalize("NFKD", c)[0] for c in texto).lower()
+
+
+def fragmento(cuerpo: Optional[str], q: str, palabras: int = 12) -> Optional[str]:
+    """About `palabras` words of cuerpo around the first query term, the term in [brackets]"""
+    if not cuerpo:
+        return None
+    tokens = [_sin_acentos(t) for t in _TOKEN.findall(q)]
+    patron = "|".join(re.escape(t) + (r"\w*" if i == len(tokens) - 1 else r"\b")
+                      for i, t in enumerate(tokens))
+    encontrado = re.search(r"\b(?:" + patron + ")", _sin_acentos(cuerpo))
+    if encontrado is None:
+        return " ".join(cuerpo.split()[:palabras])
+    # El patrón termina en límite de palabra: el término encontrado es una palabra completa
+    antes = cuerpo[:encontrado.start()].split()[-(palabras // 2):]
+    despues = cuerpo[encontrado.end():].split()[:max(0, palabras - len(antes) - 1)]
+    return " ".join(antes + ["[" + cuerpo[encontrado.start():encontrado.end()] + "]"] + despues)
+
+
+def _limite_superior(hasta: str) -> str:
+    # Fecha sin hora: incluye el día completo
+    return hasta + "T23:59:59.999Z" if _FECHA.fullmatch(hasta) else hasta
+
+
+class SearchIndex:
+    """FTS5 index with type/date facets, kept current by local store listeners"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    # --- escritura --------------------------------------------------------------
+
+    def _contar(self, tabla: str, tipo: str, fecha: str, delta: int) -> None:
+        self.conn.execute(
+            "INSERT INTO conteos (tabla, tipo, dia, n) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (tabla, tipo, dia) DO UPDATE SET n = n + excluded.n",
+            (tabla, tipo, fecha[:10], delta),
+        )
+
+    def _upsert(self, tabla: str, row: Dict[str, Any]) -> None:
+        tipo, fecha, titulo, cuerpo = documento(tabla, row)
+        previo = self.conn.execute(
+            "SELECT doc_id, tipo, fecha FROM docs WHERE tabla = ? AND ref_id = ?", (tabla, row["id"])
+        ).fetchone()
+        if previo is None:
+            doc_id = self.conn.execute(
+                "INSERT INTO docs (tabla, ref_id, tipo, fecha, titulo) VALUES (?, ?, ?, ?, ?)",
+                (tabla, row["id"], tipo, fecha, titulo),
+            ).lastrowid
+        else:
+            doc_id = previo["doc_id"]
+            self.conn.execute("UPDATE docs SET tipo = ?, fecha = ?, titulo = ? WHERE doc_id = ?",
+                              (tipo, fecha, titulo, doc_id))
+            self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+            self._contar(tabla, previo["tipo"], previo["fecha"], -1)
+        self.conn.execute("INSERT INTO docs_fts (rowid, titulo, cuerpo) VALUES (?, ?, ?)", (doc_id, titulo, cuerpo))
+        # Vocabulario para expandir prefijos; no se poda: una palabra sin documentos no encuentra nada
+        self.conn.executemany("INSERT OR IGNORE INTO terminos (termino) VALUES (?)",
+                              [(t,) for t in terminos(titulo, cuerpo)])
+        self._contar(tabla, tipo, fecha, 1)
+
+    def indexar(self, tabla: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh rows of a local store table in one transaction"""
+        count = 0
+        with self._lock, self.conn:
+            for row in rows:
+                self._upsert(tabla, row)
+                count += 1
+        return count
+
+    def eliminar(self, tabla: str, ref_id: int) -> None:
+        with self._lock, self.conn:
+            previo = self.conn.execute(
+                "SELECT doc_id, tipo, fecha FROM docs WHERE tabla = ? AND ref_id = ?", (tabla, ref_id)
+            ).fetchone()
+            if previo is None:
+                return
+            self.conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (previo["doc_id"],))
+            self.conn.execute("DELETE FROM docs WHERE doc_id = ?", (previo["doc_id"],))
+            self._contar(tabla, previo["tipo"], previo["fecha"], -1)
+
+    def attach(self, store: LocalStore) -> "SearchIndex":
+        """Index the current facturas and contactos once, then follow their inserts/updates/deletes"""
+        for tabla in TABLAS:
+            def listener(evento, row, tabla=tabla):
+                if evento == "delete":
+                    self.eliminar(tabla, row["id"])
+                else:
+                    self.indexar(tabla, [row])
+            table = store.table(tabla)
+            # Como en services.aggregates: bajo el lock de la tabla ninguna escritura queda entre la carga y el listener
+            with table.lock:
+                self.indexar(tabla, list(table.records.values()))
+                store.subscribe(tabla, listener)
+        return self
+
+    def reconstruir(self, store: LocalStore) -> int:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM docs_fts")
+            self.conn.execute("DELETE FROM conteos")
+            self.conn.execute("DELETE FROM terminos")
+        return sum(self.indexar(tabla, list(store.table(tabla).records.values())) for tabla in TABLAS)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # --- consulta ---------------------------------------------------------------
+
+    def _expandir(self, prefijo: str) -> Optional[List[str]]:
+        # Rango sobre la clave primaria: "ab" <= termino < "ab\U0010ffff"
+        rows = self.conn.execute(
+            "SELECT termino FROM terminos WHERE termino >= ? AND termino < ? ORDER BY termino LIMIT ?",
+            (prefijo, prefijo + "\U0010ffff", PREFIJO_MAXIMO + 1),
+        ).fetchall()
+        return None if len(rows) > PREFIJO_MAXIMO else [r[0] for r in rows]
+
+    def _filtros(self, tabla, tipo, desde, hasta, con_texto: bool) -> Tuple[List[str], List[Any]]:
+        # Con texto, el "+" impide usar los índices de docs: FTS5 debe dirigir la consulta
+        # (si no, SQLite recorre docs y consulta FTS5 fila a fila)
+        prefijo = "+d." if con_texto else "d."
+        where, params = [], []
+        if tabla:
+            where.append(f"{prefijo}tabla = ?")
+            params.append(tabla)
+        if tipo:
+            where.append(f"{prefijo}tipo = ?")
+            params.append(tipo)
+        if desde:
+            where.append(f"{prefijo}fecha >= ?")
+            params.append(desde)
+        if hasta:
+            where.append(f"{prefijo}fecha <= ?")
+            params.append(_limite_superior(hasta))
+        return where, params
+
+    @staticmethod
+    def _facetas(rows) -> Dict[str, Dict[str, int]]:
+        facetas: Dict[str, Dict[str, int]] = {"tabla": {}, "tipo": {}}
+        for row in rows:
+            facetas["tabla"][row["tabla"]] = facetas["tabla"].get(row["tabla"], 0) + row["n"]
+            if row["tipo"]:
+                facetas["tipo"][row["tipo"]] = facetas["tipo"].get(row["tipo"], 0) + row["n"]
+        return facetas
+
+    def _conteos_exactos(self, tabla, tipo, desde, hasta) -> Dict[str, Any]:
+        where, params = ["n > 0"], []
+        for columna, valor in (("tabla", tabla), ("tipo", tipo)):
+            if valor:
+                where.append(f"{columna} = ?")
+                params.append(valor)
+        if desde:
+            where.append("dia >= ?")
+            params.append(desde)
+        if hasta:
+            where.append("dia <= ?")
+            params.append(hasta)
+        rows = self.conn.execute(
+            f"SELECT tabla, tipo, SUM(n) AS n FROM conteos WHERE {' AND '.join(where)} GROUP BY tabla, tipo",
+            params,
+        ).fetchall()
+        return {"total": sum(r["n"] for r in rows), "exacto": True, "facetas": self._facetas(rows)}
+
+    def _conteos_muestra(self, base: str, params: List[Any]) -> Dict[str, Any]:
+        rows = self.conn.execute(
+            f"SELECT tabla, tipo, COUNT(*) AS n FROM (SELECT d.tabla, d.tipo {base} LIMIT ?) GROUP BY tabla, tipo",
+            params + [CONTEO_MAXIMO + 1],
+        ).fetchall()
+        total = sum(r["n"] for r in rows)
+        return {"total": min(total, CONTEO_MAXIMO), "exacto": total <= CONTEO_MAXIMO, "facetas": self._facetas(rows)}
+
+    def buscar(self, q: str = "", tabla: Optional[str] = None, tipo: Optional[str] = None,
+               desde: Optional[str] = None, hasta: Optional[str] = None, limit: int = 20,
+               cursor: Optional[str] = None, orden: str = "reciente", facetas: bool = True) -> Dict[str, Any]:
+        """One page of hits plus total and tabla/tipo facet counts"""
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        with self._lock:
+            match = consulta_fts(q, self._expandir)
+        where, params = self._filtros(tabla, tipo, desde, hasta, bool(match))
+        if match:
+            base = "FROM docs_fts f JOIN docs d ON d.doc_id = f.rowid WHERE docs_fts MATCH ?"
+            params = [match] + params
+            columnas = "d.doc_id, d.tabla, d.ref_id, d.tipo, d.fecha, d.titulo, f.cuerpo"
+        else:
+            base = "FROM docs d WHERE 1 = 1"
+            columnas = "d.doc_id, d.tabla, d.ref_id, d.tipo, d.fecha, d.titulo, NULL AS cuerpo"
+        if where:
+            base += " AND " + " AND ".join(where)
+
+        with self._lock:
+            if match and (desde or hasta):
+                # Rango de rowid de los documentos del intervalo: FTS5 lo aplica al recorrer
+                # sus listas, en vez de filtrar por fecha todas las coincidencias más recientes
+                fechas, fecha_params = self._filtros(None, None, desde, hasta, False)
+                lo, hi = self.conn.execute(f"SELECT MIN(doc_id), MAX(doc_id) FROM docs d WHERE {' AND '.join(fechas)}",
+                                           fecha_params).fetchone()
+                base += " AND f.rowid BETWEEN ? AND ?"
+                params += [lo or 0, hi or 0]
+
+            page_base, page_params = base, list(params)
+            if match and orden == "relevancia":
+                # bm25 solo sobre las RELEVANCIA_MAXIMA coincidencias más recientes, en una sola pasada
+                offset = int(cursor or 0)
+                ids = [r[0] for r in self.conn.execute(
+                    f"SELECT doc_id FROM (SELECT f.rowid AS doc_id, bm25(docs_fts, 10.0, 1.0) AS score {base} "
+                    "ORDER BY f.rowid DESC LIMIT ?) ORDER BY score LIMIT ? OFFSET ?",
+                    params + [RELEVANCIA_MAXIMA, limit + 1, offset])]
+                # La página se lee por rowid sin MATCH: FTS5 repetiría la búsqueda por cada id
+                posicion = {id: i for i, id in enumerate(ids)}
+                sql = (f"SELECT {columnas} FROM docs d JOIN docs_fts f ON f.rowid = d.doc_id "
+                       f"WHERE d.doc_id IN ({', '.join('?' for _ in ids) or 'NULL'})")
+                page_params = ids
+            elif match:
+                # FTS5 recorre las coincidencias por rowid: orden descendente sin ordenar
+                if cursor:
+                    page_base += " AND f.rowid < ?"
+                    page_params.append(int(cursor))
+                sql = f"SELECT {columnas} {page_base} ORDER BY f.rowid DESC LIMIT ?"
+                page_params.append(limit + 1)
+            else:
+                # Solo filtros: se recorren los índices por fecha; cursor "fecha|doc_id"
+                if cursor:
+                    fecha, doc_id = cursor.rsplit("|", 1)
+                    page_base += " AND (d.fecha, d.doc_id) < (?, ?)"
+                    page_params += [fecha, int(doc_id)]
+                sql = f"SELECT {columnas} {page_base} ORDER BY d.fecha DESC, d.doc_id DESC LIMIT ?"
+                page_params.append(limit + 1)
+
+            rows = self.conn.execute(sql, page_params).fetchall()
+            if match and orden == "relevancia":
+                rows.sort(key=lambda r: posicion[r["doc_id"]])
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                if match and orden == "relevancia":
+                    next_cursor = str(offset + limit)
+                elif match:
+                    next_cursor = str(last["doc_id"])
+                else:
+                    next_cursor = f"{last['fecha']}|{last['doc_id']}"
+
+            result: Dict[str, Any] = {
+                "hits": [{"tabla": r["tabla"], "id": r["ref_id"], "tipo": r["tipo"] or None, "fecha": r["fecha"],
+                          "titulo": r["titulo"], "fragmento": fragmento(r["cuerpo"], q) if match else None}
+                         for r in rows],
+                "next_cursor": next_cursor,
+            }
+            if facetas:
+                fechas_exactas = all(v is None or _FECHA.fullmatch(v) for v in (desde, hasta))
+                if not match and fechas_exactas:
+                    result.update(self._conteos_exactos(tabla, tipo, desde, hasta))
+                else:
+                    result.update(self._conteos_muestra(base, params))
+        return result
+
+
+def register_routes(app: App, index: SearchIndex) -> None:
+    @app.route("GET", "/api/buscar")
+    def buscar(request: Request):
+        query = request.query
+        tabla = query.get("tabla")
+        if tabla and tabla not in TABLAS:
+            return error_response("Tabla inválida", 400)
+        try:
+            return json_response(index.buscar(
+                query.get("q", ""), tabla=tabla, tipo=query.get("tipo"), desde=query.get("desde"),
+                hasta=query.get("hasta"), limit=int(query.get("limit", 20)), cursor=query.get("cursor"),
+                orden=query.get("orden", "reciente"), facetas=query.get("facetas", "1") != "0",
+            ))
+        except ValueError:
+            return error_response("Parámetros de búsqueda inválidos", 400)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search index over facturas and contactos")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--data-dir", default=None, help="local store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("reindex", help="rebuild the index from the local store")
+    buscar = sub.add_parser("buscar", help="run a query")
+    buscar.add_argument("q", nargs="?", default="")
+    buscar.add_argument("--tabla", choices=TABLAS)
+    buscar.add_argument("--tipo")
+    buscar.add_argument("--desde")
+    buscar.add_argument("--hasta")
+    buscar.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    if args.command == "reindex":
+        store = LocalStore(args.data_dir) if args.data_dir else LocalStore()
+        print(f"✅ {index.reconstruir(store):,} documentos indexados")
+        store.close()
+    else:
+        print(json.dumps(index.buscar(args.q, args.tabla, args.tipo, args.desde, args.hasta, args.limit),
+                         ensure_ascii=False, indent=2))
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
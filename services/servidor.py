@@ -0,0 +1,120 @@
+"""
+Local stand-in for the Express backend
+
+Serves the same routes as backend/src/app.ts (/, /health,
+/api/calculadora/*, /api/contacto/*, /api/facturas/*, /api/dgii/*) from
+the Python services over the local store, so backend_test.py and the
+replay benchmarks can run without Node, Supabase or network access.
+Python-only routes (batch RNC lookups, the calculation log, search, the
+dashboard rollups, /metrics) are mounted too. Uploaded facturas go
+through the background text extraction, whose amounts feed the rollups.
+
+    python -m services.servidor --port 4000 --data-dir /tmp/impuestosrd
+    python backend_test.py --base-url http://localhost:4000
+
+Without --data-dir / --storage-dir it keeps its rows and files under
+$SERVIDOR_DIR (default <tmp>/impuestosrd-servidor), never in the
+backend/ source tree.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import tempfile
+from typing import Optional
+
+from services import (aggregates, calculadora_cache, contacto, descargas, dgii, extraccion, facturas, historial,
+                      metrics, previews, rnc_lote, search, simulador, uploads)
+from services.blob_store import DEFAULT_STORAGE_DIR
+from services.http import App, Request, json_response, serve
+from services.local_store import LocalStore, now_iso
+
+# Directorio propio del servidor local: una ejecución sin argumentos no escribe en backend/
+SERVIDOR_DIR = os.getenv("SERVIDOR_DIR", os.path.join(tempfile.gettempdir(), "impuestosrd-servidor"))
+
+
+def crear_app(store: LocalStore, storage_dir: str = DEFAULT_STORAGE_DIR, rnc_store=None,
+              instrumentar: bool = True, pipeline_previews: Optional[previews.PreviewPipeline] = None,
+              cola_contactos=None, historial_calculos: Optional[historial.HistorialCalculos] = None,
+              indice_busqueda: Optional[search.SearchIndex] = None) -> App:
+    app = App()
+
+    @app.route("GET", "/")
+    def raiz(request: Request):
+        return json_response({"message": "API ImpuestosRD backend ready 🚀"})
+
+    @app.route("GET", "/health")
+    def salud(request: Request):
+        return json_response({"status": "OK", "timestamp": now_iso()})
+
+    calculadora_cache.register_routes(app, calculadora_cache.CalculadoraCache(historial=historial_calculos))
+    if historial_calculos is not None:
+        historial.register_routes(app, historial_calculos)
+    simulador.register_routes(app, historial_calculos)
+    contacto.register_routes(app, store, cola_contactos)
+    facturas.register_routes(app, store)
+    uploads.register_routes(app, store, storage_dir)
+    descargas.register_routes(app, descargas.Descargas(storage_dir).attach(store))
+    if pipeline_previews is not None:
+        previews.register_routes(app, store, pipeline_previews)
+    aggregates.register_routes(app, aggregates.Aggregates().attach(store))
+    # Sin índice propio se construye uno en memoria a partir del store y se mantiene con sus escrituras
+    search.register_routes(app, (indice_busqueda or search.SearchIndex(":memory:")).attach(store))
+    dgii.register_routes(app, rnc_store)
+    rnc_lote.register_routes(app, rnc_lote.ConsultaLote(rnc_store))
+    if instrumentar:
+        registro = metrics.Metrics().instrument_app(app).instrument_shared_engines()
+        metrics.register_routes(app, registro)
+    return app
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Express backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "4000")))
+    parser.add_argument("--data-dir", default=os.path.join(SERVIDOR_DIR, "data"), help="local store directory")
+    parser.add_argument("--storage-dir", default=os.path.join(SERVIDOR_DIR, "uploads"), help="uploaded invoices")
+    parser.add_argument("--rnc-db", default=None, help="RNC registry built by services.rnc_store")
+    parser.add_argument("--preview-dir", default=None, help="preview cache (default: <data-dir>/previews)")
+    parser.add_argument("--contact-queue", default=None,
+                        help="write-behind queue file; contacts are flushed to and listed from DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    store = LocalStore(args.data_dir)
+    rnc_store = None
+    if args.rnc_db:
+        from services.rnc_store import RNCStore
+        rnc_store = RNCStore(args.rnc_db)
+    cache = previews.PreviewCache(args.preview_dir or os.path.join(args.data_dir, "previews"))
+    pipeline = previews.PreviewPipeline(store, args.storage_dir, cache).start()
+    # La extracción escribe extraccion.calculo en cada factura: de ahí salen los impuestos del dashboard
+    extracciones = extraccion.ExtractionPipeline(store, args.storage_dir).start()
+    calculos = historial.HistorialCalculos(os.path.join(args.data_dir, "historial")).start()
+    cola = None
+    if args.contact_queue:
+        from database.contact_queue import ContactQueue
+        cola = ContactQueue(args.contact_queue).start()
+    # SIGTERM también cierra los pools de previews y extracción; si no, sus procesos quedan huérfanos
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(crear_app(store, args.storage_dir, rnc_store, pipeline_previews=pipeline, cola_contactos=cola,
+                        historial_calculos=calculos),
+              args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop(wait=False)
+        extracciones.stop(wait=False)
+        try:
+            calculos.close()
+        except OSError as e:
+            print(f"⚠️  Historial sin escribir al cerrar: {e}")
+        if cola is not None:
+            cola.close()
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Tax scenario simulator ("¿qué pasa si cambia el ITBIS?")
+
+Runs one invoice set through a grid of rate configurations at once. The
+invoices are a column of subtotals plus the aplicar* flags; each
+scenario is a (porcentajeITBIS, porcentajeIVA, porcentajeRetencion)
+triple. Invoices are processed in row chunks and each chunk is broadcast
+against all scenarios as a (rows, scenarios) matrix, with the same
+per-row arithmetic as /api/calculadora/calcular (services.calculadora),
+so memory stays bounded by memoria_mb whatever the number of invoices.
+
+Each scenario's totals come back next to the change against today's
+rates (18 / 18 / 10). POST /api/calculadora/simular takes the invoices
+as /calcular bodies ({"facturas": [...]}) or the calculation log
+({"historial": {"desde": ...}}), and either "escenarios" or a "rejilla"
+of rate lists.
+
+    escenarios = rejilla(itbis=[16, 18, 20], retencion=[0, 5, 10])
+    simular(Facturas.desde_solicitudes(bodies), escenarios)
+
+    python -m services.simulador facturas.csv --itbis 16:20:1 --retencion 0,5,10
+    python -m services.simulador --historial --desde 2025-01 --itbis 16,18 --json
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from services.calculadora import PORCENTAJE_ITBIS, PORCENTAJE_IVA, PORCENTAJE_RETENCION, normalizar_solicitud
+from services.http import App, Request, error_response, json_response
+
+DEFAULT_MEMORIA_MB = int(os.getenv("SIMULADOR_MEMORIA_MB", "256"))
+MAX_ESCENARIOS = int(os.getenv("SIMULADOR_MAX_ESCENARIOS", "1000"))
+MAX_FACTURAS = int(os.getenv("SIMULADOR_MAX_FACTURAS", "1000000"))
+
+MONTOS = ("subtotal", "itbis", "iva", "retencion", "total")
+# Matrices (filas × escenarios) de float64 vivas a la vez en _sumar_bloque
+_MATRICES = 4
+
+_CLAVES = {"porcentajeITBIS": "porcentaje_itbis", "porcentajeIVA": "porcentaje_iva",
+           "porcentajeRetencion": "porcentaje_retencion"}
+
+
+@dataclass(frozen=True)
+class Escenario:
+    porcentaje_itbis: float = PORCENTAJE_ITBIS
+    porcentaje_iva: float = PORCENTAJE_IVA
+    porcentaje_retencion: float = PORCENTAJE_RETENCION
+
+    @classmethod
+    def desde_dict(cls, data: Dict[str, Any]) -> "Escenario":
+        """Scenario from the endpoint's camelCase keys (missing ones keep today's rate)"""
+        valores = {}
+        for key, campo in _CLAVES.items():
+            if key in data:
+                value = data[key]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                    raise ValueError(f"{key} debe ser un número")
+                valores[campo] = float(value)
+        return cls(**valores)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {key: getattr(self, campo) for key, campo in _CLAVES.items()}
+
+
+ACTUAL = Escenario()
+
+
+def rejilla(itbis: Sequence[float] = (PORCENTAJE_ITBIS,), iva: Sequence[float] = (PORCENTAJE_IVA,),
+            retencion: Sequence[float] = (PORCENTAJE_RETENCION,)) -> List[Escenario]:
+    """Every combination of the given rates"""
+    return [Escenario(float(a), float(b), float(c)) for a, b, c in product(itbis, iva, retencion)]
+
+
+@dataclass
+class Facturas:
+    """Invoice columns: subtotal and the aplicar* flags (scalars broadcast to every row)"""
+
+    subtotal: np.ndarray
+    aplicar_itbis: Union[np.ndarray, bool] = True
+    aplicar_iva: Union[np.ndarray, bool] = False
+    aplicar_retencion: Union[np.ndarray, bool] = False
+
+    def __len__(self) -> int:
+        return len(self.subtotal)
+
+    def bloques(self, filas: int) -> Iterator["Facturas"]:
+        """Row slices of at most filas rows (views: memory-mapped columns stay on disk)"""
+        def corte(value, i):
+            return value[i:i + filas] if isinstance(value, np.ndarray) else value
+        for i in range(0, len(self), filas):
+            yield Facturas(self.subtotal[i:i + filas], corte(self.aplicar_itbis, i),
+                           corte(self.aplicar_iva, i), corte(self.aplicar_retencion, i))
+
+    @classmethod
+    def desde_solicitudes(cls, bodies: Sequence[Dict[str, Any]]) -> "Facturas":
+        """Invoices given as /calcular request bodies (subtotal and flags coerced like the endpoint)"""
+        filas = [normalizar_solicitud(b) for b in bodies]
+        if not filas:
+            return cls(np.empty(0, dtype=np.float64))
+        subtotal, itbis, iva, retencion = list(zip(*filas))[:4]
+        return cls(np.array(subtotal, dtype=np.float64), np.array(itbis, dtype=bool),
+                   np.array(iva, dtype=bool), np.array(retencion, dtype=bool))
+
+    @classmethod
+    def desde_csv(cls, path: str) -> "Facturas":
+        """CSV with a subtotal column and optional aplicarITBIS / aplicarIVA / aplicarRetencion (1/0, true/false)"""
+        columnas: Dict[str, List[str]] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                for key, value in row.items():
+                    columnas.setdefault(key, []).append(value)
+        if "subtotal" not in columnas:
+            raise ValueError("El CSV necesita una columna subtotal")
+
+        def bandera(key, default):
+            if key not in columnas:
+                return default
+            return np.array([v.strip().lower() in ("1", "true", "si", "sí") for v in columnas[key]])
+        return cls(np.array([float(v or "nan") for v in columnas["subtotal"]], dtype=np.float64),
+                   bandera("aplicarITBIS", True), bandera("aplicarIVA", False), bandera("aplicarRetencion", False))
+
+
+def desde_historial(historial, desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[Facturas]:
+    """One Facturas per day partition of the calculation log (services.historial), memory-mapped"""
+    for dia in historial.particiones(desde, hasta):
+        subtotal = historial.columna(dia, "subtotal")
+        aplicar = historial.columna(dia, "aplicar")[:len(subtotal)]
+        subtotal = subtotal[:len(aplicar)]
+        yield Facturas(subtotal, (aplicar & 1) != 0, (aplicar & 2) != 0, (aplicar & 4) != 0)
+
+
+def _columna(value: np.ndarray, n: int) -> np.ndarray:
+    # Bandera por fila como columna (n, 1) de 0.0 / 1.0 que se difunde contra los escenarios
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))[:, None]
+
+
+def _sumar_bloque(bloque: Facturas, tasas: np.ndarray, sumas: np.ndarray) -> int:
+    """Add one chunk's per-scenario sums into sumas (montos × escenarios); returns its valid rows"""
+    subtotal = np.asarray(bloque.subtotal, dtype=np.float64)
+    # `!subtotal`: 0 y NaN se rechazan con 400, igual que calcular_lote
+    valido = (subtotal != 0) & ~np.isnan(subtotal)
+    if not valido.all():
+        subtotal = subtotal[valido]
+        bloque = Facturas(subtotal, *(v[valido] if isinstance(v, np.ndarray) else v for v in
+                                      (bloque.aplicar_itbis, bloque.aplicar_iva, bloque.aplicar_retencion)))
+    n = len(subtotal)
+    if not n:
+        return 0
+    s = subtotal[:, None]
+    total = np.broadcast_to(s, (n, tasas.shape[1])).copy()
+    sumas[0] += subtotal.sum()
+    # Mismas operaciones y en el mismo orden que el handler: subtotal * (porcentaje / 100),
+    # total = subtotal + itbis + iva - retencion; multiplicar por la bandera 0/1 equivale a
+    # where(aplicar, valor, 0) para valores finitos
+    for fila, (tasa, aplicar) in enumerate(zip(tasas, (bloque.aplicar_itbis, bloque.aplicar_iva,
+                                                       bloque.aplicar_retencion)), start=1):
+        if isinstance(aplicar, (bool, np.bool_)) and not aplicar:
+            continue
+        impuesto = s * tasa[None, :]
+        if isinstance(aplicar, np.ndarray):
+            impuesto *= _columna(aplicar, n)
+        sumas[fila] += impuesto.sum(axis=0)
+        if fila == 3:
+            total -= impuesto
+        else:
+            total += impuesto
+    sumas[4] += total.sum(axis=0)
+    return n
+
+
+def simular(facturas: Union[Facturas, Iterable[Facturas]], escenarios: Sequence[Escenario],
+            memoria_mb: int = DEFAULT_MEMORIA_MB) -> List[Dict[str, Any]]:
+    """Per-scenario totals (and change vs today's rates) over every valid invoice"""
+    if not escenarios:
+        raise ValueError("Se requiere al menos un escenario")
+    todos = list(escenarios) + [ACTUAL]
+    tasas = np.array([[e.porcentaje_itbis, e.porcentaje_iva, e.porcentaje_retencion] for e in todos],
+                     dtype=np.float64).T / 100
+    filas = max(1, memoria_mb * 1024 * 1024 // (8 * len(todos) * _MATRICES))
+    sumas = np.zeros((len(MONTOS), len(todos)), dtype=np.float64)
+    validas = 0
+    for grupo in ([facturas] if isinstance(facturas, Facturas) else facturas):
+        for bloque in grupo.bloques(filas):
+            validas += _sumar_bloque(bloque, tasas, sumas)
+
+    actual = sumas[:, -1]
+    resultados = []
+    for i, escenario in enumerate(escenarios):
+        totales = {monto: round(float(sumas[m, i]), 2) for m, monto in enumerate(MONTOS)}
+        variacion = {monto: round(float(sumas[m, i] - actual[m]), 2) for m, monto in enumerate(MONTOS[1:], 1)}
+        resultados.append({"escenario": escenario.to_dict(), "facturas": validas, **totales, "variacion": variacion})
+    return resultados
+
+
+def _escenarios_de(body: Dict[str, Any]) -> List[Escenario]:
+    if "rejilla" in body:
+        grid = body["rejilla"]
+        if not isinstance(grid, dict):
+            raise ValueError("rejilla debe ser un objeto")
+        rangos = {}
+        for key, default in (("porcentajeITBIS", PORCENTAJE_ITBIS), ("porcentajeIVA", PORCENTAJE_IVA),
+                             ("porcentajeRetencion", PORCENTAJE_RETENCION)):
+            valores = grid.get(key, [default])
+            if not isinstance(valores, list) or not valores:
+                raise ValueError(f"rejilla.{key} debe ser una lista de números")
+            rangos[key] = valores
+        if math.prod(len(v) for v in rangos.values()) > MAX_ESCENARIOS:
+            raise ValueError(f"Máximo {MAX_ESCENARIOS} escenarios")
+        return [Escenario.desde_dict(dict(zip(rangos, combinacion))) for combinacion in product(*rangos.values())]
+    escenarios = body.get("escenarios")
+    if not isinstance(escenarios, list) or not escenarios:
+        raise ValueError("Se requiere escenarios o rejilla")
+    if len(escenarios) > MAX_ESCENARIOS:
+        raise ValueError(f"Máximo {MAX_ESCENARIOS} escenarios")
+    if not all(isinstance(e, dict) for e in escenarios):
+        raise ValueError("Cada escenario debe ser un objeto")
+    return [Escenario.desde_dict(e) for e in escenarios]
+
+
+def register_routes(app: App, historial=None) -> None:
+    @app.route("POST", "/api/calculadora/simular")
+    def simular_escenarios(request: Request):
+        try:
+            body = request.json()
+        except ValueError:
+            return error_response("JSON inválido", 400)
+        if not isinstance(body, dict):
+            return error_response("Se requiere un objeto JSON", 400)
+        try:
+            escenarios = _escenarios_de(body)
+            if isinstance(body.get("facturas"), list):
+                if len(body["facturas"]) > MAX_FACTURAS:
+                    return error_response(f"Máximo {MAX_FACTURAS} facturas", 413)
+                datos = Facturas.desde_solicitudes(body["facturas"])
+            elif isinstance(body.get("historial"), dict) and historial is not None:
+                # Los cálculos ya registrados en el historial como conjunto de facturas
+                historial.flush()
+                datos = desde_historial(historial, body["historial"].get("desde"), body["historial"].get("hasta"))
+            else:
+                return error_response("Se requiere facturas (o historial)", 400)
+            return json_response({"escenarios": simular(datos, escenarios)})
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+
+def _valores(texto: str) -> List[float]:
+    """'16,18,20' or a 'start:stop:step' range (stop included)"""
+    if ":" in texto:
+        inicio, fin, paso = (float(v) for v in texto.split(":"))
+        return [round(v, 10) for v in np.arange(inicio, fin + paso / 2, paso)]
+    return [float(v) for v in texto.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tax scenario simulator")
+    parser.add_argument("csv", nargs="?", help="invoices CSV (subtotal, aplicarITBIS, aplicarIVA, aplicarRetencion)")
+    parser.add_argument("--historial", action="store_true", help="use the calculation log instead of a CSV")
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--itbis", type=_valores, default=[PORCENTAJE_ITBIS])
+    parser.add_argument("--iva", type=_valores, default=[PORCENTAJE_IVA])
+    parser.add_argument("--retencion", type=_valores, default=[PORCENTAJE_RETENCION])
+    parser.add_argument("--memoria-mb", type=int, default=DEFAULT_MEMORIA_MB)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.historial:
+        from services.historial import HistorialCalculos
+        datos = desde_historial(HistorialCalculos(), args.desde, args.hasta)
+    elif args.csv:
+        datos = Facturas.desde_csv(args.csv)
+    else:
+        parser.error("se requiere un CSV o --historial")
+    resultados = simular(datos, rejilla(args.itbis, args.iva, args.retencion), args.memoria_mb)
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'ITBIS':>6} {'IVA':>6} {'Ret.':>6} {'ITBIS RD$':>16} {'Retención RD$':>16} {'Total RD$':>18} {'Δ total':>16}")
+    for r in resultados:
+        e = r["escenario"]
+        print(f"{e['porcentajeITBIS']:>6g} {e['porcentajeIVA']:>6g} {e['porcentajeRetencion']:>6g} "
+              f"{r['itbis']:>16,.2f} {r['retencion']:>16,.2f} {r['total']:>18,.2f} {r['variacion']['total']:>+16,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Streaming invoice upload ingest
+
+Python counterpart of POST /api/facturas/subir. The multipart body is read
+in fixed-size chunks straight from the request stream; each chunk of the
+"factura" part is hashed (SHA-256), counted and written to a temporary
+file, which is then renamed into the blob store (services.blob_store).
+No step holds the whole file in memory, so peak memory per upload is one
+chunk plus the boundary tail whatever the file size (multer +
+fs.readFileSync held all of it).
+
+    app = App()
+    register_routes(app, LocalStore())
+"""
+
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.blob_store import DEFAULT_STORAGE_DIR, BlobStore
+from services.http import App, Request, error_response, json_response
+from services.local_store import LocalStore, now_iso
+
+MAX_FILE_SIZE = 50 * 1024 * 1024  # Máx 50MB, como multer
+MAX_FIELD_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+CHUNK_SIZE = 64 * 1024
+CAMPO_ARCHIVO = "factura"
+
+# Permite imágenes y PDFs (mismo filtro que facturas.ts)
+MIME_IMAGEN = re.compile(r"image/(png|jpg|jpeg|webp)")
+
+
+class UploadError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class UploadedFile:
+    field: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    path: str
+
+
+def mime_permitido(content_type: str) -> bool:
+    return bool(MIME_IMAGEN.search(content_type)) or content_type == "application/pdf"
+
+
+def parse_boundary(content_type: str) -> bytes:
+    match = re.search(r'boundary=(?:"([^"]+)"|([^;\s]+))', content_type or "")
+    if not content_type.lower().startswith("multipart/form-data") or match is None:
+        raise UploadError(400, "Se esperaba multipart/form-data")
+    return (match.group(1) or match.group(2)).encode("latin-1")
+
+
+def _parse_headers(block: bytes) -> Dict[str, str]:
+    headers = {}
+    for line in block.decode("utf-8", "replace").split("\r\n"):
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _disposition_params(value: str) -> Dict[str, str]:
+    return {k.lower(): v1 if v1 or not v2 else v2
+            for k, v1, v2 in re.findall(r';\s*([\w*-]+)=(?:"((?:[^"\\]|\\.)*)"|([^;]*))', value)}
+
+
+class _FileSink:
+    """Writes a part to disk while counting and hashing it"""
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.file = open(path, "wb")
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> None:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadError(413, f"El archivo excede el límite de {self.max_size // (1024 * 1024)}MB")
+        self.hash.update(data)
+        self.file.write(data)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MultipartReader:
+    """Incremental multipart/form-data parser over a file-like stream"""
+
+    def __init__(self, stream, boundary: bytes, content_length: Optional[int], tmp_dir: str,
+                 max_file_size: int = MAX_FILE_SIZE, file_fields: Tuple[str, ...] = (CAMPO_ARCHIVO,),
+                 chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.remaining = content_length
+        self.tmp_dir = tmp_dir
+        self.max_file_size = max_file_size
+        self.file_fields = file_fields
+        self.delimiter = b"\r\n--" + boundary
+        # El CRLF inicial permite tratar el primer delimitador igual que los demás
+        self.buffer = bytearray(b"\r\n")
+        self._chunk = bytearray(chunk_size)
+        self._readinto = getattr(stream, "readinto", None)
+
+    def _fill(self) -> bool:
+        size = len(self._chunk) if self.remaining is None else min(len(self._chunk), self.remaining)
+        if size <= 0:
+            return False
+        if self._readinto is not None:
+            view = memoryview(self._chunk)[:size]
+            got = self._readinto(view)
+            if got:
+                self.buffer += view[:got]
+            view.release()
+        else:
+            data = self.stream.read(size)
+            got = len(data)
+            self.buffer += data
+        if not got:
+            self.remaining = 0
+            return False
+        if self.remaining is not None:
+            self.remaining -= got
+        return True
+
+    def _ensure(self, n: int) -> None:
+        while len(self.buffer) < n:
+            if not self._fill():
+                raise UploadError(400, "Cuerpo multipart incompleto")
+
+    def _copy_until_delimiter(self, write: Callable[[Any], None]) -> None:
+        keep = len(self.delimiter) - 1
+        while True:
+            index = self.buffer.find(self.delimiter)
+            if index >= 0:
+                if index:
+                    write(memoryview(self.buffer)[:index])
+                del self.buffer[:index + len(self.delimiter)]
+                return
+            # Se retiene la cola por si el delimitador cae entre dos lecturas
+            if len(self.buffer) > keep:
+                n = len(self.buffer) - keep
+                write(memoryview(self.buffer)[:n])
+                del self.buffer[:n]
+            if not self._fill():
+                raise UploadError(400, "Cuerpo multipart incompleto")
+
+    def _read_headers(self) -> Dict[str, str]:
+        while True:
+            index = self.buffer.find(b"\r\n\r\n")
+            if index >= 0:
+                block = bytes(self.buffer[2:index])
+                del self.buffer[:index + 4]
+                return _parse_headers(block)
+            if len(self.buffer) > MAX_HEADER_SIZE:
+                raise UploadError(400, "Cabeceras multipart demasiado grandes")
+            if not self._fill():
+                raise UploadError(400, "Cuerpo multipart incompleto")
+
+    def _read_field(self) -> str:
+        chunks: List[bytes] = []
+        size = 0
+
+        def write(data):
+            nonlocal size
+            size += len(data)
+            if size > MAX_FIELD_SIZE:
+                raise UploadError(413, "Campo demasiado grande")
+            chunks.append(bytes(data))
+
+        self._copy_until_delimiter(write)
+        return b"".join(chunks).decode("utf-8", "replace")
+
+    def _read_file(self, field: str, filename: str, content_type: str) -> UploadedFile:
+        if field not in self.file_fields:
+            raise UploadError(400, "Campo de archivo inesperado")
+        if not mime_permitido(content_type):
+            raise UploadError(400, "Solo imágenes y PDFs son permitidos")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        path = os.path.join(self.tmp_dir, f"{time.time_ns()}-{os.getpid()}-{id(self)}.part")
+        sink = _FileSink(path, self.max_file_size)
+        try:
+            self._copy_until_delimiter(sink.write)
+        except BaseException:
+            sink.close()
+            os.remove(path)
+            raise
+        sink.close()
+        return UploadedFile(field, filename, content_type, sink.size, sink.hash.hexdigest(), path)
+
+    def parse(self) -> Tuple[Dict[str, str], List[UploadedFile]]:
+        fields: Dict[str, str] = {}
+        files: List[UploadedFile] = []
+        try:
+            self._copy_until_delimiter(lambda data: None)  # preámbulo
+            while True:
+                self._ensure(2)
+                if self.buffer[:2] == b"--":
+                    return fields, files
+                if self.buffer[:2] != b"\r\n":
+                    raise UploadError(400, "Cuerpo multipart mal formado")
+                headers = self._read_headers()
+                params = _disposition_params(headers.get("content-disposition", ""))
+                name = params.get("name", "")
+                if "filename" in params:
+                    if any(uploaded.field == name for uploaded in files):
+                        # Como multer .single(): un segundo archivo en el mismo campo es inesperado
+                        raise UploadError(400, "Campo de archivo inesperado")
+                    files.append(self._read_file(name, params["filename"],
+                                                 headers.get("content-type", "application/octet-stream")))
+                else:
+                    fields[name] = self._read_field()
+        except BaseException:
+            for uploaded in files:
+                if os.path.exists(uploaded.path):
+                    os.remove(uploaded.path)
+            raise
+
+
+def recibir_factura(stream, content_type: str, content_length: Optional[int], store: LocalStore,
+                    storage_dir: str = DEFAULT_STORAGE_DIR, blobs: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """Stream one upload into storage and record it; raises UploadError with the HTTP status"""
+    if not (content_type or "").lower().startswith("multipart/"):
+        # Sin cuerpo multipart multer deja req.file vacío
+        raise UploadError(400, "No se subió archivo")
+    reader = MultipartReader(stream, parse_boundary(content_type), content_length,
+                             os.path.join(storage_dir, "tmp"))
+    _, files = reader.parse()
+    if not files:
+        raise UploadError(400, "No se subió archivo")
+    uploaded = files[0]
+
+    # El archivo se renombra al blob de su hash (sin copiar); si ya existía, el temporal se descarta
+    blobs = blobs or BlobStore(storage_dir)
+    # Fijado hasta que exista la fila: un release concurrente (eliminar_factura) contaría 0 referencias
+    with blobs.fijar(uploaded.sha256):
+        storage_path, _ = blobs.put_file(uploaded.path, uploaded.sha256)
+        result = store.from_("facturas").insert([{
+            "nombre_archivo": uploaded.filename,
+            "tipo_archivo": uploaded.content_type,
+            "tamano_archivo": uploaded.size,
+            "ruta_storage": storage_path,
+            "sha256": uploaded.sha256,
+            "subido_en": now_iso(),
+        }])
+    if result.error:
+        blobs.release(store, uploaded.sha256)
+        raise RuntimeError(result.error["message"])
+
+    return {
+        "message": "Factura subida con éxito",
+        "factura": result.data[0],
+        "storagePath": storage_path,
+    }
+
+
+def register_routes(app: App, store: LocalStore, storage_dir: str = DEFAULT_STORAGE_DIR) -> None:
+    blobs = BlobStore(storage_dir)
+
+    @app.route("POST", "/api/facturas/subir")
+    def subir(request: Request):
+        try:
+            body = recibir_factura(request.stream, request.content_type, request.content_length,
+                                   store, storage_dir, blobs)
+        except UploadError as e:
+            return error_response(e.message, e.status)
+        return json_response(body, 201)